@@ -0,0 +1,263 @@
+"""
+Per-tower antenna height and transmit power for the optimized network.
+
+get_coverage_distance gives every tower hb = 200 m and the fixed Pt of its
+tech. This stage picks, for each tower of optimized_network.csv, one height
+from HEIGHTS and one power step from POWER_STEPS_DB so that
+
+    cost = total transmit power / baseline power
+           + INTERFERENCE_WEIGHT * co-channel overlap / total demand weight
+
+is as low as possible while the service-weighted coverage of the demand points
+(buildings, or hex centroids) stays at or above the target (by default the
+coverage of the untuned network).
+
+The radius of every (tower, option) pair comes from one coverage_distances
+call. Each tower's demand points within its largest radius are sorted by
+distance, so an option covers a prefix of that list, and the state keeps the
+per-point coverage count and per-channel coverage count. With prefix sums over
+a tower's list, the coverage and interference change of all its options is
+evaluated in one pass, and applying a move only touches the points between
+the old and new radius.
+"""
+import os
+import sys
+import csv
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import (
+    HEX_CELLS_PATH, BUILDINGS_PATH, LINK_BUDGETS, GridIndex, coverage_distances, overlap_graph,
+    service_weights, load_hex_cells, load_buildings, load_network_csv, write_network_csv
+)
+
+HEIGHTS = (150, 175, 200, 225, 250)       # meters
+POWER_STEPS_DB = (-6, -3, 0, 3)           # relative to the tech's Pt in LINK_BUDGETS
+INTERFERENCE_WEIGHT = 1.0
+BASELINE_OPTION = (200, 0)
+
+
+def demand_points(cells, buildings=None):
+    """(x, y, weight): buildings weighted by their hex's service level, plus the centroids of hexes without buildings."""
+    hex_weight = service_weights(cells["service_level"])
+    if buildings is None:
+        return cells["x"], cells["y"], hex_weight
+
+    position = {int(c): i for i, c in enumerate(cells["cell_id"])}
+    hex_of = np.array([position.get(int(c), -1) for c in buildings["cell_id"]], dtype=np.int64)
+    located = hex_of >= 0
+    empty = np.flatnonzero(np.bincount(hex_of[located], minlength=len(cells["x"])) == 0)
+    x = np.concatenate([buildings["x"][located], cells["x"][empty]])
+    y = np.concatenate([buildings["y"][located], cells["y"][empty]])
+    return x, y, np.concatenate([hex_weight[hex_of[located]], hex_weight[empty]])
+
+
+class AntennaProblem:
+    def __init__(self, towers, x, y, weights, heights=HEIGHTS, power_steps=POWER_STEPS_DB):
+        self.towers = towers
+        self.n_towers = len(towers["x"])
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.n_points = len(self.weights)
+        self.total_weight = float(self.weights.sum()) or 1.0
+
+        grid_h, grid_p = np.meshgrid(np.asarray(heights, dtype=np.float64), np.asarray(power_steps, dtype=np.float64), indexing="ij")
+        self.option_height = grid_h.ravel()
+        self.option_step = grid_p.ravel()
+        self.baseline = int(np.flatnonzero((self.option_height == BASELINE_OPTION[0]) & (self.option_step == BASELINE_OPTION[1]))[0])
+
+        # radius and transmit power (W) of every (tower, option)
+        tech = towers["tech"]
+        nominal = np.array([LINK_BUDGETS.get(t, LINK_BUDGETS["3G"])[0] for t in tech], dtype=np.float64)
+        pt = nominal[:, None] + self.option_step[None, :]
+        self.radius = coverage_distances(towers["frequency"][:, None], tech[:, None], self.option_height[None, :], pt=pt)
+        self.power = 10 ** ((pt - 30.0) / 10.0)
+
+        # co-channel groups: same tech and frequency
+        channel_keys = sorted(set(zip(tech, towers["frequency"])))
+        channel_of = {key: c for c, key in enumerate(channel_keys)}
+        self.channel = np.array([channel_of[key] for key in zip(tech, towers["frequency"])], dtype=np.int64)
+        self.n_channels = len(channel_keys)
+
+        # demand points within each tower's largest radius, nearest first
+        index = GridIndex(x, y, 1000.0)
+        self.points = []
+        self.counts = np.zeros(self.radius.shape, dtype=np.int64)
+        for t in range(self.n_towers):
+            near = index.query_disc(towers["x"][t], towers["y"][t], self.radius[t].max())
+            d = np.hypot(x[near] - towers["x"][t], y[near] - towers["y"][t])
+            order = np.argsort(d, kind="stable")
+            self.points.append(near[order])
+            self.counts[t] = np.searchsorted(d[order], self.radius[t], side="right")
+
+
+class AntennaState:
+    """Option per tower plus the per-point coverage counts needed to score changes by delta."""
+    def __init__(self, problem, option=None):
+        self.problem = problem
+        self.option = np.full(problem.n_towers, problem.baseline, dtype=np.int64) if option is None else np.array(option)
+        self.multiplicity = np.zeros(problem.n_points, dtype=np.int64)
+        self.channel_count = np.zeros((problem.n_channels, problem.n_points), dtype=np.int64)
+        for t in range(problem.n_towers):
+            covered = problem.points[t][:problem.counts[t, self.option[t]]]
+            self.multiplicity[covered] += 1
+            self.channel_count[problem.channel[t], covered] += 1
+
+        w = problem.weights
+        self.covered = float(w[self.multiplicity > 0].sum())
+        self.interference = float((np.maximum(self.channel_count - 1, 0) @ w).sum())
+        self.power = float(problem.power[np.arange(problem.n_towers), self.option].sum())
+
+    def option_deltas(self, t):
+        """Coverage and interference change of switching tower t to each option, from prefix sums over its point list."""
+        p = self.problem
+        points = p.points[t]
+        current = p.counts[t, self.option[t]]
+        own = np.arange(len(points)) < current
+        others = self.multiplicity[points] - own
+        others_same_channel = self.channel_count[p.channel[t], points] - own
+        w = p.weights[points]
+        gain = np.concatenate([[0.0], np.cumsum(np.where(others == 0, w, 0.0))])
+        clash = np.concatenate([[0.0], np.cumsum(np.where(others_same_channel >= 1, w, 0.0))])
+        counts = p.counts[t]
+        return gain[counts] - gain[current], clash[counts] - clash[current]
+
+    def apply(self, t, new_option, d_covered, d_interference):
+        p = self.problem
+        old = p.counts[t, self.option[t]]
+        new = p.counts[t, new_option]
+        step = 1 if new > old else -1
+        changed = p.points[t][min(old, new):max(old, new)]
+        self.multiplicity[changed] += step
+        self.channel_count[p.channel[t], changed] += step
+        self.power += p.power[t, new_option] - p.power[t, self.option[t]]
+        self.covered += d_covered
+        self.interference += d_interference
+        self.option[t] = new_option
+
+
+def optimize_antennas(problem, target=None, max_sweeps=50, interference_weight=INTERFERENCE_WEIGHT):
+    """
+    Greedy repair up to the coverage target, then sweeps of best-improvement
+    moves per tower until no tower can lower the cost without dropping below
+    the target. Returns the final state and the baseline state.
+    """
+    baseline = AntennaState(problem)
+    state = AntennaState(problem)
+    target = baseline.covered if target is None else target * problem.total_weight / 100.0
+    power_scale = baseline.power or 1.0
+    tolerance = 1e-9 * problem.total_weight
+
+    def cost_deltas(t, d_interference):
+        d_power = problem.power[t] - problem.power[t, state.option[t]]
+        return d_power / power_scale + interference_weight * d_interference / problem.total_weight
+
+    # 1. repair: the move with the most coverage per unit cost until the target is met
+    while state.covered < target - tolerance:
+        best = None
+        for t in range(problem.n_towers):
+            d_cov, d_int = state.option_deltas(t)
+            ratio = d_cov / np.maximum(cost_deltas(t, d_int), 1e-9)
+            k = int(np.argmax(np.where(d_cov > tolerance, ratio, -np.inf)))
+            if d_cov[k] > tolerance and (best is None or ratio[k] > best[0]):
+                best = (ratio[k], t, k, d_cov[k], d_int[k])
+        if best is None:
+            print(f"Coverage target unreachable: best {100.0 * state.covered / problem.total_weight:.2f}%")
+            break
+        _, t, k, d_cov, d_int = best
+        state.apply(t, k, d_cov, d_int)
+
+    # 2. descent: cheapest feasible option per tower, highest-power towers first
+    for sweep in range(max_sweeps):
+        moved = 0
+        for t in np.argsort(-problem.power[np.arange(problem.n_towers), state.option]):
+            d_cov, d_int = state.option_deltas(t)
+            delta = cost_deltas(t, d_int)
+            feasible = state.covered + d_cov >= min(target, state.covered) - tolerance
+            k = int(np.argmin(np.where(feasible, delta, np.inf)))
+            if delta[k] < -1e-12:
+                state.apply(t, k, d_cov[k], d_int[k])
+                moved += 1
+        if not moved:
+            break
+    return state, baseline
+
+
+def write_settings(path, problem, state):
+    towers = problem.towers
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Cell ID", "Cell Tech", "Frequency", "Height (m)", "Pt (dBm)", "Coverage (m)", "Baseline Coverage (m)"])
+        for t in range(problem.n_towers):
+            k = state.option[t]
+            pt = LINK_BUDGETS.get(towers["tech"][t], LINK_BUDGETS["3G"])[0] + problem.option_step[k]
+            writer.writerow([int(towers["cell_id"][t]), towers["tech"][t], towers["frequency"][t],
+                             int(problem.option_height[k]), pt, round(float(problem.radius[t, k]), 1),
+                             round(float(problem.radius[t, problem.baseline]), 1)])
+    print(f"Antenna settings written to {path}")
+
+
+def write_tuned_network(path, problem, state):
+    """The network with its tuned radii and the handover neighbours recomputed from them."""
+    towers = problem.towers
+    radii = problem.radius[np.arange(problem.n_towers), state.option]
+    adjacency = overlap_graph(towers["x"], towers["y"], radii)
+    rows = [
+        (int(towers["cell_id"][t]), towers["lon"][t], towers["lat"][t], float(radii[t]), towers["tech"][t],
+         towers["frequency"][t], [int(towers["cell_id"][n]) for n in adjacency[t]])
+        for t in range(problem.n_towers)
+    ]
+    write_network_csv(path, rows)
+    print(f"Tuned network saved to {path}")
+
+
+def main(network_path="optimized_network.csv", target=None, use_buildings=True):
+    from qgis.core import QgsVectorLayer
+
+    if not os.path.exists(network_path):
+        print(f"Error: {network_path} not found! Run the optimizer first.")
+        return
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not cells_layer.isValid():
+        print("Error: Hexagonal cells layer failed to load!")
+        return
+    cells = load_hex_cells(cells_layer)
+
+    buildings = None
+    if use_buildings:
+        buildings_layer = QgsVectorLayer(BUILDINGS_PATH, "Buildings", "ogr")
+        if buildings_layer.isValid():
+            buildings = load_buildings(buildings_layer)
+        else:
+            print("Error: Buildings layer failed to load! Using hex centroids as demand points.")
+
+    started = time.perf_counter()
+    problem = AntennaProblem(load_network_csv(network_path), *demand_points(cells, buildings))
+    prepared = time.perf_counter()
+    state, baseline = optimize_antennas(problem, target)
+    finished = time.perf_counter()
+    print(f"{problem.n_towers} towers x {len(problem.option_height)} options over {problem.n_points} demand points: "
+          f"prepared in {prepared - started:.2f} s, optimized in {finished - prepared:.2f} s")
+
+    def summary(label, s):
+        print(f"\t{label}: {s.power:.1f} W total, coverage {100.0 * s.covered / problem.total_weight:.2f}%, "
+              f"co-channel overlap {100.0 * s.interference / problem.total_weight:.2f}%")
+    summary("Baseline (200 m, nominal Pt)", baseline)
+    summary("Tuned", state)
+
+    write_settings("antenna_settings.csv", problem, state)
+    write_tuned_network("optimized_network_tuned.csv", problem, state)
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    # e.g. antenna_optimizer.py 95 --hex-only  (coverage target in %)
+    numbers = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(target=float(numbers[0]) if numbers else None, use_buildings="--hex-only" not in sys.argv)
+
+    qgs.exitQgis()
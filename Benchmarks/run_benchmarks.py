@@ -0,0 +1,263 @@
+"""
+Headless benchmarks of the optimize pipeline on synthetic islands.
+
+Every scale (number of candidate sites) gets its own island from
+synthetic_island.py, written once to a .npz cache, and then runs the pipeline
+stages on arrays, without QGIS:
+
+    load               read the island back and index the hex cells
+    tier selection     Critical -> Priority -> Enhanced -> Basic/Trivial, keeping a
+                       site only if no kept site's radius reaches it (optimize())
+    gap filling        pseudo-BFS neighbours for isolated towers, then the hex's
+                       own site for every hex centroid left uncovered
+    coverage           service-weighted hex coverage and road coverage
+    handover           overlap graph (10% margin) and handover level
+    interference       co-channel pairs within the reuse distance and levels
+    frequency planning greedy least-penalty channel plan
+
+tier_selection and gap_filling are grid-bucketed re-implementations of the
+optimize() rules on arrays, not the simulator's own code (which needs QGIS
+canvas items): the budgets track these kernels, and a regression confined to
+MainWindow.optimize() will not trip them.
+
+Islands are cached per (scale, seed, generator hash); the hash covers
+synthetic_island.py and coverage_kernels.py, so editing the generator
+regenerates them instead of timing stale islands.
+
+Stage times are compared with budgets.json (seconds per stage and scale); a
+stage slower than its budget times (1 + tolerance) fails the run with exit
+status 1. --update rewrites the budgets from this run with HEADROOM.
+
+    python run_benchmarks.py                      # 100, 1k and 10k sites
+    python run_benchmarks.py --scales 100000
+    python run_benchmarks.py --update --report bench_run.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import platform
+import hashlib
+import tempfile
+import numpy as np
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import (
+    GridIndex, coverage_pairs, service_weights, overlap_graph, densify_polyline, SectorLayout
+)
+from synthetic_island import generate_island, save_island, load_island, frequencies
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGETS_PATH = os.path.join(BENCH_DIR, "budgets.json")
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "camiguin_bench")
+
+DEFAULT_SCALES = (100, 1000, 10000)
+TOLERANCE = 0.5   # allowed slowdown over budget before a stage fails
+HEADROOM = 3.0    # budget = measured time x HEADROOM when updating
+
+interference_threshold = {
+    "3G": 10500,
+    "4G": 2000
+}
+
+TIERS = [("Critical",), ("Priority",), ("Enhanced",), ("Basic", "Trivial")]
+BFS_LEVELS = ["Trivial", "Basic", "Enhanced", "Priority"]
+HANDOVER_MARGIN = 0.10
+
+
+class StageTimer:
+    def __init__(self):
+        self.times = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        yield
+        self.times[name] = time.perf_counter() - started
+
+
+def tier_selection(sites):
+    """Boolean mask of the sites optimize()'s tier rule keeps, bucketing kept sites on a grid."""
+    x, y, radius = sites["x"].tolist(), sites["y"].tolist(), sites["radius"].tolist()
+    levels = sites["service_level"]
+    size = max(max(radius, default=1.0), 1.0)
+    buckets = {}
+    chosen = np.zeros(len(x), dtype=bool)
+    for tier in TIERS:
+        for s in np.flatnonzero(np.isin(levels, tier)):
+            kx, ky = math.floor(x[s] / size), math.floor(y[s] / size)
+            reached = False
+            for i in (kx - 1, kx, kx + 1):
+                for j in (ky - 1, ky, ky + 1):
+                    for t in buckets.get((i, j), ()):
+                        if math.hypot(x[s] - x[t], y[s] - y[t]) < radius[t]:
+                            reached = True
+                            break
+                    if reached:
+                        break
+                if reached:
+                    break
+            if not reached:
+                chosen[s] = True
+                buckets.setdefault((kx, ky), []).append(s)
+    return chosen
+
+
+def gap_filling(sites, cells, cell_index, chosen):
+    """Adds a handover neighbour for every isolated tower, then the own site of every uncovered hex."""
+    chosen = chosen.copy()
+    x, y, radius = sites["x"], sites["y"], sites["radius"]
+    towers = np.flatnonzero(chosen)
+    isolated = towers[[not a for a in overlap_graph(x[towers], y[towers], radius[towers], HANDOVER_MARGIN)]]
+
+    # overlap partners of the isolated towers only, among all candidate sites
+    site_index = GridIndex(x, y, max(float(radius.max(initial=1.0)), 1.0))
+    reach = 2.0 * float(radius.max(initial=0.0))
+    rank = {level: r for r, level in enumerate(BFS_LEVELS)}
+    for s in isolated:
+        near = site_index.query_disc(x[s], y[s], reach)
+        near = near[(near != s) & ~chosen[near]]
+        near = near[np.hypot(x[near] - x[s], y[near] - y[s]) < (radius[s] + radius[near]) * (1.0 - HANDOVER_MARGIN)]
+        if len(near):
+            chosen[min(near, key=lambda n: rank.get(sites["service_level"][n], len(rank)))] = True
+
+    active = np.flatnonzero(chosen)
+    rows, cols = coverage_pairs(sites["x"][active], sites["y"][active], sites["radius"][active], cell_index)
+    covered = np.zeros(len(cells["x"]), dtype=bool)
+    covered[cols] = True
+    site_of_cell = {int(c): s for s, c in enumerate(sites["cell_id"])}
+    for h in np.flatnonzero(~covered):
+        s = site_of_cell.get(int(cells["cell_id"][h]))
+        if s is not None:
+            chosen[s] = True
+    return chosen
+
+
+def coverage_levels(sites, cells, cell_index, roads, active, road_step=100.0):
+    """Weighted hex coverage % and road coverage % of the active sites."""
+    rows, cols = coverage_pairs(sites["x"][active], sites["y"][active], sites["radius"][active], cell_index)
+    weights = service_weights(cells["service_level"])
+    covered = np.zeros(len(weights), dtype=bool)
+    covered[cols] = True
+    hex_pct = 100.0 * weights[covered].sum() / (weights.sum() or 1.0)
+
+    samples = [densify_polyline(x, y, road_step)[:2] for x, y in roads]
+    rx = np.concatenate([s[0] for s in samples]) if samples else np.zeros(0)
+    ry = np.concatenate([s[1] for s in samples]) if samples else np.zeros(0)
+    _, road_cols = coverage_pairs(sites["x"][active], sites["y"][active], sites["radius"][active], GridIndex(rx, ry, 1000.0))
+    road_pct = 100.0 * len(np.unique(road_cols)) / len(rx) if len(rx) else 0.0
+    return hex_pct, road_pct
+
+
+def generator_hash():
+    """Short hash of the island generator's sources, part of the island cache key."""
+    digest = hashlib.sha1()
+    for path in (os.path.join(BENCH_DIR, "synthetic_island.py"),
+                 os.path.join(os.path.dirname(BENCH_DIR), "coverage_kernels.py")):
+        with open(path, "rb") as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:12]
+
+
+def run_scale(n_sites, seed=0):
+    """Times every stage on the island of n_sites sites; returns (times, metrics)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"island_{n_sites}_{seed}_{generator_hash()}.npz")
+    if not os.path.exists(path):
+        save_island(generate_island(n_sites, seed), path)
+
+    timer = StageTimer()
+    with timer.stage("load"):
+        island = load_island(path)
+        sites, cells = island["sites"], island["cells"]
+        cell_index = GridIndex(cells["x"], cells["y"], 1000.0)
+    with timer.stage("tier selection"):
+        tiers = tier_selection(sites)
+    with timer.stage("gap filling"):
+        chosen = gap_filling(sites, cells, cell_index, tiers)
+    active = np.flatnonzero(chosen)
+    with timer.stage("coverage"):
+        hex_pct, road_pct = coverage_levels(sites, cells, cell_index, island["roads"], active)
+    with timer.stage("handover"):
+        adjacency = overlap_graph(sites["x"][active], sites["y"][active], sites["radius"][active], HANDOVER_MARGIN)
+        handover_pct = 100.0 * sum(1 for a in adjacency if a) / max(len(active), 1)
+    # one omnidirectional "sector" per tower
+    layout = SectorLayout(sites["x"][active], sites["y"][active], sites["radius"][active],
+                          sites["tech"][active], sites["frequency"][active], azimuths=(0.0,), front_to_back=0.0)
+    with timer.stage("interference"):
+        pairs = layout.interference_pairs(interference_threshold)
+        before = layout.interference_levels(pairs)
+    with timer.stage("frequency planning"):
+        layout.assign_frequencies(frequencies, interference_threshold)
+        after = layout.interference_levels(pairs)
+
+    metrics = {
+        "sites": int(len(sites["x"])), "towers": int(len(active)), "tier towers": int(tiers.sum()),
+        "coverage %": round(float(hex_pct), 3), "road coverage %": round(float(road_pct), 3),
+        "handover %": round(float(handover_pct), 3),
+        "interference % before plan": round(100.0 * float(before.mean()) if len(before) else 0.0, 3),
+        "interference % after plan": round(100.0 * float(after.mean()) if len(after) else 0.0, 3)
+    }
+    return timer.times, metrics
+
+
+def check_budgets(results, budgets, tolerance):
+    """(scale, stage, seconds, budget) for every stage over budget x (1 + tolerance)."""
+    failures = []
+    for scale, (times, _) in results.items():
+        for stage, seconds in times.items():
+            budget = budgets.get(str(scale), {}).get(stage)
+            if budget is not None and seconds > budget * (1.0 + tolerance):
+                failures.append((scale, stage, seconds, budget))
+    return failures
+
+
+def main(argv):
+    scales = DEFAULT_SCALES
+    if "--scales" in argv:
+        scales = tuple(int(s) for s in argv[argv.index("--scales") + 1].split(","))
+    tolerance = float(argv[argv.index("--tolerance") + 1]) if "--tolerance" in argv else TOLERANCE
+    report_path = argv[argv.index("--report") + 1] if "--report" in argv else None
+
+    budgets = {}
+    if os.path.exists(BUDGETS_PATH):
+        with open(BUDGETS_PATH) as handle:
+            budgets = json.load(handle)
+
+    results = {}
+    for scale in scales:
+        times, metrics = run_scale(scale)
+        results[scale] = (times, metrics)
+        print(f"\n{scale} sites -> {metrics['towers']} towers "
+              f"(coverage {metrics['coverage %']:.2f}%, handover {metrics['handover %']:.2f}%)")
+        for stage, seconds in times.items():
+            budget = budgets.get(str(scale), {}).get(stage)
+            limit = f"budget {budget:.3f} s" if budget is not None else "no budget"
+            print(f"\t{stage:<20} {seconds:8.3f} s   ({limit})")
+
+    if report_path:
+        with open(report_path, "w") as handle:
+            json.dump({
+                "python": sys.version.split()[0], "platform": platform.platform(),
+                "scales": {str(s): {"stages": t, "metrics": m} for s, (t, m) in results.items()}
+            }, handle, indent=2)
+        print(f"\nBenchmark report written to {report_path}")
+
+    if "--update" in argv:
+        for scale, (times, _) in results.items():
+            budgets[str(scale)] = {stage: round(max(seconds * HEADROOM, 0.05), 3) for stage, seconds in times.items()}
+        with open(BUDGETS_PATH, "w") as handle:
+            json.dump(budgets, handle, indent=2, sort_keys=True)
+        print(f"Budgets updated in {BUDGETS_PATH}")
+        return 0
+
+    failures = check_budgets(results, budgets, tolerance)
+    for scale, stage, seconds, budget in failures:
+        print(f"REGRESSION: {stage} at {scale} sites took {seconds:.3f} s (budget {budget:.3f} s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,190 @@
+"""
+Synthetic islands for the benchmarks.
+
+An island of n hex cells is built the way the Camiguin layers are:
+
+  * a hex mesh (1 km between centroids) clipped to a wobbly ellipse,
+  * a DEM: a central volcano plus a few satellite cones and noise, on a grid of
+    at most DEM_MAX_SIDE pixels a side,
+  * servable population per hex, highest along the coast, and service levels
+    handed out in the Camiguin v3 proportions (3.5% Critical, 6% Priority,
+    6% Enhanced, 11% Basic, the rest Trivial),
+  * CANDIDATES_PER_CELL elevation points per hex, of which the highest becomes
+    the hex's candidate cell site (4G for Critical/Priority/Enhanced, 3G
+    otherwise, with a random channel). Only SITE_SHARE of the hexes get a site,
+    and radii are the get_coverage_distance radius times RADIUS_SCALE: the raw
+    radii (several km on a 1 km mesh) cover every hex and link every tower, so
+    the gap-filling branches would never run,
+  * a road graph: a coastal ring road plus spokes towards the summit.
+
+Arrays use the keys of load_hex_cells and load_candidate_sites, so the
+coverage_kernels functions run on them unchanged. Everything is drawn from one
+seed, so a scale always produces the same island.
+"""
+import os
+import sys
+import math
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import coverage_distances, local_to_lonlat
+
+HEX_SPACING = 1000.0       # meters between neighbouring hex centroids
+CANDIDATES_PER_CELL = 3
+DEM_MAX_SIDE = 2048
+DEM_PIXEL = 30.0           # meters, unless the island needs coarser pixels to fit DEM_MAX_SIDE
+SITE_SHARE = 0.7           # share of hexes with a candidate site
+RADIUS_SCALE = 0.25        # leaves coverage gaps and isolated towers on the island
+
+# Share of hexes per service level, most important first (Camiguin v3 proportions)
+LEVEL_SHARES = [("Critical", 0.035), ("Priority", 0.062), ("Enhanced", 0.062), ("Basic", 0.108), ("Trivial", 1.0)]
+TECH_OF_LEVEL = {"Critical": "4G", "Priority": "4G", "Enhanced": "4G", "Basic": "3G", "Trivial": "3G"}
+
+frequencies = {
+    "3G": [950, 925, 900, 875, 850, 825],
+    "4G": [2100, 2050, 2000, 1950, 1900, 1850]
+}
+
+
+def hex_mesh(n_cells, rng):
+    """Centroids of about n_cells hexes inside a wobbly ellipse, and the ellipse's semi-axes."""
+    area = n_cells * HEX_SPACING ** 2 * math.sqrt(3) / 2
+    a = math.sqrt(area / math.pi * 1.3)
+    b = a / 1.3
+    phases = rng.uniform(0, 2 * math.pi, 3)
+
+    def inside(x, y, scale):
+        theta = np.arctan2(y / b, x / a)
+        wobble = 1.0 + 0.08 * np.sin(3 * theta + phases[0]) + 0.05 * np.sin(5 * theta + phases[1]) + 0.03 * np.sin(9 * theta + phases[2])
+        return (x / a) ** 2 + (y / b) ** 2 <= (scale * wobble) ** 2
+
+    # grow the clipping scale until the mesh holds n_cells hexes
+    rows = int(3.2 * b / (HEX_SPACING * math.sqrt(3) / 2)) + 3
+    cols = int(3.2 * a / HEX_SPACING) + 3
+    r, c = np.mgrid[-rows // 2:rows // 2 + 1, -cols // 2:cols // 2 + 1]
+    x = (c + 0.5 * (r % 2)) * HEX_SPACING
+    y = r * HEX_SPACING * math.sqrt(3) / 2
+    x, y = x.ravel(), y.ravel()
+    low, high = 0.5, 1.3
+    for _ in range(30):
+        scale = (low + high) / 2
+        count = int(inside(x, y, scale).sum())
+        if count < n_cells:
+            low = scale
+        else:
+            high = scale
+    keep = np.flatnonzero(inside(x, y, high))
+    dist = (x[keep] / a) ** 2 + (y[keep] / b) ** 2
+    keep = keep[np.argsort(dist, kind="stable")[:n_cells]]
+    return x[keep], y[keep], a * high * 1.15, b * high * 1.15
+
+
+def make_dem(a, b, rng):
+    """Elevation grid (meters) over the island's bounding box, with its geotransform (x0, y0, pixel)."""
+    pixel = max(DEM_PIXEL, 2.0 * max(a, b) / DEM_MAX_SIDE)
+    nx = int(2 * a / pixel) + 1
+    ny = int(2 * b / pixel) + 1
+    gx = -a + pixel * np.arange(nx)
+    gy = -b + pixel * np.arange(ny)
+    X, Y = np.meshgrid(gx, gy)
+    r = np.sqrt((X / a) ** 2 + (Y / b) ** 2)
+    dem = 1500.0 * np.exp(-(r / 0.45) ** 2)
+    for _ in range(6):
+        cx, cy = rng.uniform(-0.6, 0.6) * a, rng.uniform(-0.6, 0.6) * b
+        dem += rng.uniform(150, 600) * np.exp(-(((X - cx) ** 2 + (Y - cy) ** 2) / (0.08 * a * b)))
+    dem += rng.normal(0.0, 8.0, dem.shape)
+    dem[r > 1.0] = 0.0
+    return np.maximum(dem, 0.0).astype(np.float32), (-a, -b, pixel)
+
+
+def sample_dem(dem, transform, x, y):
+    x0, y0, pixel = transform
+    col = np.clip(((x - x0) / pixel).astype(np.int64), 0, dem.shape[1] - 1)
+    row = np.clip(((y - y0) / pixel).astype(np.int64), 0, dem.shape[0] - 1)
+    return dem[row, col]
+
+
+def make_roads(hx, hy, a, b, rng, step=HEX_SPACING):
+    """Coastal ring road plus spokes towards the summit, as a list of (x, y) vertex arrays."""
+    roads = []
+    n_ring = max(16, int(2 * math.pi * max(a, b) * 0.8 / step))
+    theta = np.linspace(0, 2 * math.pi, n_ring + 1)
+    roads.append((0.78 * a * np.cos(theta), 0.78 * b * np.sin(theta)))
+    for t in rng.uniform(0, 2 * math.pi, max(4, n_ring // 8)):
+        s = np.linspace(0.78, 0.2, 12)
+        roads.append((s * a * np.cos(t) + rng.normal(0, 50, 12), s * b * np.sin(t) + rng.normal(0, 50, 12)))
+    return roads
+
+
+def generate_island(n_sites, seed=0):
+    """Hex cells, candidate sites, DEM and roads of a synthetic island with n_sites hex cells (SITE_SHARE with a site)."""
+    rng = np.random.default_rng(seed)
+    hx, hy, a, b = hex_mesh(n_sites, rng)
+    n = len(hx)
+    dem, transform = make_dem(a, b, rng)
+
+    # population: dense along the coast, thin on the volcano
+    r = np.sqrt((hx / a) ** 2 + (hy / b) ** 2)
+    population = np.round(rng.gamma(2.0, 150.0, n) * (0.2 + 3.0 * r ** 4)).astype(np.int64)
+    levels = np.empty(n, dtype=object)
+    order = np.argsort(-population, kind="stable")
+    start = 0
+    for level, share in LEVEL_SHARES:
+        stop = n if share >= 1.0 else min(n, start + int(round(share * n)))
+        levels[order[start:stop]] = level
+        start = stop
+
+    # candidate elevation points: the highest of each hex becomes its cell site
+    k = CANDIDATES_PER_CELL
+    px = np.repeat(hx, k) + rng.uniform(-0.4, 0.4, n * k) * HEX_SPACING
+    py = np.repeat(hy, k) + rng.uniform(-0.4, 0.4, n * k) * HEX_SPACING
+    elevation = sample_dem(dem, transform, px, py)
+    best = np.argmax(elevation.reshape(n, k), axis=1) + np.arange(n) * k
+
+    tech = np.array([TECH_OF_LEVEL[level] for level in levels], dtype=object)
+    frequency = np.array([rng.choice(frequencies[t]) for t in tech], dtype=np.float64)
+    radius = coverage_distances(frequency, tech) * RADIUS_SCALE
+    cell_id = np.arange(1, n + 1, dtype=np.int64)
+    lon, lat = local_to_lonlat(px[best], py[best])
+    cell_lon, cell_lat = local_to_lonlat(hx, hy)
+    has_site = np.flatnonzero(rng.random(n) < SITE_SHARE)
+
+    cells = {
+        "cell_id": cell_id, "lon": cell_lon, "lat": cell_lat, "x": hx, "y": hy,
+        "service_level": levels, "population": population,
+        "barangay": np.array([f"Barangay {i // 50 + 1}" for i in range(n)], dtype=object)
+    }
+    sites = {
+        "cell_id": cell_id[has_site], "lon": lon[has_site], "lat": lat[has_site],
+        "x": px[best][has_site], "y": py[best][has_site], "radius": radius[has_site],
+        "service_level": levels[has_site], "tech": tech[has_site], "frequency": frequency[has_site],
+        "elevation": elevation[best][has_site]
+    }
+    return {"cells": cells, "sites": sites, "dem": dem, "dem_transform": transform,
+            "roads": make_roads(hx, hy, a, b, rng)}
+
+
+def save_island(island, path):
+    """Writes an island to one .npz file (object arrays as strings)."""
+    arrays = {"dem": island["dem"], "dem_transform": np.array(island["dem_transform"])}
+    for group in ("cells", "sites"):
+        for key, value in island[group].items():
+            arrays[f"{group}.{key}"] = value.astype(str) if value.dtype == object else value
+    for i, (x, y) in enumerate(island["roads"]):
+        arrays[f"roads.{i}"] = np.stack([x, y])
+    np.savez(path, **arrays)
+
+
+def load_island(path):
+    data = np.load(path)
+    island = {"cells": {}, "sites": {}, "roads": []}
+    road_keys = sorted((k for k in data.files if k.startswith("roads.")), key=lambda k: int(k.split(".")[1]))
+    for key in data.files:
+        group, _, name = key.partition(".")
+        if group in ("cells", "sites"):
+            value = data[key]
+            island[group][name] = value.astype(object) if value.dtype.kind == "U" else value
+    island["roads"] = [(data[k][0], data[k][1]) for k in road_keys]
+    island["dem"] = data["dem"]
+    island["dem_transform"] = tuple(data["dem_transform"])
+    return island
@@ -1,7 +1,9 @@
 import math, random
+import numpy as np
 from qgis.core import (
     QgsProject, QgsVectorLayer, QgsFeature, QgsField, QgsGeometry,
-    QgsPointXY, QgsDistanceArea, QgsUnitTypes, QgsFeatureSink, QgsWkbTypes
+    QgsPointXY, QgsDistanceArea, QgsUnitTypes, QgsFeatureSink, QgsWkbTypes,
+    QgsCoordinateReferenceSystem, QgsCoordinateTransform
 )
 from qgis.PyQt.QtCore import QVariant
 from qgis.PyQt.QtWidgets import QMessageBox
@@ -11,15 +13,15 @@ from qgis.PyQt.QtWidgets import QMessageBox
 #########################################
 cells_layer = QgsProject.instance().mapLayersByName("Popn Density Cells")[0]
 
+# id -> service level, read once instead of scanning the layer per candidate
+service_levels = {cell_feature["id"]: cell_feature["Service Le"] for cell_feature in cells_layer.getFeatures()}
+
 def get_service_level(cell_id):
     """
     Returns the service level for the given cell_id.
-    Assumes the cells layer has fields "Cell ID" and "Service Le".
+    Assumes the cells layer has fields "id" and "Service Le".
     """
-    for cell_feature in cells_layer.getFeatures():
-        if cell_feature["id"] == cell_id:
-            return cell_feature["Service Le"]
-    return None
+    return service_levels.get(cell_id)
 
 #############################################
 # CODE 2: Propagation and Link Budget Model #
@@ -122,6 +124,36 @@ def get_coverage_distance(tech, f, hb, hm, service_level, model="cost231"):
     return distance
     
 
+def get_coverage_distances(techs, frequencies, hb, hm, service_levels, models):
+    """
+    Vectorized get_coverage_distance: coverage distances (km) for whole arrays
+    of candidates at once, with the same link budgets, density tiers and model
+    formulas as the scalar version.
+    """
+    techs = np.asarray(techs, dtype=object)
+    levels = np.asarray(service_levels, dtype=object)
+    f = np.asarray(frequencies, dtype=np.float64)
+    log_f = np.log10(f)
+    log_hb = math.log10(hb)
+    is_4g = techs == "4G"
+
+    ultra_high = np.where(is_4g, levels == "Critical", levels == "Basic")
+    L_threshold = np.where(is_4g, link_budget(50, 15, 0, 15, -100), link_budget(40, 10, 0, 20, -105)).astype(np.float64)
+    use_cost231 = np.asarray(models, dtype=object) == "cost231"
+
+    # Okumura-Hata
+    a_hm = (1.1 * log_f - 0.7) * hm - (1.56 * log_f - 0.8)
+    A_0 = 69.55 + 26.16 * log_f
+    hata_num = L_threshold - A_0 + 13.82 * log_hb + a_hm + (2 * np.log10(f / 28) - 5.4)
+
+    # COST-231 Hata (threshold lowered by 15 dB as in get_coverage_distance)
+    Cm = np.where(ultra_high, 3, 0)
+    a_hm_cost = 1.1 * (log_f - 0.7) * hm - (1.56 * log_f - 0.8)
+    cost_num = (L_threshold - 15) - 46.3 - 33.9 * log_f + 13.82 * log_hb + a_hm_cost - Cm
+
+    denominator = 44.9 - 6.55 * log_hb
+    return 10 ** (np.where(use_cost231, cost_num, hata_num) / denominator)
+
 ##################################################
 # CODE 3: Buffering Candidate Cell Site Points   #
 # Using dynamic coverage distances as buffer size  #
@@ -160,53 +192,44 @@ def create_buffer_layer():
     ])
     buffer_layer.updateFields()
     
-    # Start editing candidate layer (if needed) for reading attributes
-    # We'll iterate through candidate points.
-    # For each candidate, get its cell ID, tech, and frequency.
-    # Look up the service level from the cells layer.
-    # Compute coverage distance (in km) using our propagation model function.
-    # Convert that distance to meters.
-    # If the candidate layer is in EPSG:4326 (geographic coordinates), convert the meter distance to degrees.
-    
-    # Iterate through candidate points
+    # Gather every candidate's cell ID, tech, frequency and point in one pass,
+    # looking the service level up in the id -> service level dict.
+    cell_ids, techs, freqs, levels, points = [], [], [], [], []
     for candidate in candidate_layer.getFeatures():
         cell_id = candidate["Cell ID"]
-        
         service_level = get_service_level(cell_id)
-        if not service_level is None:
-            if service_level in ["Critical", "Enhanced"]:
-                tech = "4G"            # Assumed attribute: "tech" is "3G" or "4G"
-            elif service_level in ["Basic", "Trivial"]:
-                tech = "3G"
-            frequency = get_frequency(tech)# Frequency in MHz
-            
-        model = "cost231" if tech == "4G" else "hata"
-
-        # Compute coverage distance (km)
-
-        cov_distance_km = get_coverage_distance(tech, frequency, hb=200, hm=1.5, service_level=service_level, model=model)
-        
-        # Convert coverage distance to meters
-        cov_distance_m = cov_distance_km * 1000.0
-        
-        print(f"Cell id. {cell_id}: {cov_distance_m}" )
-        
-        # If candidate_layer is in EPSG:4326, convert meters to degrees (using latitude conversion)
-        # (This is an approximation; for more precise buffering, reproject to a projected CRS)
-        buffer_radius_degrees = meters_to_degrees_lat(cov_distance_m)
-        
-        # Get candidate point geometry as QgsPointXY
-        pt = candidate.geometry().asPoint()
-        pt_xy = QgsPointXY(pt)
-        
-        # Create buffer geometry around candidate point
-        buffer_geom = QgsGeometry.fromPointXY(pt_xy).buffer(buffer_radius_degrees, 25)
-        
-        # Create new feature for the buffer layer and copy candidate attributes
+        if service_level is None:
+            print(f"Cell id. {cell_id}: no service level, skipped")
+            continue
+        tech = "4G" if service_level in ["Critical", "Enhanced"] else "3G"
+        cell_ids.append(cell_id)
+        techs.append(tech)
+        freqs.append(get_frequency(tech))  # Frequency in MHz
+        levels.append(service_level)
+        points.append(QgsPointXY(candidate.geometry().asPoint()))
+
+    # All coverage distances (km) in one vectorized call
+    models = ["cost231" if tech == "4G" else "hata" for tech in techs]
+    cov_distances_km = get_coverage_distances(techs, freqs, 200, 1.5, levels, models)
+
+    # Buffer in meters in a projected CRS (UTM 51N covers Camiguin), then bring
+    # the polygons back to the candidate layer's CRS.
+    utm = QgsCoordinateReferenceSystem("EPSG:32651")
+    to_utm = QgsCoordinateTransform(candidate_layer.crs(), utm, QgsProject.instance())
+    from_utm = QgsCoordinateTransform(utm, candidate_layer.crs(), QgsProject.instance())
+
+    features = []
+    for cell_id, tech, frequency, pt_xy, cov_distance_km in zip(cell_ids, techs, freqs, points, cov_distances_km):
+        buffer_geom = QgsGeometry.fromPointXY(to_utm.transform(pt_xy)).buffer(float(cov_distance_km) * 1000.0, 25)
+        buffer_geom.transform(from_utm)
+
         buff_feat = QgsFeature()
         buff_feat.setGeometry(buffer_geom)
-        buff_feat.setAttributes([cell_id, tech, frequency, round(cov_distance_km, 3)])
-        provider.addFeature(buff_feat)
+        buff_feat.setAttributes([cell_id, tech, frequency, round(float(cov_distance_km), 3)])
+        features.append(buff_feat)
+
+    # One bulk write instead of addFeature per candidate
+    provider.addFeatures(features)
     
     # Add buffer layer to the project
     QgsProject.instance().addMapLayer(buffer_layer)
@@ -1,5 +1,12 @@
+import os
+import sys
 from qgis.core import QgsProject, QgsDistanceArea, QgsCoordinateReferenceSystem, QgsPointXY
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sim_logging import get_logger
+
+log = get_logger("network")
+
 point1 = QgsPointXY(x, y)
 point2 = QgsPointXY(x, y)
 
@@ -12,5 +19,5 @@ def calculate_distance(point1, point2):
     d.setEllipsoid("WGS84")
 
     distance = d.measureLine(point1, point2)
-    print(f"Distance between {point1} and {point2} is {distance:.2f} meters")
+    log.debug("Distance between %s and %s is %.2f meters", point1, point2, distance)
     return distance
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3 
 import math
 import sys
+import time
+import functools
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtGui import QColor, QPen, QPainter, QBrush, QFont
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QGraphicsTextItem, QComboBox
 )
-from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtCore import Qt, QRectF, QObject, QCoreApplication, pyqtSignal
 from qgis.core import (
     QgsApplication,
     QgsProject,
@@ -16,6 +20,7 @@ from qgis.core import (
     QgsRendererCategory,
     QgsSymbol,
     QgsPointXY,
+    QgsRectangle,
     QgsDistanceArea,
     QgsWkbTypes
 )
@@ -24,6 +29,22 @@ from qgis.gui import QgsMapCanvas, QgsMapCanvasItem, QgsMapTool
 # Import the processing module.
 import processing
 
+from coverage_kernels import (
+    GridIndex, coverage_pairs, sole_coverage, service_weights, overlap_graph,
+    articulation_points, project_to_local, load_hex_cells, write_network_csv,
+    densify_polyline, line_parts, SectorLayout
+)
+from stage_profiler import PROFILER
+from sim_logging import get_logger, dump_enabled
+
+log = get_logger("network")
+coverage_log = get_logger("coverage")
+interference_log = get_logger("interference")
+frequency_log = get_logger("frequency")
+propagation_log = get_logger("propagation")
+ui_log = get_logger("ui")
+dump_log = get_logger("dump")
+
 # Frequency pools by technology (sorted descending to prioritize largest first)
 frequencies = {
     "3G": sorted([950, 925, 900, 875, 850, 825], reverse=True),
@@ -59,7 +80,7 @@ def build_interference_graph(nodes):
         interference_graph.setdefault(node.frequency, []).append(node)
 
     for key, value in interference_graph.items():
-        print(f"Working under {key} MHz: {value}")
+        interference_log.debug("Working under %s MHz: %s", key, value)
 
     return interference_graph
 
@@ -85,8 +106,336 @@ def get_interference_levels(interference_graph, nodes):
             distance = calculate_distance(node.mapPoint, other.mapPoint)
             if distance < thresh:
                 node.interference_level += (((thresh - distance)/ thresh)/2)
-            print(f"Under frequency({node.frequency}): Cell Tower no.{node.cell_id} is separated by {distance} meters to Cell Tower no.{other.cell_id}")
+            interference_log.debug("Under frequency(%s): Cell Tower no.%s is separated by %s meters to Cell Tower no.%s",
+                                   node.frequency, node.cell_id, distance, other.cell_id)
+
+
+# -----------------------------------------------------------
+# Incremental frequency re-planning
+# -----------------------------------------------------------
+# Camiguin sits around 9.17°N; a degree of longitude there is ~109.9 km.
+METERS_PER_DEGREE = 111320.0 * math.cos(math.radians(9.17))
+
+class FrequencyReplanner:
+    """
+    Keeps the reuse-distance graph of the optimized towers up to date so that a
+    move/add/delete only re-examines the edited tower and its same-tech neighbours
+    within interference_threshold, instead of recolouring the whole network.
+
+    Towers are bucketed on a grid whose cells are as wide as the largest reuse
+    distance, so every tower within reuse distance of another sits in the 3x3
+    block of buckets around it.
+    """
+    def __init__(self):
+        self.bucket_size = max(interference_threshold.values()) / METERS_PER_DEGREE
+        self.buckets = {}       # (i, j) -> {node: None}, insertion ordered
+        self.node_buckets = {}  # node -> (i, j)
+        self.adjacency = {}     # node -> {same-tech node within reuse distance: distance}
+
+    def _key(self, point):
+        return (math.floor(point.x() / self.bucket_size), math.floor(point.y() / self.bucket_size))
+
+    def _insert(self, node):
+        key = self._key(node.mapPoint)
+        self.buckets.setdefault(key, {})[node] = None
+        self.node_buckets[node] = key
+
+        thresh = interference_threshold.get(node.node_type, 0)
+        neighbors = {}
+        kx, ky = key
+        for i in (kx - 1, kx, kx + 1):
+            for j in (ky - 1, ky, ky + 1):
+                for other in self.buckets.get((i, j), ()):
+                    if other is node or other.node_type != node.node_type:
+                        continue
+                    distance = calculate_distance(node.mapPoint, other.mapPoint)
+                    if distance < thresh:
+                        neighbors[other] = distance
+                        self.adjacency[other][node] = distance
+        self.adjacency[node] = neighbors
+
+    def _discard(self, node):
+        key = self.node_buckets.pop(node, None)
+        if key is None:
+            return []
+        bucket = self.buckets[key]
+        bucket.pop(node, None)
+        if not bucket:
+            del self.buckets[key]
+        former = list(self.adjacency.pop(node, {}))
+        for other in former:
+            self.adjacency[other].pop(node, None)
+        return former
+
+    def rebuild(self, nodes):
+        """Indexes the optimized towers from scratch (once, after optimize())."""
+        self.buckets.clear()
+        self.node_buckets.clear()
+        self.adjacency.clear()
+        for node in nodes:
+            self._insert(node)
+
+    def _choose_frequency(self, node):
+        """
+        Keeps the current channel when no neighbour within reuse distance shares it,
+        otherwise takes the first free channel of the tech's pool; when every channel
+        is taken it settles for the one with the least interference, using the same
+        ((thresh - d) / thresh) / 2 penalty as get_interference_levels.
+        """
+        thresh = interference_threshold.get(node.node_type, 1)
+        penalty = {freq: 0.0 for freq in frequencies[node.node_type]}
+        for other, distance in self.adjacency[node].items():
+            if other.frequency in penalty:
+                penalty[other.frequency] += ((thresh - distance) / thresh) / 2
+        if penalty.get(node.frequency) == 0.0:
+            return node.frequency
+        for freq, value in penalty.items():
+            if value == 0.0:
+                return freq
+        best = min(penalty, key=penalty.get)
+        if node.frequency in penalty and penalty[node.frequency] <= penalty[best]:
+            return node.frequency
+        return best
+
+    def _set_frequency(self, node, new, changes):
+        """
+        Retunes a tower; its reach depends on the channel, so the coverage radius is
+        scaled by the ratio of the nominal reaches of the new and old channel. This
+        keeps the radius class the site got from the layer's "Coverage" field.
+        """
+        changes.append((node.cell_id, node.frequency, new))
+        old = node.frequency
+        node.frequency = new
+        if old and old != new:
+            node.coverage_radius *= get_coverage_distance(new, node.node_type) / get_coverage_distance(old, node.node_type)
+        node.prepareGeometryChange()
+        node.update()
+
+    def _repair(self, node, changes):
+        new = self._choose_frequency(node)
+        if new != node.frequency:
+            self._set_frequency(node, new, changes)
+
+        # No free channel for this tower: try to move the clashing neighbours off it instead.
+        for other in list(self.adjacency[node]):
+            if other.frequency != node.frequency:
+                continue
+            other_new = self._choose_frequency(other)
+            if other_new != other.frequency:
+                self._set_frequency(other, other_new, changes)
 
+    def _refresh_interference(self, nodes):
+        for node in nodes:
+            if node not in self.adjacency:
+                continue
+            thresh = interference_threshold.get(node.node_type, 1)
+            node.interference_level = 0.0
+            for other, distance in self.adjacency[node].items():
+                if other.frequency == node.frequency:
+                    node.interference_level += ((thresh - distance) / thresh) / 2
+
+    def _affected(self, nodes, changes):
+        affected = set(nodes)
+        changed_ids = {cell_id for cell_id, _, _ in changes}
+        for node in list(affected):
+            if node in self.adjacency:
+                affected.update(self.adjacency[node])
+        for node in list(affected):
+            if node.cell_id in changed_ids and node in self.adjacency:
+                affected.update(self.adjacency[node])
+        return affected
+
+    def add(self, node):
+        """Plans a newly added tower. Returns the (cell_id, old MHz, new MHz) changes."""
+        changes = []
+        self._insert(node)
+        self._repair(node, changes)
+        self._refresh_interference(self._affected([node], changes))
+        return changes
+
+    def move(self, node):
+        """Re-plans a dragged tower against its new neighbourhood."""
+        if node not in self.node_buckets:
+            return []
+        changes = []
+        former = self._discard(node)
+        self._insert(node)
+        self._repair(node, changes)
+        self._refresh_interference(self._affected([node] + former, changes))
+        return changes
+
+    def remove(self, node):
+        """Drops a deleted tower and lets its former neighbours take the channel it freed."""
+        changes = []
+        former = self._discard(node)
+        for other in former:
+            self._repair(other, changes)
+        self._refresh_interference(self._affected(former, changes))
+        return changes
+
+
+class RoadCoverage:
+    """
+    Road coverage % of the optimized towers. The road polylines are cut into
+    samples every `step` meters once; each tower keeps the sample indices inside
+    its footprint and every sample a count of covering towers, so a move only
+    re-queries the moved tower's footprint.
+    """
+    def __init__(self, roads_layer, step=25.0):
+        names = roads_layer.fields().names()
+        class_field = "highway" if "highway" in names else None
+        xs, ys, lengths, classes, cells = [], [], [], [], []
+        for feature in roads_layer.getFeatures():
+            road_class = (feature[class_field] if class_field else None) or "Unclassified"
+            cell_id = feature["Cell ID"] if "Cell ID" in names else None
+            for lons, lats in line_parts(feature.geometry()):
+                px, py = project_to_local(lons, lats)
+                sx, sy, part_length = densify_polyline(px, py, step)
+                xs.append(sx)
+                ys.append(sy)
+                lengths.append(np.full(len(sx), part_length / len(sx)))
+                classes.extend([road_class] * len(sx))
+                cells.extend([cell_id] * len(sx))
+
+        self.x = np.concatenate(xs) if xs else np.zeros(0)
+        self.y = np.concatenate(ys) if ys else np.zeros(0)
+        self.length = np.concatenate(lengths) if lengths else np.zeros(0)
+        self.class_names, self.road_class = np.unique(np.array(classes, dtype=str), return_inverse=True)
+        self.cell_names, self.road_cell = np.unique(np.array([str(c) for c in cells], dtype=str), return_inverse=True)
+        self.index = GridIndex(self.x, self.y, 500.0)
+        self.total_length = float(self.length.sum())
+
+        self.count = np.zeros(len(self.x), dtype=np.int32)  # towers covering each sample
+        self.footprints = {}                                 # node -> sample indices
+        self.covered_length = 0.0
+
+    def _footprint(self, node):
+        x, y = project_to_local(node.mapPoint.x(), node.mapPoint.y())
+        return self.index.query_disc(float(x), float(y), node.coverage_radius)
+
+    def add(self, node):
+        idx = self._footprint(node)
+        self.footprints[node] = idx
+        newly = idx[self.count[idx] == 0]
+        self.covered_length += float(self.length[newly].sum())
+        self.count[idx] += 1
+
+    def remove(self, node):
+        idx = self.footprints.pop(node, None)
+        if idx is None:
+            return
+        self.count[idx] -= 1
+        lost = idx[self.count[idx] == 0]
+        self.covered_length -= float(self.length[lost].sum())
+
+    def move(self, node):
+        if node in self.footprints:
+            self.remove(node)
+            self.add(node)
+
+    def rebuild(self, nodes):
+        self.count[:] = 0
+        self.footprints.clear()
+        self.covered_length = 0.0
+        for node in nodes:
+            self.add(node)
+
+    def level(self):
+        return 100.0 * self.covered_length / self.total_length if self.total_length else 0.0
+
+    def breakdown(self):
+        """Covered and total kilometres per road class and per cell."""
+        covered = self.count > 0
+        by_class = (np.bincount(self.road_class, weights=self.length * covered, minlength=len(self.class_names)) / 1000.0,
+                    np.bincount(self.road_class, weights=self.length, minlength=len(self.class_names)) / 1000.0)
+        by_cell = (np.bincount(self.road_cell, weights=self.length * covered, minlength=len(self.cell_names)) / 1000.0,
+                   np.bincount(self.road_cell, weights=self.length, minlength=len(self.cell_names)) / 1000.0)
+        return (dict(zip(self.class_names, zip(*by_class))),
+                dict(zip(self.cell_names, zip(*by_cell))))
+
+
+class HexCoverageSampler:
+    """
+    Covered fraction of each hexagonal cell, sampled adaptively. Every hex is
+    fanned into triangles around its centroid and sampled on a barycentric
+    lattice with n subdivisions per triangle (n = 1 is the centroid plus the
+    ring vertices). All hexes start at the coarsest level; only hexes that come
+    out partially covered are re-sampled at the next level, up to `max_level`.
+    Lattices are built once per hex and level and cached; a grid index over the
+    centroids finds the hexes a tower's disc can reach (hexes_near).
+    """
+    def __init__(self, hex_layer, max_level=3):
+        self.max_level = max_level
+        self.ids = []
+        self.centroids = []
+        self.rings = []
+        for feat in hex_layer.getFeatures():
+            geom = feat.geometry()
+            polygon = geom.asMultiPolygon()[0] if geom.isMultipart() else geom.asPolygon()
+            ring = polygon[0][:-1]  # drop the closing vertex
+            centre = geom.centroid().asPoint()
+            cx, cy = project_to_local(centre.x(), centre.y())
+            rx, ry = project_to_local([pt.x() for pt in ring], [pt.y() for pt in ring])
+            self.ids.append(feat["id"])
+            self.centroids.append((float(cx), float(cy)))
+            self.rings.append((rx, ry))
+        self.size = len(self.ids)
+        self.cache = {}  # (hex, level) -> (xs, ys)
+        # farthest ring vertex from its centroid: a disc reaching a hex reaches within this of its centroid
+        self.hex_radius = max((float(np.hypot(rx - cx, ry - cy).max()) for (cx, cy), (rx, ry) in zip(self.centroids, self.rings)),
+                              default=0.0)
+        centres = np.array(self.centroids, dtype=np.float64).reshape(-1, 2)
+        self.index = GridIndex(centres[:, 0], centres[:, 1], max(2.0 * self.hex_radius, 1.0))
+
+    def hexes_near(self, node):
+        """Indices of the hexes the node's coverage disc can touch."""
+        tx, ty = project_to_local(node.mapPoint.x(), node.mapPoint.y())
+        return self.index.query_disc(float(tx), float(ty), node.coverage_radius + self.hex_radius)
+
+    def samples(self, h, level):
+        key = (h, level)
+        if key not in self.cache:
+            n = 2 ** level
+            cx, cy = self.centroids[h]
+            rx, ry = self.rings[h]
+            a, b = np.array([(a, b) for a in range(1, n + 1) for b in range(0, n - a + 1)], dtype=np.float64).T / n
+            nx, ny = np.roll(rx, -1), np.roll(ry, -1)
+            xs = cx + a[None, :] * (rx - cx)[:, None] + b[None, :] * (nx - cx)[:, None]
+            ys = cy + a[None, :] * (ry - cy)[:, None] + b[None, :] * (ny - cy)[:, None]
+            self.cache[key] = (np.append(cx, xs.ravel()), np.append(cy, ys.ravel()))
+        return self.cache[key]
+
+    def _fractions(self, hexes, level, tx, ty, radius):
+        pieces = [self.samples(h, level) for h in hexes]
+        counts = [len(x) for x, _ in pieces]
+        xs = np.concatenate([x for x, _ in pieces])
+        ys = np.concatenate([y for _, y in pieces])
+        covered = np.zeros(len(xs), dtype=bool)
+        # blocks of samples keep the sample x tower matrix small
+        for start in range(0, len(xs), 20000):
+            stop = start + 20000
+            d2 = (xs[None, start:stop] - tx[:, None]) ** 2 + (ys[None, start:stop] - ty[:, None]) ** 2
+            covered[start:stop] = (d2 <= radius[:, None] ** 2).any(axis=0)
+        owner = np.repeat(np.arange(len(hexes)), counts)
+        return np.bincount(owner, weights=covered, minlength=len(hexes)) / np.array(counts)
+
+    def coverage_fractions(self, nodes, hexes=None):
+        """Covered fraction of each hex (or of the given hex indices) by the given towers."""
+        hexes = list(range(self.size)) if hexes is None else list(hexes)
+        fractions = np.zeros(len(hexes))
+        if not nodes or not hexes:
+            return fractions
+        tx, ty = project_to_local([n.mapPoint.x() for n in nodes], [n.mapPoint.y() for n in nodes])
+        radius = np.array([n.coverage_radius for n in nodes], dtype=np.float64)
+
+        pending = np.arange(len(hexes))
+        for level in range(self.max_level + 1):
+            fractions[pending] = self._fractions([hexes[i] for i in pending], level, tx, ty, radius)
+            partial = (fractions[pending] > 0.0) & (fractions[pending] < 1.0)
+            pending = pending[partial]
+            if len(pending) == 0:
+                break
+        return fractions
 
 
 def greedy_graph_coloring(pt, tech, graph_manager):
@@ -107,12 +456,13 @@ def greedy_graph_coloring(pt, tech, graph_manager):
     
 
     for key, value in opFreq_distances.items():
-        print(f"{key} MHz with {value} meters")
+        frequency_log.debug("%s MHz with %s meters", key, value)
 
-    print(f"Choice: {farthest_frequency}")        
+    frequency_log.debug("Choice: %s", farthest_frequency)
 
     return farthest_frequency
     
+@PROFILER.timed
 def hata_distance(f, L_threshold, hb, hm):
     """Okumura-Hata model with density-based adjustments."""
     a_hm = (1.1 * math.log10(f) - 0.7) * hm - (1.56 * math.log10(f) - 0.8)
@@ -122,6 +472,7 @@ def hata_distance(f, L_threshold, hb, hm):
     return 10 ** (numerator / denominator)
 
 #Code1
+@PROFILER.timed
 def cost231_distance(f, L_threshold, hb, hm):
     Cm = 0            
     a_hm = 1.1 * (math.log10(f) - 0.7) * hm - (1.56 * math.log10(f) - 0.8)
@@ -130,6 +481,7 @@ def cost231_distance(f, L_threshold, hb, hm):
     return 10 ** (numerator / denominator)
 
 
+@PROFILER.timed
 def link_budget(Pt, Gt, Gr, Lo, Pr_sensitivity):
     """
     Computes the maximum allowable path loss (Lp_max) based on a link budget.
@@ -137,6 +489,7 @@ def link_budget(Pt, Gt, Gr, Lo, Pr_sensitivity):
     """
     return Pt + Gt + Gr - Lo - Pr_sensitivity
 
+@PROFILER.timed
 def get_coverage_distance(f, tech, hb=200, hm=1.5):
 
     Pr_sensitivity = -100
@@ -157,7 +510,7 @@ def get_coverage_distance(f, tech, hb=200, hm=1.5):
      
 
     L_threshold = link_budget(Pt, Gt, Gr, Lo, Pr_sensitivity)
-    print(f"L_threshold: {L_threshold}")
+    propagation_log.debug("L_threshold: %s", L_threshold)
     
     if tech == "3G":
         distance = hata_distance(f, L_threshold, hb, hm) 
@@ -181,10 +534,15 @@ frequencies = {
 # -----------------------------------------------------------
 # Utility functions for converting meters to canvas pixels
 # -----------------------------------------------------------
+# Cheap always-on counters read by the performance HUD.
+perf_counters = {"geodesic": 0}
+
+@PROFILER.timed
 def calculate_distance(point1, point2):
     """
     Computes the geodetic distance (in meters) between two QgsPointXY objects.
     """
+    perf_counters["geodesic"] += 1
     d = QgsDistanceArea()
     d.setSourceCrs(QgsCoordinateReferenceSystem("EPSG:4326"), QgsProject.instance().transformContext())
     d.setEllipsoid("WGS84")
@@ -324,6 +682,7 @@ class GraphMapTool(QgsMapTool):
 
     def canvasPressEvent(self, event):
         pt = event.mapPoint()
+        self.main_window.perf_hud.begin_interaction()
         if self.mode == 'add':
             self.main_window.add_custom_site(pt)
             return
@@ -336,8 +695,8 @@ class GraphMapTool(QgsMapTool):
             return
         
         node = self.findClickedNode(pt)
-        print(f"The clicked node had the cell_id of {node.cell_id}")
         if node:
+            ui_log.debug("The clicked node had the cell_id of %s", node.cell_id)
             self.active_node = node
             self.start_pos   = pt
             node.selected    = True
@@ -471,6 +830,13 @@ class GraphMapTool(QgsMapTool):
         self.graph_manager.manage_edges(self.active_node, incidence)
         optimized_camiguin_cellular_network[self.active_node.cell_id].extend(incidence)
 
+        self.main_window.report_frequency_replan(
+            self.main_window.frequency_replanner.move(self.active_node)
+        )
+        if self.main_window.road_coverage is not None:
+            self.main_window.road_coverage.move(self.active_node)
+        self.main_window.get_road_coverage_level()
+
         self.active_node.selected = False
         self.active_node.update()
         self.active_node = None
@@ -540,7 +906,7 @@ class GraphManager:
                 if node1 is not None and node2 is not None:
                     break
             if node1 is None or node2 is None:
-                print(f"Warning: Missing node(s) for edge ({cell_id1}, {cell_id2}).")
+                log.warning("Warning: Missing node(s) for edge (%s, %s).", cell_id1, cell_id2)
                 continue
             edge = Edge(self.canvas, node1, node2)
             self.edge_instances.append(edge)
@@ -597,18 +963,174 @@ class GraphManager:
         num_overlaps = [int(num) for num in string_list if num.strip()]
         return num_overlaps
     
+    def rebuild_edges_per_node(self, node):
+        """Recomputes the handover links of an optimized tower after its coverage radius changed."""
+        for edge in [e for e in self.edge_instances if e.start_node is node or e.end_node is node]:
+            self.canvas.scene().removeItem(edge)
+            self.edge_instances.remove(edge)
+        self.edges = {e for e in self.edges if node.cell_id not in e}
+        for nbrs in optimized_camiguin_cellular_network.values():
+            if node.cell_id in nbrs:
+                nbrs.remove(node.cell_id)
+
+        incidence = []
+        for vertex in self.nodes:
+            if vertex is node or vertex.cell_id not in optimized_camiguin_cellular_network:
+                continue
+            distance = calculate_distance(node.mapPoint, vertex.mapPoint)
+            total_coverage = node.coverage_radius + vertex.coverage_radius
+            if distance < total_coverage * 0.90:
+                self.edge_instances.append(Edge(self.canvas, node, vertex))
+                incidence.append(vertex.cell_id)
+                optimized_camiguin_cellular_network[vertex.cell_id].append(node.cell_id)
+        self.manage_edges(node.cell_id, incidence)
+        optimized_camiguin_cellular_network[node.cell_id] = incidence
+        node.edges = list(incidence)
+
     def manage_edges(self, cell_id, incidence):
         for vertex in incidence:
             edge = (cell_id, vertex)
             self.edges.add(edge)
         #print(f"The edges here are: {self.edges}")
 
+# -----------------------------------------------------------
+# Performance HUD
+# -----------------------------------------------------------
+def hud_timed(metric):
+    """Records how long a MainWindow metric method took on the window's performance HUD."""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.perf_hud.record_metric(metric, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+class PerformanceHud:
+    """
+    Optional overlay below the metric labels: last repaint time, last recompute
+    time of each metric, node/edge item counts and the geodesic distance
+    evaluations of the last interaction (press/add/delete until the metrics
+    settle). Timing is always collected; the text is only drawn while shown.
+    """
+    def __init__(self, canvas, graph_manager, pos=(10, 80)):
+        self.canvas = canvas
+        self.graph_manager = graph_manager
+        self.visible = False
+        self.metric_ms = {}
+        self.repaint_ms = None
+        self.interaction_geodesics = 0
+        self._render_started = None
+        self._interaction_start = perf_counters["geodesic"]
+
+        self.text_item = QGraphicsTextItem("")
+        self.text_item.setDefaultTextColor(Qt.darkBlue)
+        self.text_item.setFont(QFont("Arial", 10))
+        self.text_item.setZValue(2)
+        self.text_item.setPos(*pos)
+        self.text_item.setVisible(False)
+        canvas.scene().addItem(self.text_item)
+
+        canvas.renderStarting.connect(self._on_render_starting)
+        canvas.mapCanvasRefreshed.connect(self._on_render_finished)
+
+    def set_visible(self, visible):
+        self.visible = visible
+        self.text_item.setVisible(visible)
+        self.refresh()
+
+    def _on_render_starting(self):
+        self._render_started = time.perf_counter()
+
+    def _on_render_finished(self):
+        if self._render_started is not None:
+            self.repaint_ms = 1000.0 * (time.perf_counter() - self._render_started)
+            self._render_started = None
+        self.refresh()
+
+    def begin_interaction(self):
+        self._interaction_start = perf_counters["geodesic"]
+
+    def record_metric(self, metric, seconds):
+        self.metric_ms[metric] = 1000.0 * seconds
+        self.interaction_geodesics = perf_counters["geodesic"] - self._interaction_start
+        self.refresh()
+
+    def refresh(self):
+        if not self.visible:
+            return
+        repaint = f"{self.repaint_ms:.1f} ms" if self.repaint_ms is not None else "-"
+        metrics = "  ".join(f"{name} {ms:.1f} ms" for name, ms in self.metric_ms.items()) or "-"
+        nodes = sum(1 for node in self.graph_manager.nodes if node.isVisible())
+        edges = sum(1 for edge in self.graph_manager.edge_instances if edge.isVisible())
+        self.text_item.setPlainText(
+            f"Repaint: {repaint}\n"
+            f"Metrics: {metrics}\n"
+            f"Items: {nodes}/{len(self.graph_manager.nodes)} nodes, {edges}/{len(self.graph_manager.edge_instances)} edges\n"
+            f"Geodesic evaluations (last interaction): {self.interaction_geodesics}"
+        )
+
+# -----------------------------------------------------------
+# Startup layer loading
+# -----------------------------------------------------------
+# key -> (path, layer name, provider, work done on the loader thread, shown on the canvas)
+STARTUP_LAYERS = {
+    "raster": (r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Camiguin Raster Base Maps\Camiguin_fin1.tif",
+               "Base Raster", "gdal", None, True),
+    "hex": (r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Population Cell Density Analysis\Popn Density Cells.shp",
+            "Hexagonal Cells", "ogr", HexCoverageSampler, True),
+    "roads": (r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Road Network by Cell\road_network.shp",
+              "Road Network", "ogr", RoadCoverage, True),
+    "candidate_cells": (r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Final Candidate Cells\v1\final_candidate_cells.shp",
+                        "Candidate Cells", "ogr", None, False),
+    "candidate_sites": (r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Final Candidate Cell Sites\v3\final_candidate_cell_sites.shp",
+                        "Candidate Cell Sites", "ogr", None, False)
+}
+CANVAS_ORDER = ("roads", "hex", "raster")    # top layer first
+CAMIGUIN_EXTENT = (124.608, 9.041, 124.873, 9.305)    # shown until the base raster is open
+
+def open_startup_layer(path, name, provider, prepare):
+    """
+    Runs on a loader thread: opens and validates one layer and builds its
+    derived structure (hex sampler, road samples), then hands the layer over
+    to the GUI thread. Returns (layer, prepared) or (None, None).
+    """
+    layer = QgsRasterLayer(path, name) if provider == "gdal" else QgsVectorLayer(path, name, provider)
+    if not layer.isValid():
+        return None, None
+    prepared = prepare(layer) if prepare is not None else None
+    layer.moveToThread(QCoreApplication.instance().thread())
+    return layer, prepared
+
+class LayerLoader(QObject):
+    """Opens the startup layers concurrently; `loaded` is delivered on the GUI thread."""
+    loaded = pyqtSignal(str, object, object)    # key, layer or None, prepared
+
+    def start(self, specs):
+        pool = ThreadPoolExecutor(max_workers=len(specs), thread_name_prefix="layer-loader")
+        for key, (path, name, provider, prepare, _) in specs.items():
+            future = pool.submit(open_startup_layer, path, name, provider, prepare)
+            future.add_done_callback(lambda f, key=key: self._emit(key, f))
+        pool.shutdown(wait=False)
+
+    def _emit(self, key, future):
+        try:
+            layer, prepared = future.result()
+        except Exception as error:
+            log.error("Error: %s layer failed to load: %s", key, error)
+            layer, prepared = None, None
+        self.loaded.emit(key, layer, prepared)
+
 # -----------------------------------------------------------
 # Main Application Window
 # -----------------------------------------------------------
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.startup_started = time.perf_counter()
         self.canvas = QgsMapCanvas()
         self.canvas.setCanvasColor(Qt.white)
         self.canvas.enableAntiAliasing(True)
@@ -619,57 +1141,17 @@ class MainWindow(QMainWindow):
         crs = QgsCoordinateReferenceSystem("EPSG:4326")
         self.canvas.setDestinationCrs(crs)
 
-        raster_path = r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Camiguin Raster Base Maps\Camiguin_fin1.tif"
-        raster_layer = QgsRasterLayer(raster_path, "Base Raster")
-        if not raster_layer.isValid():
-            print("Error: Base raster layer failed to load!")
-        else:
-            QgsProject.instance().addMapLayer(raster_layer)
-
-        hex_layer_path = r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Population Cell Density Analysis\Popn Density Cells.shp"
-        hex_layer = QgsVectorLayer(hex_layer_path, "Hexagonal Cells", "ogr")
-        if not hex_layer.isValid():
-            print("Error: Hexagonal cells layer failed to load!")
-        else:
-            symbol = hex_layer.renderer().symbol()
-            symbol.setColor(QColor("brown"))
-            QgsProject.instance().addMapLayer(hex_layer)
-            self.hex_layer = hex_layer    # <<< keep it for coverage testing
-
-        roads_layer_path = r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Road Network by Cell\road_network.shp"
-        roads_layer = QgsVectorLayer(roads_layer_path, "Road Network", "ogr")
-        if not roads_layer.isValid():
-            print("Error: Road network layer failed to load!")
-        else:
-            symbol = roads_layer.renderer().symbol()
-            symbol.setColor(QColor("blue"))
-            symbol.setWidth(1.0)
-            QgsProject.instance().addMapLayer(roads_layer)
-
-        candidate_cells_path = r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Final Candidate Cells\v1\final_candidate_cells.shp"
-        candidate_cells_layer = QgsVectorLayer(candidate_cells_path, "Candidate Cells", "ogr")
-        if not candidate_cells_layer.isValid():
-            print("Error: Candidate cells layer failed to load!")
-        else:
-            QgsProject.instance().addMapLayer(candidate_cells_layer)
-
-        candidate_sites_path = r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\Final Candidate Cell Sites\v3\final_candidate_cell_sites.shp"
-        candidate_sites_layer = QgsVectorLayer(candidate_sites_path, "Candidate Cell Sites", "ogr")
-        if not candidate_sites_layer.isValid():
-            print("Error: Candidate cell sites layer failed to load!")
-        else:
-            QgsProject.instance().addMapLayer(candidate_sites_layer)
-
-        self.canvas.setLayers([roads_layer, hex_layer, raster_layer])
-        self.canvas.setExtent(raster_layer.extent())
+        # Layers are opened on loader threads (see LayerLoader) and arrive in on_layer_loaded.
+        self.layers = {}            # key -> opened layer
+        self.registered = set()     # keys already added to the project
+        self.pending_layers = set(STARTUP_LAYERS)
+        self.hex_layer = None
+        self.hex_sampler = None
+        self.road_coverage = None
+        self.canvas.setExtent(QgsRectangle(*CAMIGUIN_EXTENT))
 
         self.graph_manager = GraphManager(self.canvas)
-        if candidate_sites_layer.isValid():
-            self.graph_manager.candidate_sites = candidate_sites_layer
-            self.graph_manager.candidate_cells = candidate_cells_layer
-            self.graph_manager.load_nodes_from_candidate_layer()
-        else:
-            print("Candidate cell sites layer failed to load!")        
+        self.frequency_replanner = FrequencyReplanner()
 
         self.map_tool = GraphMapTool(self.canvas, self.graph_manager, self)
         self.canvas.setMapTool(self.map_tool)
@@ -704,6 +1186,12 @@ class MainWindow(QMainWindow):
         
         button_layout.addWidget(self.delete_btn)
 
+        # Performance overlay toggle
+        self.perf_btn = QPushButton("Perf")
+        self.perf_btn.setCheckable(True)
+        self.perf_btn.toggled.connect(self.on_perf_toggled)
+        button_layout.addWidget(self.perf_btn)
+
         #self.add_btn.clicked.connect(self.add_custom_site)
         #self.delete_btn.clicked.connect(self.delete_custom_site)
 
@@ -742,11 +1230,34 @@ class MainWindow(QMainWindow):
         self.canvas.scene().addItem(self.interference_text_item)
         self.interference_text_item.setPos(10, 40)
 
+        self.road_coverage_text_item = QGraphicsTextItem("")
+        self.road_coverage_text_item.setDefaultTextColor(Qt.black)
+        self.road_coverage_text_item.setFont(QFont("Arial", 14))
+        self.road_coverage_text_item.setZValue(2)  # ensure it appears on top
+        self.canvas.scene().addItem(self.road_coverage_text_item)
+        self.road_coverage_text_item.setPos(10, 60)
+
+        self.perf_hud = PerformanceHud(self.canvas, self.graph_manager, pos=(10, 80))
+
+        # Placeholder until the startup layers are open
+        self.loading_text_item = QGraphicsTextItem("Loading layers...")
+        self.loading_text_item.setDefaultTextColor(Qt.darkGray)
+        self.loading_text_item.setFont(QFont("Arial", 14))
+        self.loading_text_item.setZValue(2)
+        self.canvas.scene().addItem(self.loading_text_item)
+        self.loading_text_item.setPos(270, 285)
+        self.optimizer_btn.setEnabled(False)
+
+        self.layer_loader = LayerLoader()
+        self.layer_loader.loaded.connect(self.on_layer_loaded)
+        self.layer_loader.start(STARTUP_LAYERS)
+        log.info("Window ready in %.2f s; loading %d layers", time.perf_counter() - self.startup_started, len(STARTUP_LAYERS))
+
         if self.map_tool.moved:
             self.get_level_of_handover()
             self.get_coverage_level()
             self.map_tool.moved = False
-            print("YEAHHHHHHHHHHHHHHHHHHHHHHHHHHHHHHHHHHh!!!!!!!!")
+            ui_log.debug("Metrics refreshed after a manual move")
     
 
     def on_add_toggled(self, checked):
@@ -759,6 +1270,53 @@ class MainWindow(QMainWindow):
                 self.map_tool.mode = 'move'
                 self.tech_combo.setEnabled(False)
 
+    def register_layer(self, key):
+        """Adds an opened layer to the project the first time it is displayed or used."""
+        layer = self.layers.get(key)
+        if layer is not None and key not in self.registered:
+            QgsProject.instance().addMapLayer(layer)
+            self.registered.add(key)
+        return layer
+
+    def on_layer_loaded(self, key, layer, prepared):
+        name = STARTUP_LAYERS[key][1]
+        self.pending_layers.discard(key)
+        if layer is None:
+            log.error("Error: %s layer failed to load!", name)
+        else:
+            self.layers[key] = layer
+            if key == "hex":
+                layer.renderer().symbol().setColor(QColor("brown"))
+                self.hex_layer = layer    # <<< keep it for coverage testing
+                self.hex_sampler = prepared
+            elif key == "roads":
+                symbol = layer.renderer().symbol()
+                symbol.setColor(QColor("blue"))
+                symbol.setWidth(1.0)
+                self.road_coverage = prepared    # sampled once, updated per tower edit
+            elif key == "raster":
+                self.canvas.setExtent(layer.extent())
+            if STARTUP_LAYERS[key][4]:
+                self.register_layer(key)
+                self.canvas.setLayers([self.layers[k] for k in CANVAS_ORDER if k in self.layers])
+
+        # Candidate nodes need both candidate layers; the sites layer alone is not enough to optimize.
+        if key in ("candidate_sites", "candidate_cells") and not self.pending_layers & {"candidate_sites", "candidate_cells"}:
+            if "candidate_sites" in self.layers:
+                self.graph_manager.candidate_sites = self.layers["candidate_sites"]
+                self.graph_manager.candidate_cells = self.layers.get("candidate_cells")
+                self.graph_manager.load_nodes_from_candidate_layer()
+            else:
+                log.error("Candidate cell sites layer failed to load!")
+
+        if not self.pending_layers:
+            self.canvas.scene().removeItem(self.loading_text_item)
+            self.optimizer_btn.setEnabled(self.graph_manager.candidate_cells is not None and self.hex_sampler is not None)
+            log.info("Layers ready %.2f s after startup", time.perf_counter() - self.startup_started)
+
+    def on_perf_toggled(self, checked):
+        self.perf_hud.set_visible(checked)
+
     def on_delete_toggled(self, checked):
         if checked:
             self.add_btn.setChecked(False)
@@ -768,38 +1326,21 @@ class MainWindow(QMainWindow):
                 self.map_tool.mode = 'move'
 
 
+    @hud_timed("coverage")
     def get_coverage_level(self):
-        """Compute the % of hexagon vertices covered by at least one visible node."""
-        total_verts = 0
-        covered_verts = 0
+        """Compute the % of hexagon area covered by at least one visible node."""
+        sampler = self.hex_sampler
+        if sampler is None:    # hex layer still loading or failed
+            return
+        visible = [node for node in self.graph_manager.nodes if node.isVisible()]
+        fractions = sampler.coverage_fractions(visible)
+        covered = 0.0
 
         coverage_patching = False
-        # iterate through every feature’s exterior ring vertices
-        for feat in self.hex_layer.getFeatures():
-            geom = feat.geometry()
-            if geom.isMultipart():
-                rings = geom.asMultiPolygon()
-            else:
-                rings = [geom.asPolygon()]
-            counter = 0
-            for polygon in rings:
-                
-                exterior = polygon[0]  # list of QgsPointXY, closed (first==last)
-                for pt in exterior:
-                    total_verts += 1
-                    for node in self.graph_manager.nodes:
-                        if not node.isVisible():
-                            continue
-                        dist = calculate_distance(QgsPointXY(pt), node.mapPoint)
-                        if dist <= node.coverage_radius:
-                            covered_verts += 1
-                            counter += 1
-                            break
-            #print(f"counter ({counter}) / len(rings) {len(rings)} = {counter/len(rings)}")
-            
-            if counter/7 < 0.80:
+        for h in range(sampler.size):
+            if fractions[h] < 0.80:
                 for node in self.graph_manager.nodes:
-                    if node.cell_id == feat["id"]:
+                    if node.cell_id == sampler.ids[h]:
                         node.setVisible(True)
                         self.graph_manager.update_edges_per_node(node)
                         optimized_camiguin_cellular_network[node.cell_id] = []
@@ -815,17 +1356,25 @@ class MainWindow(QMainWindow):
                                         break
                         node.optimized = True
                         coverage_patching = True
-                        print(f"Coverage patching selected node: {node.cell_id}")
+                        coverage_log.info("Coverage patching selected node: %s", node.cell_id)
+
+                        # the patched tower only changes the hexes still to be checked inside its footprint
+                        visible.append(node)
+                        footprint = sampler.hexes_near(node)
+                        footprint = np.sort(footprint[footprint > h])
+                        if len(footprint):
+                            fractions[footprint] = sampler.coverage_fractions(visible, footprint.tolist())
                         break
-                covered_verts -= counter
-                covered_verts += 7 
+                fractions[h] = 1.0
+            covered += fractions[h]
                 
-        pct = (covered_verts / total_verts * 100) if total_verts else 0
+        pct = (covered / sampler.size * 100) if sampler.size else 0
         self.coverage_text_item.setPlainText(f"Coverage Level: {pct}%")
-        print(f"The number of optimized cell towers are: {len(optimized_camiguin_cellular_network.keys())}")
+        coverage_log.debug("The number of optimized cell towers are: %s", len(optimized_camiguin_cellular_network))
         
         self.get_level_of_handover()
 
+    @hud_timed("handover")
     def get_level_of_handover(self):
         denominator = len(optimized_camiguin_cellular_network.keys())
         numerator = denominator
@@ -835,6 +1384,7 @@ class MainWindow(QMainWindow):
         coverage_percent = float(numerator/denominator)
         self.handover_text_item.setPlainText(f"Handover Level: {coverage_percent*100}%")
     
+    @hud_timed("interference")
     def get_level_of_interference(self):
         denominator = len(optimized_camiguin_cellular_network.keys())
         numerator = 0
@@ -844,7 +1394,123 @@ class MainWindow(QMainWindow):
         interference_percent = float(numerator/denominator)
         self.interference_text_item.setPlainText(f"Interference Level: {interference_percent*100}%")        
 
+    @hud_timed("road")
+    def get_road_coverage_level(self):
+        if self.road_coverage is None:
+            return
+        self.road_coverage_text_item.setPlainText(f"Road Coverage Level: {self.road_coverage.level()}%")
+
+    def report_road_coverage(self):
+        if self.road_coverage is None:
+            return
+        by_class, by_cell = self.road_coverage.breakdown()
+        coverage_log.info("\n\nRoad Coverage Data:")
+        for road_class, (covered, total) in by_class.items():
+            coverage_log.info("\t%s: %.2f of %.2f km covered", road_class, covered, total)
+        if not dump_enabled():
+            return
+        for cell_id, (covered, total) in by_cell.items():
+            if covered < total:
+                dump_log.info("\tCell %s: %.2f km of road uncovered", cell_id, total - covered)
+
+    def report_tower_criticality(self):
+        """
+        Leave-one-out criticality of every optimized tower in one pass: the hex
+        cells only that tower reaches (k-coverage of 1) and whether losing it
+        splits the handover graph (articulation point).
+        """
+        towers = get_optimized_cell_towers(self.graph_manager.nodes)
+        if not towers:
+            return
+        cells = load_hex_cells(self.hex_layer)
+        x, y = project_to_local([n.mapPoint.x() for n in towers], [n.mapPoint.y() for n in towers])
+        radii = [n.coverage_radius for n in towers]
+
+        rows, cols = coverage_pairs(x, y, radii, GridIndex(cells["x"], cells["y"], 1000.0))
+        point_weights = service_weights(cells["service_level"])
+        lost_cells = sole_coverage(rows, cols, len(towers), [1.0] * len(cells["x"]))
+        lost_weight = sole_coverage(rows, cols, len(towers), point_weights)
+        splits = articulation_points(overlap_graph(x, y, radii))
+        total_weight = point_weights.sum() or 1.0
+
+        handover_log = get_logger("handover")
+        handover_log.info("\n\nTower Criticality (if lost):")
+        ranking = sorted(range(len(towers)), key=lambda i: (-max(splits[i], 0), -lost_weight[i]))
+        for i in ranking:
+            split = f"splits handover into +{splits[i]} islands" if splits[i] > 0 else "no handover split"
+            handover_log.info("\tCell Tower %s: %d cells uncovered (%.2f%% weighted coverage) | %s",
+                              towers[i].cell_id, lost_cells[i], 100.0 * lost_weight[i] / total_weight, split)
+
+    def report_sectorization(self):
+        """
+        What-if report: splits every optimized tower into three sectors and logs
+        the sector-level channel plan, sector handover adjacency and sector
+        coverage of the hex cells with the antenna pattern applied. The network
+        model itself (nodes, interference levels, exported CSV) stays
+        omnidirectional; nothing here is written back.
+        """
+        towers = get_optimized_cell_towers(self.graph_manager.nodes)
+        if not towers:
+            return
+        x, y = project_to_local([n.mapPoint.x() for n in towers], [n.mapPoint.y() for n in towers])
+        layout = SectorLayout(x, y, [n.coverage_radius for n in towers], [n.node_type for n in towers],
+                              [n.frequency or 0 for n in towers])
+        pairs = layout.assign_frequencies(frequencies, interference_threshold)
+        levels = layout.interference_levels(pairs)
+        handover_i, handover_j = layout.handover_pairs()
+
+        cells = load_hex_cells(self.hex_layer)
+        rows, cols = layout.coverage_pairs(GridIndex(cells["x"], cells["y"], 1000.0))
+        point_weights = service_weights(cells["service_level"])
+        covered = np.zeros(len(point_weights), dtype=bool)
+        covered[cols] = True
+        total_weight = point_weights.sum() or 1.0
+
+        log.info("\n\nSectorized Network (%s sectors per tower):", layout.n_sectors)
+        log.info("\t%s sectors, %s sector handover links, sector interference level %.2f%%",
+                 len(layout), len(handover_i), 100.0 * levels.mean())
+        log.info("\tWeighted hex coverage with antenna patterns: %.2f%%", 100.0 * point_weights[covered].sum() / total_weight)
+        if not dump_enabled():
+            return
+        for t, node in enumerate(towers):
+            sectors = range(t * layout.n_sectors, (t + 1) * layout.n_sectors)
+            plan = ", ".join(f"{layout.azimuth[s]:.0f}°: {layout.frequency[s]:.0f} MHz" for s in sectors)
+            dump_log.info("\tCell Tower %s (%s): %s", node.cell_id, node.node_type, plan)
+
+    def export_optimized_network(self, path="optimized_network.csv"):
+        """Saves the optimized towers, their coverage radii and handover neighbours for the offline analyses."""
+        rows = [
+            (node.cell_id, node.mapPoint.x(), node.mapPoint.y(), node.coverage_radius, node.node_type,
+             node.frequency, optimized_camiguin_cellular_network.get(node.cell_id, []))
+            for node in get_optimized_cell_towers(self.graph_manager.nodes)
+        ]
+        write_network_csv(path, rows)
+        log.info("Optimized network saved to %s", path)
+
+    def report_frequency_replan(self, changes):
+        """
+        Prints the towers whose channel the incremental re-planner changed, refreshes
+        the footprints (handover links, road samples) that their new coverage radius
+        moved, and refreshes the interference level.
+        """
+        if not changes:
+            frequency_log.info("Frequency re-plan: no channel changes needed")
+        for cell_id, old, new in changes:
+            frequency_log.info("Frequency re-plan: Cell Tower no.%s changed from %s MHz to %s MHz", cell_id, old, new)
+        for cell_id in {cell_id for cell_id, _, _ in changes}:
+            node = self.get_node_via_id(cell_id)
+            if node is None or cell_id not in optimized_camiguin_cellular_network:
+                continue
+            self.graph_manager.rebuild_edges_per_node(node)
+            if self.road_coverage is not None:
+                self.road_coverage.move(node)
+        self.get_level_of_interference()
+
     def optimize(self):
+        PROFILER.reset()    # one report per optimize run (CAM_PROFILE=1)
+        self.register_layer("candidate_cells")
+        self.register_layer("candidate_sites")
+
         # Hide all nodes and edges.
         for node in self.graph_manager.nodes:
             node.setVisible(False)
@@ -852,162 +1518,185 @@ class MainWindow(QMainWindow):
             edge.setVisible(False)
         self.canvas.refresh()
 
-        # Build set of critical cell IDs from candidate cells
-        critical_cell_ids = set()
-        optimize_cells = []
-        for feature in self.graph_manager.candidate_cells.getFeatures():
-            if feature["Serv. Lev."] == "Critical":
-                critical_cell_ids.add(feature["Cell ID"])
-                optimize_cells.append(feature)
+        with PROFILER.stage("tier selection"):
+            # Build set of critical cell IDs from candidate cells
+            critical_cell_ids = set()
+            optimize_cells = []
+            for feature in self.graph_manager.candidate_cells.getFeatures():
+                if feature["Serv. Lev."] == "Critical":
+                    critical_cell_ids.add(feature["Cell ID"])
+                    optimize_cells.append(feature)
         
-        # Determine necessary enhanced cell IDs.
-        necessary_priority_cell_ids = set()
-        for feature in self.graph_manager.candidate_cells.getFeatures():
-            if feature["Serv. Lev."] == "Priority":
-                enhanced_cell_id = feature["Cell ID"]
-                status = True
-
-                geom1 = feature.geometry()
-                if geom1.isMultipart():
-                    point1 = geom1.centroid().asPoint()
-                else:
-                    point1 = geom1.asPoint()
-                point_xy1 = QgsPointXY(point1.x(), point1.y())
-                
-                for crit_cell in optimize_cells:
-                    geom2 = crit_cell.geometry()
-                    if geom2.isMultipart():
-                        point2 = geom2.centroid().asPoint()
+            # Determine necessary enhanced cell IDs.
+            necessary_priority_cell_ids = set()
+            for feature in self.graph_manager.candidate_cells.getFeatures():
+                if feature["Serv. Lev."] == "Priority":
+                    enhanced_cell_id = feature["Cell ID"]
+                    status = True
+
+                    geom1 = feature.geometry()
+                    if geom1.isMultipart():
+                        point1 = geom1.centroid().asPoint()
                     else:
-                        point2 = geom2.asPoint()
-                    point_xy2 = QgsPointXY(point2.x(), point2.y())
+                        point1 = geom1.asPoint()
+                    point_xy1 = QgsPointXY(point1.x(), point1.y())
+                
+                    for crit_cell in optimize_cells:
+                        geom2 = crit_cell.geometry()
+                        if geom2.isMultipart():
+                            point2 = geom2.centroid().asPoint()
+                        else:
+                            point2 = geom2.asPoint()
+                        point_xy2 = QgsPointXY(point2.x(), point2.y())
                     
-                    crit_coverage = crit_cell["Coverage"]
-                    distance = calculate_distance(point_xy1, point_xy2)
-                    if distance < crit_coverage:
-                        status = False
-                        break
-                if status:
-                    necessary_priority_cell_ids.add(enhanced_cell_id)
-                    optimize_cells.append(feature)
+                        crit_coverage = crit_cell["Coverage"]
+                        distance = calculate_distance(point_xy1, point_xy2)
+                        if distance < crit_coverage:
+                            status = False
+                            break
+                    if status:
+                        necessary_priority_cell_ids.add(enhanced_cell_id)
+                        optimize_cells.append(feature)
 
 
-        # Determine necessary enhanced cell IDs.
-        necessary_enhanced_cell_ids = set()
+            # Determine necessary enhanced cell IDs.
+            necessary_enhanced_cell_ids = set()
         
-        for feature in self.graph_manager.candidate_cells.getFeatures():
-            if feature["Serv. Lev."] == "Enhanced":
-                enhanced_cell_id = feature["Cell ID"]
-                status = True
-
-                geom1 = feature.geometry()
-                if geom1.isMultipart():
-                    point1 = geom1.centroid().asPoint()
-                else:
-                    point1 = geom1.asPoint()
-                point_xy1 = QgsPointXY(point1.x(), point1.y())
-                
-                for crit_cell in optimize_cells:
-                    geom2 = crit_cell.geometry()
-                    if geom2.isMultipart():
-                        point2 = geom2.centroid().asPoint()
+            for feature in self.graph_manager.candidate_cells.getFeatures():
+                if feature["Serv. Lev."] == "Enhanced":
+                    enhanced_cell_id = feature["Cell ID"]
+                    status = True
+
+                    geom1 = feature.geometry()
+                    if geom1.isMultipart():
+                        point1 = geom1.centroid().asPoint()
                     else:
-                        point2 = geom2.asPoint()
-                    point_xy2 = QgsPointXY(point2.x(), point2.y())
-                    
-                    crit_coverage = crit_cell["Coverage"]
-                    distance = calculate_distance(point_xy1, point_xy2)
-                    if distance < crit_coverage:
-                        status = False
-                        break
-                if status:
-                    necessary_enhanced_cell_ids.add(enhanced_cell_id)
-                    optimize_cells.append(feature)
-
-        necessary_basic_cell_ids = set()
-        for feature in self.graph_manager.candidate_cells.getFeatures():
-            if feature["Serv. Lev."] == "Basic" or feature["Serv. Lev."] == "Trivial":
-                basic_cell_id = feature["Cell ID"]
-                status = True
-                geom1 = feature.geometry()
-                if geom1.isMultipart():
-                    point1 = geom1.centroid().asPoint()
-                else:
-                    point1 = geom1.asPoint()
-                point_xy1 = QgsPointXY(point1.x(), point1.y())
+                        point1 = geom1.asPoint()
+                    point_xy1 = QgsPointXY(point1.x(), point1.y())
                 
-                for opt_cell in optimize_cells:
-                    geom2 = opt_cell.geometry()
-                    if geom2.isMultipart():
-                        point2 = geom2.centroid().asPoint()
+                    for crit_cell in optimize_cells:
+                        geom2 = crit_cell.geometry()
+                        if geom2.isMultipart():
+                            point2 = geom2.centroid().asPoint()
+                        else:
+                            point2 = geom2.asPoint()
+                        point_xy2 = QgsPointXY(point2.x(), point2.y())
+                    
+                        crit_coverage = crit_cell["Coverage"]
+                        distance = calculate_distance(point_xy1, point_xy2)
+                        if distance < crit_coverage:
+                            status = False
+                            break
+                    if status:
+                        necessary_enhanced_cell_ids.add(enhanced_cell_id)
+                        optimize_cells.append(feature)
+
+            necessary_basic_cell_ids = set()
+            for feature in self.graph_manager.candidate_cells.getFeatures():
+                if feature["Serv. Lev."] == "Basic" or feature["Serv. Lev."] == "Trivial":
+                    basic_cell_id = feature["Cell ID"]
+                    status = True
+                    geom1 = feature.geometry()
+                    if geom1.isMultipart():
+                        point1 = geom1.centroid().asPoint()
                     else:
-                        point2 = geom2.asPoint()
-                    point_xy2 = QgsPointXY(point2.x(), point2.y())
+                        point1 = geom1.asPoint()
+                    point_xy1 = QgsPointXY(point1.x(), point1.y())
+                
+                    for opt_cell in optimize_cells:
+                        geom2 = opt_cell.geometry()
+                        if geom2.isMultipart():
+                            point2 = geom2.centroid().asPoint()
+                        else:
+                            point2 = geom2.asPoint()
+                        point_xy2 = QgsPointXY(point2.x(), point2.y())
                     
-                    crit_coverage = opt_cell["Coverage"]
-                    distance = calculate_distance(point_xy1, point_xy2)
-                    if distance < crit_coverage:
-                        status = False
-                        break
-                if status:
-                    necessary_basic_cell_ids.add(basic_cell_id)
-                    optimize_cells.append(feature)
+                        crit_coverage = opt_cell["Coverage"]
+                        distance = calculate_distance(point_xy1, point_xy2)
+                        if distance < crit_coverage:
+                            status = False
+                            break
+                    if status:
+                        necessary_basic_cell_ids.add(basic_cell_id)
+                        optimize_cells.append(feature)
                 
                 
-        print(f"Necessary basic cells: {necessary_basic_cell_ids}")
-        optimize_cell_ids = critical_cell_ids | necessary_priority_cell_ids | necessary_enhanced_cell_ids | necessary_basic_cell_ids
-        # Show nodes whose cell_id is in critical_cell_ids or necessary_enhanced_cell_ids.
-        for node in self.graph_manager.nodes:
-            if node.cell_id in optimize_cell_ids:
-                node.setVisible(True)
-                optimized_camiguin_cellular_network[node.cell_id] = []
-            else:
-                node.setVisible(False)
+            log.debug("Necessary basic cells: %s", necessary_basic_cell_ids)
+            optimize_cell_ids = critical_cell_ids | necessary_priority_cell_ids | necessary_enhanced_cell_ids | necessary_basic_cell_ids
+            # Show nodes whose cell_id is in critical_cell_ids or necessary_enhanced_cell_ids.
+            for node in self.graph_manager.nodes:
+                if node.cell_id in optimize_cell_ids:
+                    node.setVisible(True)
+                    optimized_camiguin_cellular_network[node.cell_id] = []
+                else:
+                    node.setVisible(False)
 
-        # Show edges only if both connected nodes are visible.
-        for edge in self.graph_manager.edge_instances:
-            if edge.start_node.isVisible() and edge.end_node.isVisible():
-                edge.setVisible(True)
-                optimized_camiguin_cellular_network[edge.start_node.cell_id].append(edge.end_node.cell_id)
-            else:
-                edge.setVisible(False)
-        
-        service_levels = ["Trivial", "Basic", "Necessary", "Priority"]
+            # Show edges only if both connected nodes are visible.
+            for edge in self.graph_manager.edge_instances:
+                if edge.start_node.isVisible() and edge.end_node.isVisible():
+                    edge.setVisible(True)
+                    optimized_camiguin_cellular_network[edge.start_node.cell_id].append(edge.end_node.cell_id)
+                else:
+                    edge.setVisible(False)
 
-        #Pseudo-BFS algorithm via checking an adjacency list
-        for key, value in optimized_camiguin_cellular_network.items():
-            if len(value) == 0:
-                for service_level in service_levels:
-                    for node in self.graph_manager.nodes:
-                        if service_level == node.service_level and node.cell_id not in optimized_camiguin_cellular_network.keys() and node.cell_id in self.get_node_via_id(key).edges:
-                            node.setVisible(True)
+        with PROFILER.stage("pseudo-BFS"):
+            service_levels = ["Trivial", "Basic", "Necessary", "Priority"]
 
-                            optimized_camiguin_cellular_network[node.cell_id] = []
+            #Pseudo-BFS algorithm via checking an adjacency list
+            for key, value in optimized_camiguin_cellular_network.items():
+                if len(value) == 0:
+                    for service_level in service_levels:
+                        for node in self.graph_manager.nodes:
+                            if service_level == node.service_level and node.cell_id not in optimized_camiguin_cellular_network.keys() and node.cell_id in self.get_node_via_id(key).edges:
+                                node.setVisible(True)
+
+                                optimized_camiguin_cellular_network[node.cell_id] = []
                     
-                            # Show edges only if both connected nodes are visible.
-                            for edge in self.graph_manager.edge_instances:
-                                if edge.start_node.isVisible() and edge.end_node.isVisible():
-                                    edge.setVisible(True)
-                                    optimized_camiguin_cellular_network[edge.start_node.cell_id].append(edge.end_node.cell_id)
-                                else:
-                                    edge.setVisible(False)
+                                # Show edges only if both connected nodes are visible.
+                                for edge in self.graph_manager.edge_instances:
+                                    if edge.start_node.isVisible() and edge.end_node.isVisible():
+                                        edge.setVisible(True)
+                                        optimized_camiguin_cellular_network[edge.start_node.cell_id].append(edge.end_node.cell_id)
+                                    else:
+                                        edge.setVisible(False)
 
         self.coverage_patching = True
-        self.node_coverage_visualization()
-        self.canvas.refresh()
-        self.print_out_optimized_network()
-        self.get_coverage_level() 
+        with PROFILER.stage("node_coverage_visualization"):
+            self.node_coverage_visualization()
+            self.canvas.refresh()
+        with PROFILER.stage("print_out_optimized_network"):
+            self.print_out_optimized_network()
+        with PROFILER.stage("get_coverage_level"):
+            self.get_coverage_level() 
 
         #self.get_level_of_handover()
         #self.coverage_patching = False
         # Enable add/delete controls
-        self.remove_unnecessary()
-
-        interference_graph = build_interference_graph(self.graph_manager.nodes)
-        get_interference_levels(interference_graph, self.graph_manager.nodes)
-        self.get_level_of_interference()
-
-        self.data_printout()
+        with PROFILER.stage("remove_unnecessary"):
+            self.remove_unnecessary()
+        with PROFILER.stage("frequency re-plan index"):
+            self.frequency_replanner.rebuild(get_optimized_cell_towers(self.graph_manager.nodes))
+        with PROFILER.stage("road coverage"):
+            if self.road_coverage is not None:
+                self.road_coverage.rebuild(get_optimized_cell_towers(self.graph_manager.nodes))
+            self.get_road_coverage_level()
+
+        with PROFILER.stage("interference analysis"):
+            interference_graph = build_interference_graph(self.graph_manager.nodes)
+            get_interference_levels(interference_graph, self.graph_manager.nodes)
+            self.get_level_of_interference()
+
+        with PROFILER.stage("data_printout"):
+            self.data_printout()
+            self.report_road_coverage()
+        with PROFILER.stage("tower criticality"):
+            self.report_tower_criticality()
+        with PROFILER.stage("sectorization"):
+            self.report_sectorization()
+        with PROFILER.stage("export"):
+            self.export_optimized_network()
+        PROFILER.write_report("optimize_profile.json", towers=len(optimized_camiguin_cellular_network),
+                              candidates=len(self.graph_manager.nodes))
 
         self.tech_combo.setEnabled(True)
         self.add_btn.setEnabled(True)
@@ -1059,14 +1748,13 @@ class MainWindow(QMainWindow):
 
     def add_custom_site(self, pt):
         tech = self.tech_combo.currentText()
-        print(f"Add button clicked: adding a {tech} site")
+        ui_log.info("Add button clicked: adding a %s site", tech)
         
         # Calculate a suitable frequency and coverage
         operational_frequency = greedy_graph_coloring(pt, tech, self.graph_manager)
         coverage_meters = get_coverage_distance(operational_frequency, tech)
-        print(f"Coverage meters: {coverage_meters}")
         coverage_km = coverage_meters / 1000  # Convert to km for buffer_km parameter
-        print(f"Coverage meters: {coverage_km}")
+        propagation_log.debug("Coverage: %s meters (%s km)", coverage_meters, coverage_km)
         # Create a new unique cell ID
         cell_id = max([n.cell_id for n in self.graph_manager.nodes if isinstance(n.cell_id, int)], default=0) + 1
         
@@ -1086,6 +1774,9 @@ class MainWindow(QMainWindow):
 
         # Initialize its entry in the optimized network
         optimized_camiguin_cellular_network[cell_id] = []
+
+        # Settle the channel first: it sets the coverage radius the links and footprints use
+        frequency_changes = self.frequency_replanner.add(new_node)
         
         # Update the edges for the new node
         self.graph_manager.update_edges_per_node(new_node)
@@ -1100,6 +1791,11 @@ class MainWindow(QMainWindow):
         new_node.edges = overlaps
         optimized_camiguin_cellular_network[cell_id].extend(overlaps)
 
+        self.report_frequency_replan(frequency_changes)
+        if self.road_coverage is not None:
+            self.road_coverage.add(new_node)
+        self.get_road_coverage_level()
+
         # Update metrics
         self.get_coverage_level()
         self.get_level_of_handover()
@@ -1135,7 +1831,7 @@ class MainWindow(QMainWindow):
     """
 
     def delete_custom_site(self):
-        print("Delete button clicked: removing selected site")
+        ui_log.info("Delete button clicked: removing selected site")
         """
         Removes the currently selected node from the canvas, the graph, and
         the optimized network data structures, then refreshes all metrics.
@@ -1148,11 +1844,16 @@ class MainWindow(QMainWindow):
                 break
 
         if not target_node:
-            print("Delete: no node selected.")
+            ui_log.warning("Delete: no node selected.")
             return
 
         cell_id = target_node.cell_id
 
+        # Let the former co-channel neighbours re-plan before the node disappears
+        frequency_changes = self.frequency_replanner.remove(target_node)
+        if self.road_coverage is not None:
+            self.road_coverage.remove(target_node)
+
         # Remove from optimized network dict
         optimized_camiguin_cellular_network.pop(cell_id, None)
 
@@ -1185,8 +1886,10 @@ class MainWindow(QMainWindow):
         # Recompute metrics
         self.get_coverage_level()
         self.get_level_of_handover()
+        self.report_frequency_replan(frequency_changes)
+        self.get_road_coverage_level()
 
-        print(f"Deleted node {cell_id} and updated network.")
+        ui_log.info("Deleted node %s and updated network.", cell_id)
     
     def node_coverage_visualization(self):
         for node in self.graph_manager.nodes:
@@ -1206,22 +1909,29 @@ class MainWindow(QMainWindow):
                 if edge[0] == node_id:
                     optimized_camiguin_cellular_network[node_id].append(edge[1])
         """    
-        print(f"The optimized cellular network for Camiguin is composed of cell towers {optimized_camiguin_cellular_network.keys()}")
-        print(f"Here's their connectivity projection: ")
+        log.info("The optimized cellular network for Camiguin is composed of %s cell towers", len(optimized_camiguin_cellular_network))
+        if not dump_enabled():
+            return
+        dump_log.info("The optimized cellular network for Camiguin is composed of cell towers %s", list(optimized_camiguin_cellular_network))
+        dump_log.info("Here's their connectivity projection: ")
         for key, value in optimized_camiguin_cellular_network.items():
-            print(f"\tCell tower no. {key}: {value}")
+            dump_log.info("\tCell tower no. %s: %s", key, value)
         
     
     def data_printout(self):
-        
-        print(f"\n\nCell Tower Data:")
+        """Per-tower and handover tables, written to the dump sink (CAM_LOG_FILE) when one is configured."""
+        if not dump_enabled():
+            return
+
+        dump_log.info("\n\nCell Tower Data:")
         for node in self.graph_manager.nodes:
             if node.cell_id in optimized_camiguin_cellular_network.keys():
-                print(f"Cell Tower {node.cell_id}: {node.node_type} | {node.frequency} MHz | {node.coverage_radius} meters | {node.interference_level}%") 
+                dump_log.info("Cell Tower %s: %s | %s MHz | %s meters | %s%%", node.cell_id, node.node_type,
+                              node.frequency, node.coverage_radius, node.interference_level)
 
-        print(f"\n\nHandover Analysis Data:")
+        dump_log.info("\n\nHandover Analysis Data:")
         for key, value in optimized_camiguin_cellular_network.items():
-            print(f"\tCell Tower {key} overlaps with {value}")
+            dump_log.info("\tCell Tower %s overlaps with %s", key, value)
         
         
 
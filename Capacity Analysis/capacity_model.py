@@ -0,0 +1,191 @@
+"""
+Capacity and load per tower.
+
+"Serv. Lev." says how important a cell is, not how busy its tower will be. This
+stage turns the population of "Popn Density Cells" into offered traffic,
+hands every demand point to its best-serving tower (largest 1 - d / radius,
+as in the drive-test simulator) and checks each tower's Erlang-B blocking
+against the grade of service.
+
+Demand points are the hex centroids, or, when a buildings layer is given, the
+buildings of each hex carrying an equal share of its traffic (hexes without
+buildings keep their centroid).
+
+Every (candidate site, demand point) pair is found once and pre-sorted by
+point and margin, so evaluating a set of active sites is a mask, a first-hit
+per point and a bincount - cheap enough to call from inside a site-selection
+loop.
+"""
+import os
+import sys
+import csv
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import (
+    CANDIDATE_SITES_PATH, HEX_CELLS_PATH, BUILDINGS_PATH, GridIndex, coverage_pairs,
+    erlang_b, erlang_b_channels, load_candidate_sites, load_hex_cells, load_buildings, load_network_csv
+)
+
+PENETRATION = 0.75            # subscribers per resident
+ERLANGS_PER_SUBSCRIBER = 0.025  # busy-hour offered traffic
+GOS_TARGET = 0.02             # acceptable blocking probability
+MAX_CHANNELS = 1000           # channel counts searched by erlang_b_channels
+
+# Traffic channels per (three-sector) tower.
+CHANNELS_PER_TOWER = {
+    "3G": 96,
+    "4G": 240
+}
+
+
+def demand_points(cells, buildings=None):
+    """(x, y, hex index, traffic share of the hex) of the demand points: buildings, plus the centroid of hexes without any."""
+    if buildings is None:
+        n = len(cells["x"])
+        return cells["x"], cells["y"], np.arange(n), np.ones(n)
+
+    position = {int(c): i for i, c in enumerate(cells["cell_id"])}
+    hex_of = np.array([position.get(int(c), -1) for c in buildings["cell_id"]], dtype=np.int64)
+    located = hex_of >= 0
+    per_hex = np.bincount(hex_of[located], minlength=len(cells["x"]))
+    empty = np.flatnonzero(per_hex == 0)
+
+    x = np.concatenate([buildings["x"][located], cells["x"][empty]])
+    y = np.concatenate([buildings["y"][located], cells["y"][empty]])
+    hex_index = np.concatenate([hex_of[located], empty])
+    share = np.concatenate([1.0 / per_hex[hex_of[located]], np.ones(len(empty))])
+    return x, y, hex_index, share
+
+
+class CapacityModel:
+    def __init__(self, sites, cells, buildings=None, penetration=PENETRATION,
+                 erlangs=ERLANGS_PER_SUBSCRIBER, channels=None, target=GOS_TARGET):
+        self.sites = sites
+        self.n_sites = len(sites["x"])
+        self.n_cells = len(cells["x"])
+        self.target = target
+        channels = channels or CHANNELS_PER_TOWER
+        self.channels = np.array([channels.get(t, channels["3G"]) for t in sites["tech"]], dtype=np.int64)
+
+        x, y, self.hex_of, share = demand_points(cells, buildings)
+        self.traffic = cells["population"][self.hex_of] * share * penetration * erlangs
+
+        index = GridIndex(x, y, 1000.0)
+        rows, cols = coverage_pairs(sites["x"], sites["y"], sites["radius"], index)
+        margin = 1.0 - np.hypot(sites["x"][rows] - x[cols], sites["y"][rows] - y[cols]) / sites["radius"][rows]
+        order = np.lexsort((-margin, cols))
+        self.pair_site = rows[order]
+        self.pair_point = cols[order]
+        self.n_points = len(x)
+
+    def assign(self, active):
+        """Best-serving active site of every demand point (-1 when none covers it)."""
+        keep = active[self.pair_site]
+        sites = self.pair_site[keep]
+        points = self.pair_point[keep]
+        first = np.ones(len(points), dtype=bool)
+        first[1:] = points[1:] != points[:-1]
+        server = np.full(self.n_points, -1, dtype=np.int64)
+        server[points[first]] = sites[first]
+        return server
+
+    def evaluate(self, active):
+        """
+        active : boolean mask over the sites
+        Returns per-site offered traffic (Erlangs), blocking probability and the
+        channels needed to meet the grade of service, plus the unserved traffic.
+        """
+        active = np.asarray(active, dtype=bool)
+        server = self.assign(active)
+        served = server >= 0
+        offered = np.bincount(server[served], weights=self.traffic[served], minlength=self.n_sites)
+        blocking = np.where(active, erlang_b(offered, self.channels), 0.0)
+        return offered, blocking, float(self.traffic[~served].sum()), server
+
+    def overloaded(self, blocking):
+        return np.flatnonzero(blocking > self.target)
+
+    def overloaded_cells(self, server, blocking):
+        """Hex cells with demand handed to an overloaded tower."""
+        hot = np.zeros(self.n_sites + 1, dtype=bool)
+        hot[self.overloaded(blocking)] = True
+        return np.unique(self.hex_of[hot[server]])
+
+    def blocked_traffic(self, active):
+        """Total blocked plus unserved Erlangs - a capacity penalty for site-selection loops."""
+        offered, blocking, unserved, _ = self.evaluate(active)
+        return float(offered @ blocking) + unserved
+
+
+def main(network_path="optimized_network.csv", use_buildings=True):
+    from qgis.core import QgsVectorLayer
+
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not cells_layer.isValid():
+        print("Error: Hexagonal cells layer failed to load!")
+        return
+    cells = load_hex_cells(cells_layer)
+
+    buildings = None
+    if use_buildings:
+        buildings_layer = QgsVectorLayer(BUILDINGS_PATH, "Buildings", "ogr")
+        if buildings_layer.isValid():
+            buildings = load_buildings(buildings_layer)
+        else:
+            print("Error: Buildings layer failed to load! Using hex centroids as demand points.")
+
+    if os.path.exists(network_path):
+        sites = load_network_csv(network_path)
+    else:
+        print(f"{network_path} not found: loading every candidate cell site")
+        sites_layer = QgsVectorLayer(CANDIDATE_SITES_PATH, "Candidate Cell Sites", "ogr")
+        if not sites_layer.isValid():
+            print("Error: Candidate cell sites layer failed to load!")
+            return
+        sites = load_candidate_sites(sites_layer)
+
+    model = CapacityModel(sites, cells, buildings)
+    active = np.ones(model.n_sites, dtype=bool)
+
+    started = time.perf_counter()
+    offered, blocking, unserved, server = model.evaluate(active)
+    print(f"Load evaluated for {model.n_points} demand points in {1000.0 * (time.perf_counter() - started):.2f} ms")
+    needed = erlang_b_channels(offered, model.target, MAX_CHANNELS)
+
+    for tech in sorted(set(sites["tech"])):
+        mask = sites["tech"] == tech
+        print(f"{tech}: {int(mask.sum())} towers, {offered[mask].sum():.1f} Erl offered, "
+              f"mean blocking {100.0 * blocking[mask].mean():.2f}%, max {100.0 * blocking[mask].max(initial=0):.2f}%")
+    print(f"Traffic outside coverage: {unserved:.1f} Erl")
+
+    overloaded = model.overloaded(blocking)
+    print(f"\nOverloaded towers (blocking > {100.0 * model.target:.0f}%): {len(overloaded)}")
+    for s in overloaded:
+        print(f"\tCell Tower {int(sites['cell_id'][s])} ({sites['tech'][s]}): {offered[s]:.1f} Erl on "
+              f"{model.channels[s]} channels -> {100.0 * blocking[s]:.1f}% blocking, needs "
+              f"{needed[s] if needed[s] <= MAX_CHANNELS else f'more than {MAX_CHANNELS}'} channels")
+    hot_cells = model.overloaded_cells(server, blocking)
+    print(f"Hex cells served by overloaded towers: {sorted(int(c) for c in cells['cell_id'][hot_cells])}")
+
+    with open("tower_capacity.csv", "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Cell ID", "Cell Tech", "Offered Erlangs", "Channels", "Blocking %", "Channels Needed", "Overloaded"])
+        for s in range(model.n_sites):
+            writer.writerow([int(sites["cell_id"][s]), sites["tech"][s], round(float(offered[s]), 2),
+                             int(model.channels[s]), round(100.0 * float(blocking[s]), 3), int(needed[s]),
+                             bool(blocking[s] > model.target)])
+    print("Per-tower capacity written to tower_capacity.csv")
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    main(use_buildings="--hex-only" not in sys.argv)
+
+    qgs.exitQgis()
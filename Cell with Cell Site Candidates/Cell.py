@@ -1,8 +1,12 @@
-from qgis.core import QgsApplication, QgsProject, QgsVectorLayer
+from qgis.core import QgsApplication, QgsProject, QgsVectorLayer, QgsFeatureRequest
 from qgis.gui import QgsMapCanvas, QgsMapCanvasItem
 import sys
+import csv
+import time
 import math
 import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 # Define frequencies globally for accessibility
 FREQUENCIES = {
@@ -10,28 +14,49 @@ FREQUENCIES = {
     "4G": [1800, 1815, 1850, 1870, 1900, 1930]
 }
 
+TECHS = ["3G", "4G"]  # tech code -> name in TowerStore
+
+# Base station height draw: 200 m +/- 1..HEIGHT_SPREAD m
+BASE_HEIGHT = 200
+HEIGHT_SPREAD = 50
+PERCENTILES = (5, 50, 95)
+
 class Cell:
-    def __init__(self, cell_id):
+    """A cell and the rows of its candidate towers in a TowerStore."""
+    __slots__ = ("cell_id", "store", "rows")
+
+    def __init__(self, cell_id, store=None, rows=None):
         self.cell_id = cell_id
-        self.towers = []  # Stores Cell_Tower_Vertex instances
+        self.store = store
+        self.rows = rows if rows is not None else np.zeros(0, dtype=np.int64)
+
+    @property
+    def towers(self):
+        """Cell_Tower_Vertex views of this cell's towers (built on demand)."""
+        return [self.store.vertex(row) for row in self.rows]
+
+    def __len__(self):
+        return len(self.rows)
 
 class Cell_Tower_Vertex:
-    def __init__(self, x, y, frequency, node_type):
-        
+    __slots__ = ("x", "y", "op_frequency", "node_type", "h_ct", "h_ms", "link_budget", "coverage_radius")
+
+    def __init__(self, x, y, frequency, node_type, h_ct=None):
+
         self.x = x
         self.y = y
         self.op_frequency = frequency
         self.node_type = node_type
-        
+
         # Randomized base station height (150-220m range)
-        self.h_ct = 200 + random.choice([-1, 1]) * random.randint(1, 50)
+        self.h_ct = h_ct if h_ct is not None else 200 + random.choice([-1, 1]) * random.randint(1, 50)
         self.h_ms = 1.5  # Mobile device height
-        
+
         # Calculate coverage radius based on technology
         self.link_budget = self._calculate_link_budget()
         self.coverage_radius = (
-            self._okumura_hata_distance() 
-            if node_type == "3G" 
+            self._okumura_hata_distance()
+            if node_type == "3G"
             else self._cost231_distance()
         )
 
@@ -47,7 +72,7 @@ class Cell_Tower_Vertex:
         f = self.op_frequency
         L = self.link_budget
         hb, hm = self.h_ct, self.h_ms
-        
+
         a_hm = 3.2 * (math.log10(11.75 * hm)**2 - 4.97)  # Urban correction
         numerator = L - 46.3 - 33.9 * math.log10(f) + 13.82 * math.log10(hb) - a_hm
         denominator = 44.9 - 6.55 * math.log10(hb)
@@ -58,61 +83,242 @@ class Cell_Tower_Vertex:
         f = self.op_frequency
         L = self.link_budget
         hb, hm = self.h_ct, self.h_ms
-        
+
         a_hm = 0.8 + (1.1 * math.log10(f) - 0.7) * hm - 1.56 * math.log10(f)
         A = 69.55 + 26.16 * math.log10(f) - 13.82 * math.log10(hb) - a_hm
         return 10 ** ((L - A) / (44.9 - 6.55 * math.log10(hb)))
 
-def main():
-    
+def coverage_radii(tech_codes, frequencies, h_ct, h_ms=1.5):
+    """Vectorized Cell_Tower_Vertex coverage radius (km): Okumura-Hata for 3G, COST-231 for 4G."""
+    f = np.asarray(frequencies, dtype=np.float64)
+    hb = np.asarray(h_ct, dtype=np.float64)
+    is_3g = np.asarray(tech_codes) == TECHS.index("3G")
+    log_f = np.log10(f)
+    log_hb = np.log10(hb)
+    L = np.where(is_3g, 30 + 15 + 2 + 105, 50 + 15 + 2 + 100)
+
+    a_hm_3g = 0.8 + (1.1 * log_f - 0.7) * h_ms - 1.56 * log_f
+    A = 69.55 + 26.16 * log_f - 13.82 * log_hb - a_hm_3g
+    hata = (L - A) / (44.9 - 6.55 * log_hb)
+
+    a_hm_4g = 3.2 * (math.log10(11.75 * h_ms) ** 2 - 4.97)
+    cost231 = (L - 46.3 - 33.9 * log_f + 13.82 * log_hb - a_hm_4g) / (44.9 - 6.55 * log_hb)
+    return 10 ** np.where(is_3g, hata, cost231)
+
+def sample_heights(rng, size):
+    return BASE_HEIGHT + rng.choice([-1, 1], size=size) * rng.integers(1, HEIGHT_SPREAD + 1, size=size)
+
+def sample_frequencies(rng, tech_codes, n_samples):
+    """(towers, n_samples) operating frequencies drawn from each tower's band."""
+    out = np.zeros((len(tech_codes), n_samples), dtype=np.float64)
+    for code, name in enumerate(TECHS):
+        mask = tech_codes == code
+        out[mask] = rng.choice(FREQUENCIES[name], size=(int(mask.sum()), n_samples))
+    return out
+
+def radius_bounds():
+    """Smallest and largest radius any height/frequency draw can give (radius grows with height, falls with frequency)."""
+    low = [coverage_radii([code], [max(FREQUENCIES[name])], [BASE_HEIGHT - HEIGHT_SPREAD])[0] for code, name in enumerate(TECHS)]
+    high = [coverage_radii([code], [min(FREQUENCIES[name])], [BASE_HEIGHT + HEIGHT_SPREAD])[0] for code, name in enumerate(TECHS)]
+    return float(min(low)), float(max(high))
+
+class TowerStore:
+    """
+    Struct-of-arrays storage for candidate towers: one growable NumPy column per
+    attribute instead of one Python object per tower (33 bytes a tower).
+    """
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.cell = np.zeros(capacity, dtype=np.int32)       # dense cell code, see CellIndex
+        self.tech = np.zeros(capacity, dtype=np.int8)        # index into TECHS
+        self.frequency = np.zeros(capacity, dtype=np.float32)
+        self.h_ct = np.zeros(capacity, dtype=np.float32)
+        self.coverage_radius = np.zeros(capacity, dtype=np.float32)
+
+    def _reserve(self, needed):
+        capacity = len(self.x)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("x", "y", "cell", "tech", "frequency", "h_ct", "coverage_radius"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def append_chunk(self, x, y, cell, tech, rng):
+        """Adds a chunk of towers, drawing frequencies and heights and computing radii in one go."""
+        n = len(x)
+        start, stop = self.size, self.size + n
+        self._reserve(stop)
+        tech = np.asarray(tech, dtype=np.int8)
+        self.x[start:stop] = x
+        self.y[start:stop] = y
+        self.cell[start:stop] = cell
+        self.tech[start:stop] = tech
+        for code, name in enumerate(TECHS):
+            mask = tech == code
+            self.frequency[start:stop][mask] = rng.choice(FREQUENCIES[name], size=int(mask.sum()))
+        # Randomized base station height: 200 +/- 1..50 m
+        self.h_ct[start:stop] = sample_heights(rng, n)
+        self.coverage_radius[start:stop] = coverage_radii(tech, self.frequency[start:stop], self.h_ct[start:stop])
+        self.size = stop
+
+    def vertex(self, row):
+        return Cell_Tower_Vertex(float(self.x[row]), float(self.y[row]), float(self.frequency[row]),
+                                 TECHS[self.tech[row]], h_ct=float(self.h_ct[row]))
+
+class CellIndex:
+    """Cell ID -> dense code while reading; grouped into Cells (CSR slices) once at the end."""
+    def __init__(self):
+        self.codes = {}
+        self.ids = []
+
+    def code(self, cell_id):
+        code = self.codes.get(cell_id)
+        if code is None:
+            code = self.codes[cell_id] = len(self.ids)
+            self.ids.append(cell_id)
+        return code
+
+    def group(self, store):
+        """Cells in first-seen order, each holding the rows of its towers (counting sort, linear time)."""
+        cell = store.cell[:store.size]
+        order = np.argsort(cell, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(np.bincount(cell, minlength=len(self.ids)))])
+        return [Cell(cell_id, store, order[starts[c]:starts[c + 1]]) for c, cell_id in enumerate(self.ids)]
+
+def stream_candidates(layer, chunk_size=100000):
+    """
+    Yields (cell_ids, x, y, techs) chunks of the candidate layer, reading only
+    the two fields needed, so memory is bounded by the chunk size.
+    """
+    request = QgsFeatureRequest().setSubsetOfAttributes(["Cell ID", "Cell Tech"], layer.fields())
+    cell_ids, xs, ys, techs = [], [], [], []
+    for feature in layer.getFeatures(request):
+        geom = feature.geometry().asPoint()
+        cell_ids.append(feature["Cell ID"])
+        xs.append(geom.x())
+        ys.append(geom.y())
+        techs.append(feature["Cell Tech"])  # Field indicating 3G/4G
+        if len(xs) >= chunk_size:
+            yield cell_ids, xs, ys, techs
+            cell_ids, xs, ys, techs = [], [], [], []
+    if xs:
+        yield cell_ids, xs, ys, techs
+
+def load_cells(chunks, seed=None):
+    """Groups streamed candidate chunks into Cells backed by one TowerStore."""
+    rng = np.random.default_rng(seed)
+    store = TowerStore()
+    index = CellIndex()
+    tech_code = {name: code for code, name in enumerate(TECHS)}
+    for cell_ids, xs, ys, techs in chunks:
+        codes = np.fromiter((index.code(c) for c in cell_ids), dtype=np.int32, count=len(cell_ids))
+        tech = np.fromiter((tech_code[t] for t in techs), dtype=np.int8, count=len(techs))
+        store.append_chunk(np.asarray(xs), np.asarray(ys), codes, tech, rng)
+    return index.group(store), store
+
+def _sample_block(args):
+    """Monte Carlo radii of one block of towers: per-tower percentiles and a per-cell radius histogram."""
+    seed, tech, cell, n_samples, n_cells, low, high, n_bins = args
+    rng = np.random.default_rng(seed)
+    heights = sample_heights(rng, (len(tech), n_samples))
+    frequencies = sample_frequencies(rng, tech, n_samples)
+    radii = coverage_radii(np.repeat(tech[:, None], n_samples, axis=1), frequencies, heights)
+
+    tower_percentiles = np.percentile(radii, PERCENTILES, axis=1).T
+    bins = np.clip(((radii - low) / (high - low) * n_bins).astype(np.int64), 0, n_bins - 1)
+    hist = np.bincount((cell[:, None].astype(np.int64) * n_bins + bins).ravel(), minlength=n_cells * n_bins)
+    return tower_percentiles, hist.reshape(n_cells, n_bins)
+
+def histogram_percentiles(hist, low, bin_width, percentiles=PERCENTILES):
+    """Percentiles of each row's histogram, interpolated linearly within the bin."""
+    counts = hist.sum(axis=1)
+    cumulative = np.cumsum(hist, axis=1)
+    out = np.full((hist.shape[0], len(percentiles)), np.nan)
+    rows = np.arange(hist.shape[0])
+    for k, q in enumerate(percentiles):
+        target = counts * q / 100.0
+        b = np.minimum((cumulative < target[:, None]).sum(axis=1), hist.shape[1] - 1)
+        below = np.where(b > 0, cumulative[rows, b - 1], 0)
+        inside = hist[rows, b]
+        fraction = np.where(inside > 0, (target - below) / np.maximum(inside, 1), 0.0)
+        out[:, k] = np.where(counts > 0, low + (b + fraction) * bin_width, np.nan)
+    return out
+
+def monte_carlo_radii(store, n_cells, n_samples=2000, seed=0, workers=None, block_size=256, n_bins=1024):
+    """
+    Draws n_samples heights and frequencies for every tower and evaluates the
+    radii in blocks of towers spread over a process pool. Each block has its own
+    seed, so results depend on the seed only, not on the worker count.
+
+    Returns per-tower (p5, p50, p95) radii and per-cell (p5, p50, p95) radii over
+    all draws of the cell's towers, in km.
+    """
+    low, high = radius_bounds()
+    n = store.size
+    tech, cell = store.tech[:n], store.cell[:n]    # the columns are over-allocated past size
+    seeds = np.random.SeedSequence(seed).spawn((n + block_size - 1) // block_size)
+    jobs = [
+        (s, tech[start:start + block_size].copy(), cell[start:start + block_size].copy(),
+         n_samples, n_cells, low, high, n_bins)
+        for s, start in zip(seeds, range(0, n, block_size))
+    ]
+    if workers == 1 or len(jobs) <= 1:
+        results = [_sample_block(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_sample_block, jobs))
+
+    tower_percentiles = np.concatenate([r[0] for r in results]) if results else np.zeros((0, len(PERCENTILES)))
+    assert len(tower_percentiles) == n, "one percentile row per stored tower"
+    hist = np.zeros((n_cells, n_bins), dtype=np.int64)
+    for r in results:
+        hist += r[1]
+    return tower_percentiles, histogram_percentiles(hist, low, (high - low) / n_bins)
+
+def main(verbose=True, n_samples=0, seed=0):
+
     # Load cell site candidates (replace with actual path)
-    cells = []
     layer = QgsVectorLayer(r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data\cell-bounded multi-candidate sites\candidate cell sites.shp", "Cell Sites", "ogr")
-    
-    # Process features with graph-based clustering
-    for feature in layer.getFeatures():
-        cell_id = feature["Cell ID"]
+    if not layer.isValid():
+        print("Error: Cell sites layer failed to load!")
+        return
 
-        if len(cells) == 0:
-            cells.append(Cell(cell_id))
-        elif cell_id not in get_used_cellIDs(cells):
-            cells.append(Cell(cell_id))
+    # Stream the features into the struct-of-arrays store, grouped by Cell ID
+    cells, store = load_cells(stream_candidates(layer))
+    print(f"Loaded {store.size} candidate towers in {len(cells)} cells")
 
-        geom = feature.geometry().asPoint()
-        tech = feature["Cell Tech"]  # Field indicating 3G/4G
-        print(f"Cell tech: {tech}")
-        
-        # Assign random frequency from approved band
-        freq = random.choice(FREQUENCIES[tech])
-        print(f"freq: {freq}")
-
-        # Create cell tower with propagation parameters
-        tower = Cell_Tower_Vertex(
-            x=geom.x(),
-            y=geom.y(),
-            frequency=freq,
-            node_type=tech
-        )
-        i = 0
-        for cell in cells:
-            if cell.cell_id == cell_id:
-                cells[i].towers.append(tower)
-            i+=1
-        
-        
     # Print network analysis
     for cell in cells:
-        print(f"Cell {cell.cell_id} with {len(cell.towers)} towers")
-        for tower in cell.towers:
-            print(f"\t{tower.node_type} @ {tower.op_frequency} MHz: "
-                  f"{tower.coverage_radius:.1f} km coverage")
-
-    
-def get_used_cellIDs(cells):
-    cell_ids = []
-    for cell in cells:
-        cell_ids.append(cell.cell_id)
-    return cell_ids
+        print(f"Cell {cell.cell_id} with {len(cell)} towers")
+        if not verbose:
+            continue
+        for row in cell.rows:
+            print(f"\t{TECHS[store.tech[row]]} @ {store.frequency[row]:g} MHz: "
+                  f"{store.coverage_radius[row]:.1f} km coverage")
+
+    if not n_samples:
+        return
+
+    # Monte Carlo mode: the radius spread over many height/frequency draws instead of one
+    started = time.perf_counter()
+    tower_percentiles, cell_percentiles = monte_carlo_radii(store, len(cells), n_samples, seed)
+    print(f"\n{n_samples} height/frequency draws for each of {store.size} towers in {time.perf_counter() - started:.2f} s (seed {seed})")
+    for c, cell in enumerate(cells):
+        p5, p50, p95 = cell_percentiles[c]
+        print(f"Cell {cell.cell_id}: radius p5 {p5:.1f} km, p50 {p50:.1f} km, p95 {p95:.1f} km")
+
+    with open("cell_radius_distribution.csv", "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Cell ID", "Towers"] + [f"P{q} Radius (km)" for q in PERCENTILES])
+        for c, cell in enumerate(cells):
+            writer.writerow([cell.cell_id, len(cell)] + [round(float(v), 3) for v in cell_percentiles[c]])
+    print("Per-cell radius distribution written to cell_radius_distribution.csv")
 
 if __name__ == "__main__":
     # Initialize QGIS
@@ -120,7 +326,11 @@ if __name__ == "__main__":
     qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
     qgs.initQgis()
 
-    main()
+    # e.g. Cell.py --quiet --samples 5000 --seed 7
+    args = sys.argv[1:]
+    n_samples = int(args[args.index("--samples") + 1]) if "--samples" in args else 0
+    seed = int(args[args.index("--seed") + 1]) if "--seed" in args else 0
+    main(verbose="--quiet" not in args, n_samples=n_samples, seed=seed)
 
     # Cleanup
     qgs.exitQgis()
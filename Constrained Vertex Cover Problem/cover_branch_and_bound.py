@@ -0,0 +1,310 @@
+"""
+Exact solver for the constrained cover problem: the fewest candidate sites such
+that every demand point of the required service levels (at least all Critical
+cells) lies inside a chosen site's coverage radius.
+
+Depth-first branch and bound over Python-int bitsets (bit j = demand point j or
+site j):
+  * the greedy selector from max_coverage_selector.py gives the warm-start
+    upper bound,
+  * dominated sites (coverage a subset of another site's) and dominated points
+    (covered whenever another point is) are removed up front, and at each node
+    a branch is skipped when its useful coverage is a subset of an earlier one,
+  * the lower bound at each node is a packing bound: uncovered points whose
+    covering-site sets are pairwise disjoint each need their own tower; the
+    root bound is tightened with a subgradient Lagrangian relaxation,
+  * each node branches on the uncovered point with the fewest available sites.
+
+The solver reports the best cover, the proven lower bound and the gap, so a
+stopped run still says how far from optimal the tower count can be.
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import CANDIDATE_SITES_PATH, HEX_CELLS_PATH, unpack_bits, load_candidate_sites, load_hex_cells
+from max_coverage_selector import lazy_greedy_max_coverage, build_instance
+
+try:
+    bit_count = int.bit_count
+except AttributeError:  # Python < 3.10
+    def bit_count(x):
+        return bin(x).count("1")
+
+def iter_bits(x):
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+def to_int(mask):
+    """Boolean vector -> Python int with bit j set when mask[j]."""
+    return int.from_bytes(np.packbits(np.asarray(mask, dtype=bool), bitorder="little").tobytes(), "little")
+
+
+class CoverSolution:
+    def __init__(self, sites, lower_bound, nodes, elapsed, optimal, uncoverable):
+        self.sites = sites              # chosen site indices
+        self.lower_bound = lower_bound  # proven minimum number of towers
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.optimal = optimal
+        self.uncoverable = uncoverable  # required points no candidate site reaches
+
+    @property
+    def gap(self):
+        return len(self.sites) - self.lower_bound
+
+
+class ConstrainedCoverSolver:
+    def __init__(self, site_bits, n_points, required, time_limit=300.0, progress_interval=5.0):
+        """
+        site_bits : (n_sites, n_bytes) packed coverage bitsets from coverage_bitsets()
+        n_points  : number of demand points behind the bitsets
+        required  : boolean vector, True for the points that must be covered
+        """
+        self.site_bits = site_bits
+        self.time_limit = time_limit
+        self.progress_interval = progress_interval
+
+        covers = unpack_bits(site_bits, n_points)          # (n_sites, n_points)
+        required = np.asarray(required, dtype=bool)
+        coverable = covers.any(axis=0)
+        self.uncoverable = np.flatnonzero(required & ~coverable)
+        self.required = required & coverable
+
+        self.site_cover = [to_int(row & self.required) for row in covers]
+        self.point_sites = {int(p): to_int(covers[:, p]) for p in np.flatnonzero(self.required)}
+        self.target = to_int(self.required)
+
+        self.nodes = 0
+        self.best = None
+        self.started = 0.0
+        self.last_report = 0.0
+        self.timed_out = False
+
+    # ---------------------------------------------------------
+    # Preprocessing
+    # ---------------------------------------------------------
+    def _prune_dominated(self):
+        """Drops sites covered by another site and points implied by another point."""
+        alive = 0
+        order = sorted(range(len(self.site_cover)), key=lambda s: -bit_count(self.site_cover[s]))
+        kept = []
+        for s in order:
+            cover = self.site_cover[s]
+            if cover == 0:
+                continue
+            if any(cover & ~self.site_cover[k] == 0 for k in kept):
+                continue
+            kept.append(s)
+            alive |= 1 << s
+        removed_sites = len(self.site_cover) - len(kept)
+
+        # Point p is implied by q when every site covering q also covers p.
+        points = sorted(self.point_sites, key=lambda p: bit_count(self.point_sites[p] & alive))
+        self.point_sites = {p: self.point_sites[p] & alive for p in points}
+        kept_points = []
+        for p in points:
+            sites = self.point_sites[p]
+            if any(self.point_sites[q] & ~sites == 0 for q in kept_points):
+                continue
+            kept_points.append(p)
+        dropped = set(self.point_sites) - set(kept_points)
+        for p in dropped:
+            self.target &= ~(1 << p)
+            del self.point_sites[p]
+        self.alive = alive
+        print(f"Dominance pruning: {removed_sites} sites and {len(dropped)} demand points removed")
+
+    # ---------------------------------------------------------
+    # Bounds
+    # ---------------------------------------------------------
+    def _scan(self, uncovered, available):
+        """Lower bound for covering `uncovered` with `available` sites, and the branching point."""
+        ranked = []
+        for p in iter_bits(uncovered):
+            options = self.point_sites[p] & available
+            count = bit_count(options)
+            if count == 0:
+                return None, p
+            ranked.append((count, p, options))
+        ranked.sort()
+        bound = 0
+        blocked = 0
+        for count, p, options in ranked:
+            if options & blocked == 0:
+                bound += 1
+                blocked |= options
+        return bound, ranked[0][1]
+
+    def _lagrangian_bound(self, upper_bound, iterations=300):
+        """
+        Lagrangian relaxation of the cover constraints, maximised by subgradient
+        steps: L(u) = sum(u) + sum over sites of min(0, 1 - sum of u over the
+        site's points) is a lower bound on the number of towers for any u >= 0.
+        """
+        points = sorted(self.point_sites)
+        sites = list(iter_bits(self.alive))
+        if not points or not sites:
+            return 0
+        column = {p: j for j, p in enumerate(points)}
+        A = np.zeros((len(sites), len(points)), dtype=np.float64)
+        for i, s in enumerate(sites):
+            for p in iter_bits(self.site_cover[s] & self.target):
+                A[i, column[p]] = 1.0
+
+        u = 1.0 / np.max(np.where(A > 0, A.sum(axis=1, keepdims=True), 0.0), axis=0)
+        best = 0.0
+        step = 2.0
+        stall = 0
+        for _ in range(iterations):
+            reduced = 1.0 - A @ u
+            picked = reduced < 0.0
+            value = u.sum() + reduced[picked].sum()
+            if value > best + 1e-9:
+                best = value
+                stall = 0
+            else:
+                stall += 1
+                if stall >= 20:
+                    step /= 2.0
+                    stall = 0
+            gradient = 1.0 - picked.astype(np.float64) @ A
+            norm = float(gradient @ gradient)
+            if norm == 0.0 or step < 1e-4:
+                break
+            u = np.maximum(0.0, u + step * (upper_bound - value) / norm * gradient)
+        return int(np.ceil(best - 1e-6))
+
+    def _report(self, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last_report < self.progress_interval:
+            return
+        self.last_report = now
+        elapsed = now - self.started
+        rate = self.nodes / elapsed if elapsed > 0 else 0.0
+        print(f"[{elapsed:7.1f}s] {self.nodes} nodes ({rate:,.0f} nodes/s) | best {len(self.best)} towers | lower bound {self.root_bound}")
+
+    # ---------------------------------------------------------
+    # Search
+    # ---------------------------------------------------------
+    def _branch(self, chosen, uncovered, available):
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self._report()
+            if time.perf_counter() - self.started > self.time_limit:
+                self.timed_out = True
+        if self.timed_out:
+            return
+        if uncovered == 0:
+            if len(chosen) < len(self.best):
+                self.best = list(chosen)
+                print(f"Improved cover: {len(self.best)} towers after {self.nodes} nodes")
+            return
+
+        bound, point = self._scan(uncovered, available)
+        if bound is None or len(chosen) + bound >= len(self.best):
+            return
+
+        options = sorted(
+            iter_bits(self.point_sites[point] & available),
+            key=lambda s: -bit_count(self.site_cover[s] & uncovered)
+        )
+        tried = []
+        for s in options:
+            useful = self.site_cover[s] & uncovered
+            # A site whose useful coverage is inside an already tried site's
+            # can only rebuild covers that branch has seen.
+            if any(useful & ~t == 0 for t in tried):
+                available &= ~(1 << s)
+                continue
+            chosen.append(s)
+            self._branch(chosen, uncovered & ~self.site_cover[s], available)
+            chosen.pop()
+            tried.append(useful)
+            available &= ~(1 << s)
+            if self.timed_out or len(chosen) + 1 >= len(self.best):
+                return
+
+    def solve(self, warm_start):
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self._prune_dominated()
+
+        self.best = [int(s) for s in warm_start]
+        bound, _ = self._scan(self.target, self.alive)
+        self.root_bound = max(bound if bound is not None else 0,
+                              self._lagrangian_bound(len(self.best)))
+        print(f"Warm start: {len(self.best)} towers | root lower bound: {self.root_bound}")
+
+        if self.root_bound < len(self.best):
+            self._branch([], self.target, self.alive)
+
+        elapsed = time.perf_counter() - self.started
+        optimal = not self.timed_out
+        lower_bound = len(self.best) if optimal else self.root_bound
+        self._report(force=True)
+        return CoverSolution(self.best, lower_bound, self.nodes, elapsed, optimal, self.uncoverable)
+
+
+def solve_constrained_cover(site_bits, n_points, service_levels, required_levels=("Critical",),
+                            full_coverage=False, time_limit=300.0):
+    """
+    Minimum number of sites covering every point of `required_levels` (and, when
+    full_coverage is set, also every coverable point of the other levels).
+    Warm-started from the lazy greedy selector restricted to the required points.
+    """
+    service_levels = np.asarray(service_levels, dtype=object)
+    required = np.isin(service_levels, list(required_levels))
+    if full_coverage:
+        required |= np.ones(n_points, dtype=bool)
+
+    solver = ConstrainedCoverSolver(site_bits, n_points, required, time_limit=time_limit)
+    greedy = lazy_greedy_max_coverage(site_bits, solver.required.astype(np.float64))
+    return solver.solve(greedy.sites)
+
+
+def main(full_coverage=False, time_limit=300.0, required_levels=("Critical",)):
+    from qgis.core import QgsVectorLayer
+
+    sites_layer = QgsVectorLayer(CANDIDATE_SITES_PATH, "Candidate Cell Sites", "ogr")
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not sites_layer.isValid() or not cells_layer.isValid():
+        print("Error: candidate sites or hexagonal cells layer failed to load!")
+        return
+
+    sites = load_candidate_sites(sites_layer)
+    cells = load_hex_cells(cells_layer)
+    site_bits, _ = build_instance(sites, cells)
+
+    solution = solve_constrained_cover(site_bits, len(cells["cell_id"]), cells["service_level"],
+                                       required_levels=required_levels, full_coverage=full_coverage,
+                                       time_limit=time_limit)
+
+    if len(solution.uncoverable):
+        levels = cells["service_level"][solution.uncoverable]
+        must = solution.uncoverable[np.isin(levels, list(required_levels))]
+        other = solution.uncoverable[~np.isin(levels, list(required_levels))]
+        if len(must):
+            print(f"Warning: no candidate site reaches {'/'.join(required_levels)} cells {sorted(int(c) for c in cells['cell_id'][must])}")
+        if len(other):
+            print(f"Warning: no candidate site reaches other cells {sorted(int(c) for c in cells['cell_id'][other])}")
+    status = "optimal" if solution.optimal else f"gap {solution.gap} (time limit reached)"
+    print(f"\nConstrained cover: {len(solution.sites)} towers, lower bound {solution.lower_bound}, {status}")
+    print(f"Explored {solution.nodes} nodes in {solution.elapsed:.1f} s")
+    print(f"Cell towers: {sorted(int(c) for c in sites['cell_id'][solution.sites])}")
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    main(full_coverage="--full-coverage" in sys.argv)
+
+    qgs.exitQgis()
@@ -0,0 +1,140 @@
+"""
+Step 6 of detstxt.txt: the set cover over candidate cell sites.
+
+Each candidate site is a packed bitset of the demand points (hex cells) inside
+its coverage radius. Sites are picked by weighted maximum coverage with
+CELF-style lazy greedy evaluation: marginal gains only shrink as more sites are
+chosen, so a site popped from the priority queue whose gain was computed in the
+current round is guaranteed to be the best one, and most sites are never
+re-evaluated.
+"""
+import os
+import sys
+import csv
+import heapq
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import (
+    CANDIDATE_SITES_PATH, HEX_CELLS_PATH,
+    GridIndex, coverage_bitsets, popcount, service_weights, weight_table, weighted_count,
+    load_candidate_sites, load_hex_cells
+)
+
+
+class CoverageSelection:
+    def __init__(self, sites, curve, covered):
+        self.sites = sites        # chosen site indices, in pick order
+        self.curve = curve        # one (towers, weighted coverage, % points, % weight) row per pick
+        self.covered = covered    # packed bitset of the covered demand points
+
+
+def lazy_greedy_max_coverage(site_bits, point_weights, max_towers=None, initial=None):
+    """
+    Greedy weighted maximum coverage with lazy (CELF) evaluation.
+
+    site_bits     : (n_sites, n_bytes) packed coverage bitsets
+    point_weights : weight of each demand point (see service_weights)
+    max_towers    : tower budget; stops earlier once no site adds coverage
+    initial       : site indices that are already built (counted against the budget)
+    """
+    n_sites = len(site_bits)
+    n_points = len(point_weights)
+    max_towers = n_sites if max_towers is None else max_towers
+    table = weight_table(point_weights)
+    total_weight = float(np.sum(point_weights))
+
+    covered = np.zeros(site_bits.shape[1], dtype=np.uint8)
+    chosen = []
+    curve = []
+
+    def record():
+        weight = float(weighted_count(covered, table))
+        points = int(popcount(covered))
+        curve.append((
+            len(chosen),
+            weight,
+            100.0 * points / n_points if n_points else 0.0,
+            100.0 * weight / total_weight if total_weight else 0.0
+        ))
+
+    for site in (initial or []):
+        chosen.append(int(site))
+        covered |= site_bits[site]
+    if chosen:
+        record()
+
+    # All first-round gains in one vectorized pass.
+    gains = weighted_count(site_bits & ~covered, table)
+    taken = set(chosen)
+    heap = [(-float(gains[s]), s, len(chosen)) for s in range(n_sites) if s not in taken and gains[s] > 0.0]
+    heapq.heapify(heap)
+
+    while heap and len(chosen) < max_towers:
+        neg_gain, site, stamp = heapq.heappop(heap)
+        if stamp == len(chosen):
+            chosen.append(site)
+            covered |= site_bits[site]
+            record()
+        else:
+            # Stale entry: re-evaluate against the current cover and requeue.
+            gain = float(weighted_count(site_bits[site] & ~covered, table))
+            if gain > 0.0:
+                heapq.heappush(heap, (-gain, site, len(chosen)))
+
+    return CoverageSelection(chosen, curve, covered)
+
+
+def build_instance(sites, cells, weights=None, cell_size=1000.0):
+    """Coverage bitsets of the candidate sites over the hex cell centroids, plus the centroid weights."""
+    index = GridIndex(cells["x"], cells["y"], cell_size)
+    site_bits = coverage_bitsets(sites["x"], sites["y"], sites["radius"], index)
+    point_weights = service_weights(cells["service_level"], weights)
+    return site_bits, point_weights
+
+
+def write_curve(path, selection, sites):
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Towers", "Cell ID", "Weighted Coverage", "Coverage %", "Weighted Coverage %"])
+        for row in selection.curve:
+            towers = row[0]
+            writer.writerow([towers, sites["cell_id"][selection.sites[towers - 1]], *row[1:]])
+        print(f"Coverage curve written to {path}")
+
+
+def main(max_towers=None):
+    from qgis.core import QgsVectorLayer
+
+    sites_layer = QgsVectorLayer(CANDIDATE_SITES_PATH, "Candidate Cell Sites", "ogr")
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not sites_layer.isValid() or not cells_layer.isValid():
+        print("Error: candidate sites or hexagonal cells layer failed to load!")
+        return
+
+    sites = load_candidate_sites(sites_layer)
+    cells = load_hex_cells(cells_layer)
+    site_bits, point_weights = build_instance(sites, cells)
+
+    selection = lazy_greedy_max_coverage(site_bits, point_weights, max_towers=max_towers)
+
+    print(f"Selected {len(selection.sites)} of {len(sites['cell_id'])} candidate sites")
+    print("Towers | Cell ID | Coverage % | Weighted Coverage %")
+    for towers, weight, pct, weighted_pct in selection.curve:
+        cell_id = sites["cell_id"][selection.sites[towers - 1]]
+        print(f"{towers:6d} | {cell_id:7d} | {pct:10.2f} | {weighted_pct:.2f}")
+
+    write_curve("coverage_vs_towers.csv", selection, sites)
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    main(max_towers=budget)
+
+    qgs.exitQgis()
@@ -0,0 +1,144 @@
+"""
+Population-weighted coverage from building locations.
+
+Coverage Level % in the simulator weights every hex vertex equally, although
+most hexes are forest or sea. Buildings are where people actually are, so this
+metric counts the population living in covered buildings instead:
+
+  * each building gets its hex cell's servable population split evenly over the
+    hex's buildings (the hex comes from the building's "Cell ID", or the
+    nearest hex centroid when the layer has none) and its service level,
+  * buildings are binned once into a grid index and every candidate site's
+    footprint is stored as a packed bitmap over the buildings,
+  * a network is then evaluated by OR-ing its towers' bitmaps and one dot
+    product with the population vector - milliseconds for ~100k buildings.
+
+Served population is reported per tower (inside its footprint, and covered by
+no other tower) and per service level.
+"""
+import os
+import sys
+import csv
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import (
+    CANDIDATE_SITES_PATH, HEX_CELLS_PATH, BUILDINGS_PATH, ALL_BUILDINGS_PATH,
+    SERVICE_LEVEL_WEIGHTS, GridIndex, coverage_bitsets, unpack_bits,
+    load_candidate_sites, load_hex_cells, load_buildings, load_network_csv
+)
+
+
+class BuildingDemand:
+    def __init__(self, buildings, cells, cell_size=250.0):
+        n = len(buildings["x"])
+        self.size = n
+
+        # Hex cell of every building: its Cell ID when known, else the nearest centroid.
+        position = {int(c): i for i, c in enumerate(cells["cell_id"])}
+        hex_of = np.array([position.get(int(c), -1) for c in buildings["cell_id"]], dtype=np.int64)
+        missing = np.flatnonzero(hex_of < 0)
+        if len(missing):
+            hex_index = GridIndex(cells["x"], cells["y"], 2000.0)
+            for b in missing:
+                radius = 2000.0
+                near = hex_index.query_disc(buildings["x"][b], buildings["y"][b], radius)
+                while len(near) == 0 and radius < 64000.0:
+                    radius *= 2.0
+                    near = hex_index.query_disc(buildings["x"][b], buildings["y"][b], radius)
+                if len(near):
+                    d = np.hypot(cells["x"][near] - buildings["x"][b], cells["y"][near] - buildings["y"][b])
+                    hex_of[b] = near[np.argmin(d)]
+
+        located = hex_of >= 0
+        per_hex = np.bincount(hex_of[located], minlength=len(cells["x"]))
+        self.population = np.zeros(n, dtype=np.float64)
+        self.population[located] = cells["population"][hex_of[located]] / per_hex[hex_of[located]]
+
+        self.levels = list(SERVICE_LEVEL_WEIGHTS)
+        level_code = {level: j for j, level in enumerate(self.levels)}
+        self.level = np.full(n, len(self.levels), dtype=np.int64)  # last bucket: unknown level
+        self.level[located] = [level_code.get(l, len(self.levels)) for l in cells["service_level"][hex_of[located]]]
+
+        self.index = GridIndex(buildings["x"], buildings["y"], cell_size)
+        self.total_population = float(self.population.sum())
+
+    def footprints(self, sites):
+        """Packed bitmap of the buildings inside each site's coverage radius."""
+        return coverage_bitsets(sites["x"], sites["y"], sites["radius"], self.index)
+
+    def coverage(self, bits):
+        """Population-weighted coverage % of the network whose tower footprints are `bits`."""
+        covered = unpack_bits(np.bitwise_or.reduce(bits, axis=0), self.size)
+        return 100.0 * float(self.population @ covered) / self.total_population if self.total_population else 0.0
+
+    def report(self, bits):
+        """Served population per tower (footprint, exclusive) and per service level."""
+        masks = unpack_bits(bits, self.size)
+        multiplicity = masks.sum(axis=0)
+        covered = multiplicity > 0
+        footprint = masks @ self.population
+        exclusive = masks[:, multiplicity == 1] @ self.population[multiplicity == 1]
+
+        by_level = np.bincount(self.level[covered], weights=self.population[covered], minlength=len(self.levels) + 1)
+        total_by_level = np.bincount(self.level, weights=self.population, minlength=len(self.levels) + 1)
+        levels = {
+            level: (float(by_level[j]), float(total_by_level[j]))
+            for j, level in enumerate(self.levels + ["Unknown"]) if total_by_level[j] > 0
+        }
+        return footprint, exclusive, levels
+
+
+def main(network_path="optimized_network.csv", all_buildings=False):
+    from qgis.core import QgsVectorLayer
+
+    buildings_path = ALL_BUILDINGS_PATH if all_buildings else BUILDINGS_PATH
+    buildings_layer = QgsVectorLayer(buildings_path, "Buildings", "ogr")
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not buildings_layer.isValid() or not cells_layer.isValid():
+        print("Error: buildings or hexagonal cells layer failed to load!")
+        return
+
+    if os.path.exists(network_path):
+        towers = load_network_csv(network_path)
+    else:
+        print(f"{network_path} not found: evaluating every candidate cell site")
+        sites_layer = QgsVectorLayer(CANDIDATE_SITES_PATH, "Candidate Cell Sites", "ogr")
+        if not sites_layer.isValid():
+            print("Error: Candidate cell sites layer failed to load!")
+            return
+        towers = load_candidate_sites(sites_layer)
+
+    started = time.perf_counter()
+    demand = BuildingDemand(load_buildings(buildings_layer), load_hex_cells(cells_layer))
+    bits = demand.footprints(towers)
+    print(f"Indexed {demand.size} buildings and {len(bits)} tower footprints in {time.perf_counter() - started:.2f} s")
+
+    started = time.perf_counter()
+    pct = demand.coverage(bits)
+    print(f"Population-weighted Coverage Level: {pct:.2f}% (evaluated in {1000.0 * (time.perf_counter() - started):.2f} ms)")
+
+    footprint, exclusive, levels = demand.report(bits)
+    print("\nServed population by service level:")
+    for level, (served, total) in levels.items():
+        print(f"\t{level}: {served:,.0f} of {total:,.0f} ({100.0 * served / total:.2f}%)")
+
+    with open("population_coverage.csv", "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Cell ID", "Footprint Population", "Exclusive Population"])
+        for i in np.argsort(-footprint):
+            writer.writerow([int(towers["cell_id"][i]), round(float(footprint[i]), 1), round(float(exclusive[i]), 1)])
+    print("Served population per tower written to population_coverage.csv")
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    main(all_buildings="--all-buildings" in sys.argv)
+
+    qgs.exitQgis()
@@ -0,0 +1,263 @@
+"""
+Reproducible candidate-site scoring: the four-factor composite score.
+
+The candidate sites in "Final Candidate Cell Sites/v3" are the elevation points
+with the highest composite score in each hex cell. The score was computed by
+hand in the QGIS field calculator as
+
+    comp score = 0.4 * VALUE + 0.1 * near_roads + 0.3 * adj. dist - 0.2 * bldg ctry
+
+where an empty "bldg ctry" (no building near the point) counts as 100. This
+pipeline does the same in NumPy for any weight vector:
+
+  1. the elevation points ("Totality of Elev Points/With Composite Score") are
+     read once into arrays,
+  2. points without a "Cell ID" are assigned to the nearest hex centroid through
+     a grid bin index, and each point picks up its hex's service level and
+     servable population,
+  3. the factors are optionally normalized (min-max or z-score, so weights mean
+     the same thing whatever the units), weighted and summed,
+  4. the best point of every Cell ID is taken with one lexsort,
+  5. the winners are written out as a new final_candidate_cell_sites layer,
+     with the network fields the simulator's load_nodes_from_candidate_layer
+     reads: "Cell Tech" (4G for Critical/Priority/Enhanced hexes, 3G otherwise),
+     "Frequency" (greedy co-channel plan over the reuse distances), "Coverage"
+     (km, get_coverage_distance at that channel) and "Overlaps" (handover
+     neighbours by the optimizer's 10% margin rule).
+
+With DEFAULT_WEIGHTS and normalize="none" the selection matches the hand-made
+v3 layer.
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import (
+    DATA_ROOT, HEX_CELLS_PATH, GridIndex, SectorLayout, project_to_local, load_hex_cells,
+    coverage_distances, overlap_graph
+)
+
+ELEVATION_POINTS_PATH = os.path.join(DATA_ROOT, "Totality of Elev Points", "With Composite Score", "elev_points.shp")
+OUTPUT_PATH = os.path.join(DATA_ROOT, "Final Candidate Cell Sites", "generated", "final_candidate_cell_sites.shp")
+
+FACTORS = ["VALUE", "near_roads", "adj. dist", "bldg ctry"]
+
+DEFAULT_WEIGHTS = {
+    "VALUE": 0.4,       # elevation
+    "near_roads": 0.1,  # road access
+    "adj. dist": 0.3,   # distance to the adjacent cells
+    "bldg ctry": -0.2   # building clutter around the point
+}
+
+# Network fields of the generated sites, as in the v3 layer and the simulator
+TECH_OF_LEVEL = {"Critical": "4G", "Priority": "4G", "Enhanced": "4G", "Basic": "3G", "Trivial": "3G"}
+
+frequencies = {
+    "3G": sorted([950, 925, 900, 875, 850, 825], reverse=True),
+    "4G": sorted([2100, 2050, 2000, 1950, 1900, 1850], reverse=True)
+}
+
+interference_threshold = {
+    "3G": 10500,
+    "4G": 2000
+}
+
+# Value used for an empty factor field.
+FACTOR_DEFAULTS = {
+    "VALUE": 0.0,
+    "near_roads": 0.0,
+    "adj. dist": 0.0,
+    "bldg ctry": 100.0
+}
+
+
+def load_elevation_points(layer):
+    """Elevation points as arrays: fid, x/y, cell_id (-1 when empty), point_id and the factor matrix."""
+    from qgis.core import NULL
+
+    names = layer.fields().names()
+    fids, lons, lats, cell_ids, point_ids, factors = [], [], [], [], [], []
+    for feature in layer.getFeatures():
+        geom = feature.geometry()
+        if geom is None or geom.isEmpty():
+            continue
+        point = geom.asPoint()
+        fids.append(feature.id())
+        lons.append(point.x())
+        lats.append(point.y())
+        cell_ids.append(int(feature["Cell ID"]) if "Cell ID" in names and feature["Cell ID"] else -1)
+        point_ids.append(int(feature["Point ID"]) if "Point ID" in names and feature["Point ID"] else -1)
+        factors.append([
+            float(feature[f]) if f in names and feature[f] is not None and feature[f] != NULL else FACTOR_DEFAULTS[f]
+            for f in FACTORS
+        ])
+    x, y = project_to_local(lons, lats)
+    return {
+        "fid": np.array(fids, dtype=np.int64),
+        "x": x, "y": y,
+        "cell_id": np.array(cell_ids, dtype=np.int64),
+        "point_id": np.array(point_ids, dtype=np.int64),
+        "factors": np.array(factors, dtype=np.float64).reshape(-1, len(FACTORS))
+    }
+
+
+def assign_cells(points, cells, cell_size=1000.0):
+    """Fills missing Cell IDs with the nearest hex centroid; returns each point's hex row (-1 if none)."""
+    position = {int(c): i for i, c in enumerate(cells["cell_id"])}
+    hex_of = np.array([position.get(int(c), -1) for c in points["cell_id"]], dtype=np.int64)
+    missing = np.flatnonzero(hex_of < 0)
+    if len(missing):
+        index = GridIndex(cells["x"], cells["y"], cell_size)
+        for p in missing:
+            radius = cell_size
+            near = index.query_disc(points["x"][p], points["y"][p], radius)
+            while len(near) == 0 and radius < 32 * cell_size:
+                radius *= 2.0
+                near = index.query_disc(points["x"][p], points["y"][p], radius)
+            if len(near):
+                d = np.hypot(cells["x"][near] - points["x"][p], cells["y"][near] - points["y"][p])
+                hex_of[p] = near[np.argmin(d)]
+                points["cell_id"][p] = cells["cell_id"][hex_of[p]]
+        print(f"Assigned {len(missing)} elevation points to their nearest hex cell")
+    return hex_of
+
+
+def composite_score(factors, weights=None, normalize="none"):
+    """Weighted sum of the factor columns, after optional min-max or z-score normalization."""
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    w = np.array([weights.get(f, 0.0) for f in FACTORS], dtype=np.float64)
+    if normalize == "minmax":
+        low = factors.min(axis=0)
+        span = factors.max(axis=0) - low
+        factors = (factors - low) / np.where(span > 0, span, 1.0)
+    elif normalize == "zscore":
+        std = factors.std(axis=0)
+        factors = (factors - factors.mean(axis=0)) / np.where(std > 0, std, 1.0)
+    elif normalize != "none":
+        raise ValueError("normalize must be 'none', 'minmax' or 'zscore'")
+    return factors @ w
+
+
+def best_per_cell(cell_ids, scores):
+    """Row of the highest-scoring point of every Cell ID (ties go to the first point)."""
+    order = np.lexsort((-scores, cell_ids))
+    sorted_cells = cell_ids[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_cells[1:] != sorted_cells[:-1]
+    keep = order[first]
+    return keep[cell_ids[keep] >= 0]
+
+
+def network_fields(points, winners, cells, hex_of):
+    """
+    Cell Tech, Frequency (MHz), Coverage (km) and Overlaps (cell ids) of the
+    winning points, derived from their hex's service level.
+    """
+    x, y = points["x"][winners], points["y"][winners]
+    levels = [cells["service_level"][h] if h >= 0 else "Trivial" for h in hex_of[winners]]
+    tech = np.array([TECH_OF_LEVEL.get(level, "3G") for level in levels], dtype=object)
+
+    # plan channels first (reach depends on the channel), one omnidirectional sector per site
+    start = np.array([frequencies[t][0] for t in tech], dtype=np.float64)
+    layout = SectorLayout(x, y, coverage_distances(start, tech), tech, start, azimuths=(0.0,), front_to_back=0.0)
+    layout.assign_frequencies(frequencies, interference_threshold)
+    frequency = layout.frequency.astype(np.int64)
+
+    radius = coverage_distances(frequency, tech)
+    cell_ids = points["cell_id"][winners]
+    overlaps = [[int(cell_ids[j]) for j in nbrs] for nbrs in overlap_graph(x, y, radius, 0.10)]
+    return tech, frequency, radius / 1000.0, overlaps
+
+
+def write_candidates(layer, points, winners, scores, cells, hex_of, path):
+    """Copies the winning points with their new score, service level, users and network fields into a shapefile."""
+    from qgis.core import QgsVectorLayer, QgsField, QgsFeature, QgsFeatureRequest, QgsVectorFileWriter, QgsProject
+    from qgis.PyQt.QtCore import QVariant
+
+    out = QgsVectorLayer("Point?crs=" + layer.crs().authid(), "final_candidate_cell_sites", "memory")
+    provider = out.dataProvider()
+    fields = layer.fields()
+    provider.addAttributes(list(fields))
+    for name, kind in (("Selected", QVariant.Bool), ("comp score", QVariant.Double),
+                       ("Serv. Lev.", QVariant.String), ("Users", QVariant.Int),
+                       ("Cell Tech", QVariant.String), ("Frequency", QVariant.Int),
+                       ("Coverage", QVariant.Double), ("Overlaps", QVariant.String)):
+        if fields.indexOf(name) < 0:
+            provider.addAttributes([QgsField(name, kind)])
+    out.updateFields()
+    out_fields = out.fields()
+
+    tech, frequency, coverage_km, overlaps = network_fields(points, winners, cells, hex_of)
+    row_of = {int(fid): i for i, fid in enumerate(points["fid"][winners])}
+    request = QgsFeatureRequest().setFilterFids([int(f) for f in points["fid"][winners]])
+    features = []
+    for source in layer.getFeatures(request):
+        i = row_of[source.id()]
+        p = winners[i]
+        feature = QgsFeature(out_fields)
+        feature.setGeometry(source.geometry())
+        for name in fields.names():
+            feature[name] = source[name]
+        feature["Cell ID"] = int(points["cell_id"][p])
+        feature["Selected"] = True
+        feature["comp score"] = round(float(scores[p]), 3)
+        if hex_of[p] >= 0:
+            feature["Serv. Lev."] = cells["service_level"][hex_of[p]]
+            feature["Users"] = int(cells["population"][hex_of[p]])
+        feature["Cell Tech"] = tech[i]
+        feature["Frequency"] = int(frequency[i])
+        feature["Coverage"] = round(float(coverage_km[i]), 5)
+        feature["Overlaps"] = ", ".join(str(c) for c in overlaps[i])
+        features.append(feature)
+    provider.addFeatures(features)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = "ESRI Shapefile"
+    error = QgsVectorFileWriter.writeAsVectorFormatV3(out, path, QgsProject.instance().transformContext(), options)
+    if error[0] != QgsVectorFileWriter.NoError:
+        print(f"Error: could not write {path}: {error[1]}")
+    else:
+        print(f"{len(features)} candidate cell sites written to {path}")
+
+
+def main(weights=None, normalize="none", output_path=OUTPUT_PATH):
+    from qgis.core import QgsVectorLayer
+
+    points_layer = QgsVectorLayer(ELEVATION_POINTS_PATH, "Elevation Points", "ogr")
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not points_layer.isValid() or not cells_layer.isValid():
+        print("Error: elevation points or hexagonal cells layer failed to load!")
+        return
+
+    started = time.perf_counter()
+    points = load_elevation_points(points_layer)
+    cells = load_hex_cells(cells_layer)
+    loaded = time.perf_counter()
+
+    hex_of = assign_cells(points, cells)
+    scores = composite_score(points["factors"], weights, normalize)
+    winners = best_per_cell(points["cell_id"], scores)
+    scored = time.perf_counter()
+    print(f"Loaded {len(scores)} elevation points in {loaded - started:.2f} s, "
+          f"scored and picked {len(winners)} sites in {1000.0 * (scored - loaded):.1f} ms")
+
+    write_candidates(points_layer, points, winners, scores, cells, hex_of, output_path)
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    # e.g. composite_score_pipeline.py 0.4 0.1 0.3 -0.2 minmax
+    weights = None
+    if len(sys.argv) >= 5:
+        weights = dict(zip(FACTORS, (float(w) for w in sys.argv[1:5])))
+    main(weights, sys.argv[5] if len(sys.argv) > 5 else "none")
+
+    qgs.exitQgis()
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
+import os
 import sys
+import math
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton,
     QHBoxLayout, QComboBox, QGraphicsTextItem
@@ -9,7 +11,6 @@ from PyQt5.QtCore import Qt, QRectF
 
 from qgis.core import (
     QgsApplication,
-    QgsRasterLayer,
     QgsProject,
     QgsCoordinateReferenceSystem,
     QgsCoordinateTransform,
@@ -22,6 +23,13 @@ from qgis.core import (
 )
 from qgis.gui import QgsMapCanvas, QgsMapCanvasItem, QgsMapTool
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sim_logging import get_logger
+from tile_cache import base_layer
+
+log = get_logger("network")
+frequency_log = get_logger("frequency")
+
 # -----------------------------------------------------------------------------
 # Helper class to support distance comparisons with clicks.
 # -----------------------------------------------------------------------------
@@ -44,10 +52,8 @@ def calculate_distance(node1, node2):
     d = QgsDistanceArea()
     d.setSourceCrs(QgsCoordinateReferenceSystem("EPSG:4326"), QgsProject.instance().transformContext())
     d.setEllipsoid("WGS84")
-    print(f"node1 mapPoint: {node1.mapPoint}")
-    print(f"node2 mapPoint: {node2.mapPoint}")
     distance = d.measureLine(node1.mapPoint, node2.mapPoint)
-    print(f"Distance between {node1.mapPoint} and {node2.mapPoint} is {distance:.2f} meters")
+    log.debug("Distance between %s and %s is %.2f meters", node1.mapPoint, node2.mapPoint, distance)
     return distance
 
 def build_graph(manager):
@@ -103,6 +109,42 @@ def assign_frequencies_with_graph_coloring(manager):
     graph = build_graph(manager)
     greedy_graph_coloring(manager, graph)
 
+def replan_node_frequency(manager, node, changes):
+    """
+    Local version of greedy_graph_coloring for a single edited node: it keeps the
+    node's frequency when no overlapping neighbour uses it, otherwise takes the
+    first free one; if none is free it tries to move the clashing neighbours
+    instead. Only the node and its neighbours are examined, and every change is
+    appended to `changes` as (node, old MHz, new MHz).
+    """
+    def free_frequency(vertex):
+        used = {n.frequency for n in manager.neighbors[vertex] if n.frequency is not None}
+        if vertex.frequency is not None and vertex.frequency not in used:
+            return vertex.frequency
+        for freq in frequencies[vertex.node_type]:
+            if freq not in used:
+                return freq
+        return vertex.frequency
+
+    old = node.frequency
+    node.frequency = free_frequency(node)
+    if node.frequency != old:
+        changes.append((node, old, node.frequency))
+    node.update_label()
+
+    for neighbor in list(manager.neighbors[node]):
+        if neighbor.frequency is None or neighbor.frequency != node.frequency:
+            continue
+        neighbor_old = neighbor.frequency
+        neighbor.frequency = free_frequency(neighbor)
+        if neighbor.frequency != neighbor_old:
+            changes.append((neighbor, neighbor_old, neighbor.frequency))
+            neighbor.update_label()
+
+def report_frequency_changes(changes):
+    for node, old, new in changes:
+        frequency_log.info("Frequency re-plan: %s node at %s changed from %s to %s MHz", node.node_type, node.mapPoint, old or 'N/A', new)
+
 # -----------------------------------------------------------------------------
 # Node & Edge Classes (QgsMapCanvasItem)
 # -----------------------------------------------------------------------------
@@ -207,6 +249,13 @@ class GraphManager:
         self.node_type = "3G"
         # Callback to update coverage display (set by main window)
         self.update_coverage_callback = None
+        # Overlap graph kept incrementally: node -> {overlapping node: None}.
+        # Nodes are bucketed on a grid so an edit only measures distances to nearby nodes.
+        self.neighbors = {}
+        self.buckets = {}
+        self.node_buckets = {}
+        self.bucket_size = 1500.0 / 111320.0  # one default coverage radius, in degrees
+        self.max_coverage_radius = 0.0
 
     def add_node(self, x, y, node_type="0"):
         if node_type != "0":
@@ -214,24 +263,73 @@ class GraphManager:
         else:
             node = Node(self.canvas, x, y, self.node_type)
         self.nodes.append(node)
-        assign_frequencies_with_graph_coloring(self)
-        self.update_edges()
+        self.index_node(node)
+        changes = []
+        replan_node_frequency(self, node, changes)
+        report_frequency_changes(changes)
         if self.update_coverage_callback:
             self.update_coverage_callback()
 
     def delete_node(self, node):
-        for edge in node.edges[:]:
-            if edge in self.edges:
-                self.edges.remove(edge)
-            edge.hide()
+        former = self.unindex_node(node)
         if node in self.nodes:
             self.nodes.remove(node)
         node.hide()
-        assign_frequencies_with_graph_coloring(self)
-        self.update_edges()
+        # The freed frequency may resolve clashes among the former neighbours.
+        changes = []
+        for neighbor in former:
+            replan_node_frequency(self, neighbor, changes)
+        report_frequency_changes(changes)
         if self.update_coverage_callback:
             self.update_coverage_callback()
 
+    def move_node(self, node):
+        """Re-links and re-plans a node after it has been dragged to a new mapPoint."""
+        self.unindex_node(node)
+        self.index_node(node)
+        changes = []
+        replan_node_frequency(self, node, changes)
+        report_frequency_changes(changes)
+
+    def _bucket_key(self, point):
+        return (math.floor(point.x() / self.bucket_size), math.floor(point.y() / self.bucket_size))
+
+    def index_node(self, node):
+        """Buckets a node and links it to every node whose coverage overlaps it."""
+        self.max_coverage_radius = max(self.max_coverage_radius, node.coverage_radius)
+        key = self._bucket_key(node.mapPoint)
+        reach = node.coverage_radius / 2.0 + self.max_coverage_radius / 2.0  # in meters
+        rings = math.ceil(reach / (self.bucket_size * 111320.0 * math.cos(math.radians(node.mapPoint.y()))))
+        self.neighbors[node] = {}
+        for i in range(key[0] - rings, key[0] + rings + 1):
+            for j in range(key[1] - rings, key[1] + rings + 1):
+                for other in self.buckets.get((i, j), ()):
+                    d = calculate_distance(node, other)
+                    if d <= (node.coverage_radius / 2.0 + other.coverage_radius / 2.0):
+                        self.neighbors[node][other] = None
+                        self.neighbors[other][node] = None
+                        self.edges.append(Edge(self.canvas, node, other))
+        self.buckets.setdefault(key, {})[node] = None
+        self.node_buckets[node] = key
+
+    def unindex_node(self, node):
+        """Removes a node's bucket entry and edges; returns its former neighbours."""
+        key = self.node_buckets.pop(node, None)
+        if key is not None:
+            self.buckets[key].pop(node, None)
+        for edge in node.edges[:]:
+            if edge in self.edges:
+                self.edges.remove(edge)
+            other = edge.end_node if edge.start_node is node else edge.start_node
+            if edge in other.edges:
+                other.edges.remove(edge)
+            edge.hide()
+        node.edges = []
+        former = list(self.neighbors.pop(node, {}))
+        for other in former:
+            self.neighbors[other].pop(node, None)
+        return former
+
     def update_edges(self):
         # Remove all existing edges and recalculate overlapping coverage.
         for node in self.nodes:
@@ -283,7 +381,7 @@ class GraphMapTool(QgsMapTool):
 
     def canvasPressEvent(self, event):
         pos = event.mapPoint()
-        print("Clicked coordinates: X: {:.3f}, Y: {:.3f}".format(pos.x(), pos.y()))
+        get_logger("ui").debug("Clicked coordinates: X: %.3f, Y: %.3f", pos.x(), pos.y())
         if self.graph_manager.mode == "add_node":
             self.graph_manager.add_node(pos.x(), pos.y())
             return
@@ -318,9 +416,8 @@ class GraphMapTool(QgsMapTool):
 
     def canvasReleaseEvent(self, event):
         if self.active_node:
-            # When movement is finished, recalculate edges and frequencies.
-            self.graph_manager.update_edges()
-            self.graph_manager.assign_frequencies_with_graph_coloring()
+            # When movement is finished, re-link and re-plan only the moved node.
+            self.graph_manager.move_node(self.active_node)
             # Restore the node's label.
             self.active_node.update_label()
             self.active_node.selected = False
@@ -356,14 +453,11 @@ class GraphWindow(QMainWindow):
         crs = QgsCoordinateReferenceSystem("EPSG:4326")
         self.canvas.setDestinationCrs(crs)
 
-        # Add the OSM base layer.
-        osm_url = "type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png"
-        osm_layer = QgsRasterLayer(osm_url, "OpenStreetMap", "wms")
-        if not osm_layer.isValid():
-            print("Failed to load the OSM layer!")
-            sys.exit(1)
-        QgsProject.instance().addMapLayer(osm_layer)
-        self.canvas.setLayers([osm_layer])
+        # Add the OSM base layer, served from the local tile cache (Camiguin_fin1.tif when no tiles are available).
+        self.base_layer, self.tile_server = base_layer()
+        if self.base_layer is not None:
+            QgsProject.instance().addMapLayer(self.base_layer)
+            self.canvas.setLayers([self.base_layer])
 
         # Set the initial view.
         center4326 = QgsPointXY(124.7408, 9.1726)
@@ -501,6 +595,8 @@ if __name__ == "__main__":
     window = GraphWindow()
     window.show()
     ret = app.exec_()
+    if window.tile_server is not None:
+        window.tile_server.close()
 
     qgs.exitQgis()
     sys.exit(ret)
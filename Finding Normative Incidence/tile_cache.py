@@ -0,0 +1,298 @@
+"""
+Offline OpenStreetMap tiles for the normative graph tool.
+
+Tiles live in an XYZ directory ({z}/{x}/{y}.png under CAM_TILE_CACHE, by default
+"OSM Tile Cache" in the data folder) and, optionally, in an MBTiles file
+(CAM_TILE_MBTILES). GraphWindow does not talk to tile.openstreetmap.org itself:
+it points an XYZ layer at a small localhost server that answers each tile from
+
+    1. an LRU of recently served tiles in memory,
+    2. the XYZ directory, then the MBTiles file,
+    3. the upstream server (CAM_TILE_URL), only when online; the tile is then
+       written to the directory so it is fetched once.
+
+CAM_TILES_OFFLINE=1 skips the upstream server entirely. When neither the cache
+nor the upstream server has tiles for Camiguin, base_layer() falls back to the
+Camiguin_fin1.tif raster, so the tool also starts on air-gapped machines.
+
+Fill the cache (and optionally pack it into MBTiles) on a connected machine:
+
+    python tile_cache.py --zooms 10-15
+    python tile_cache.py --zooms 10-16 --mbtiles camiguin_osm.mbtiles
+
+Bulk downloads from tile.openstreetmap.org are limited by its usage policy;
+keep the zooms modest or point CAM_TILE_URL at your own tile server.
+"""
+import os
+import sys
+import math
+import sqlite3
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import DATA_ROOT, BASE_RASTER_PATH
+from sim_logging import get_logger
+
+log = get_logger("ui")
+
+TILE_CACHE_DIR = os.environ.get("CAM_TILE_CACHE", os.path.join(DATA_ROOT, "OSM Tile Cache"))
+MBTILES_PATH = os.environ.get("CAM_TILE_MBTILES")
+TILE_URL = os.environ.get("CAM_TILE_URL", "https://tile.openstreetmap.org/{z}/{x}/{y}.png")
+OFFLINE = os.environ.get("CAM_TILES_OFFLINE", "") not in ("", "0")
+USER_AGENT = "Camiguin-Cellular-Network-Planner/1.0 (offline tile cache)"
+
+# The normative graph tool's initial view: (lon min, lat min, lon max, lat max)
+CAMIGUIN_BOUNDS = (124.608, 9.041, 124.873, 9.305)
+DEFAULT_ZOOMS = (10, 11, 12, 13, 14, 15)
+MEMORY_TILES = 1024
+FETCH_TIMEOUT = 10.0
+PROBE_TIMEOUT = 1.5    # startup reachability check; air-gapped machines fall back this fast
+
+
+def tile_xy(lon, lat, z):
+    """Slippy-map tile column/row containing lon/lat at zoom z."""
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_r = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_r)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_in_bounds(bounds, zooms):
+    """Every (z, x, y) tile intersecting bounds at the given zooms."""
+    lon_min, lat_min, lon_max, lat_max = bounds
+    for z in zooms:
+        x0, y0 = tile_xy(lon_min, lat_max, z)
+        x1, y1 = tile_xy(lon_max, lat_min, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield z, x, y
+
+
+def parse_zooms(spec):
+    """'10-15' or '10,12,14' -> tuple of zoom levels."""
+    zooms = []
+    for part in spec.split(","):
+        low, _, high = part.partition("-")
+        zooms.extend(range(int(low), int(high or low) + 1))
+    return tuple(sorted(set(zooms)))
+
+
+class TileCache:
+    """Memory LRU over an XYZ directory and an optional MBTiles file, with optional upstream fetching."""
+    def __init__(self, cache_dir=TILE_CACHE_DIR, mbtiles_path=MBTILES_PATH, url=TILE_URL,
+                 online=not OFFLINE, memory_tiles=MEMORY_TILES):
+        self.cache_dir = cache_dir
+        self.url = url
+        self.online = online
+        self.memory_tiles = memory_tiles
+        self._memory = OrderedDict()    # (z, x, y) -> PNG bytes, least recently used first
+        self._lock = threading.Lock()
+        self._mbtiles = None
+        if mbtiles_path and os.path.exists(mbtiles_path):
+            self._mbtiles = sqlite3.connect(f"file:{mbtiles_path}?mode=ro", uri=True, check_same_thread=False)
+        self.hits = {"memory": 0, "disk": 0, "mbtiles": 0, "upstream": 0, "missing": 0}
+
+    def tile_path(self, z, x, y):
+        return os.path.join(self.cache_dir, str(z), str(x), f"{y}.png")
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_tiles:
+                self._memory.popitem(last=False)
+
+    def _read_local(self, z, x, y):
+        path = self.tile_path(z, x, y)
+        if os.path.exists(path):
+            with open(path, "rb") as handle:
+                return handle.read(), "disk"
+        if self._mbtiles is not None:
+            with self._lock:
+                row = self._mbtiles.execute(
+                    "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                    (z, x, 2 ** z - 1 - y)    # MBTiles rows count from the south (TMS)
+                ).fetchone()
+            if row is not None:
+                return bytes(row[0]), "mbtiles"
+        return None, None
+
+    def _fetch(self, z, x, y, timeout=FETCH_TIMEOUT):
+        request = urllib.request.Request(self.url.format(z=z, x=x, y=y), headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = response.read()
+        path = self.tile_path(z, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".part", "wb") as handle:
+            handle.write(data)
+        os.replace(path + ".part", path)
+        return data
+
+    def get(self, z, x, y):
+        """PNG bytes of tile (z, x, y), or None if no source has it."""
+        key = (z, x, y)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return data
+        data, source = self._read_local(z, x, y)
+        if data is None and self.online:
+            try:
+                data, source = self._fetch(z, x, y), "upstream"
+            except OSError as error:
+                log.debug("Tile %s/%s/%s not fetched: %s", z, x, y, error)
+        if data is None:
+            self.hits["missing"] += 1
+            return None
+        self.hits[source] += 1
+        self._remember(key, data)
+        return data
+
+    def has_tiles(self, bounds=CAMIGUIN_BOUNDS, zooms=DEFAULT_ZOOMS):
+        """True if any tile of bounds is cached locally at one of the zooms."""
+        return any(self._read_local(z, x, y)[0] is not None for z, x, y in tiles_in_bounds(bounds, zooms[:1]))
+
+    def upstream_reachable(self):
+        """One tile fetch with PROBE_TIMEOUT, so an offline start does not wait on FETCH_TIMEOUT."""
+        if not self.online:
+            return False
+        tile = next(tiles_in_bounds(CAMIGUIN_BOUNDS, DEFAULT_ZOOMS[:1]))
+        try:
+            data = self._fetch(*tile, timeout=PROBE_TIMEOUT)
+        except OSError as error:
+            log.debug("Tile server unreachable: %s", error)
+            return False
+        self.hits["upstream"] += 1
+        self._remember(tile, data)
+        return True
+
+    def prefetch(self, bounds=CAMIGUIN_BOUNDS, zooms=DEFAULT_ZOOMS, workers=2):
+        """Downloads every tile of bounds missing from the directory; returns (fetched, failed)."""
+        missing = [t for t in tiles_in_bounds(bounds, zooms) if not os.path.exists(self.tile_path(*t))]
+        print(f"{len(missing)} tiles to fetch for zooms {zooms[0]}-{zooms[-1]}")
+        fetched, failed = 0, 0
+
+        def fetch(tile):
+            try:
+                self._fetch(*tile)
+                return True
+            except OSError as error:
+                log.warning("Tile %s/%s/%s failed: %s", *tile, error)
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for ok in pool.map(fetch, missing):
+                fetched, failed = fetched + ok, failed + (not ok)
+        return fetched, failed
+
+    def export_mbtiles(self, path, bounds=CAMIGUIN_BOUNDS, zooms=DEFAULT_ZOOMS):
+        """Packs the directory tiles of bounds into an MBTiles file; returns the tile count."""
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT, value TEXT)")
+        db.execute("CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)")
+        db.execute("CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row)")
+        db.execute("DELETE FROM metadata")
+        db.executemany("INSERT INTO metadata VALUES (?, ?)", [
+            ("name", "Camiguin OpenStreetMap"), ("format", "png"), ("type", "baselayer"),
+            ("bounds", ",".join(str(v) for v in bounds)), ("minzoom", str(zooms[0])), ("maxzoom", str(zooms[-1])),
+            ("attribution", "(c) OpenStreetMap contributors")
+        ])
+        count = 0
+        for z, x, y in tiles_in_bounds(bounds, zooms):
+            path_xyz = self.tile_path(z, x, y)
+            if os.path.exists(path_xyz):
+                with open(path_xyz, "rb") as handle:
+                    db.execute("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)", (z, x, 2 ** z - 1 - y, handle.read()))
+                count += 1
+        db.commit()
+        db.close()
+        return count
+
+
+class TileServer:
+    """Serves a TileCache as http://127.0.0.1:<port>/{z}/{x}/{y}.png on a daemon thread."""
+    def __init__(self, cache):
+        self.cache = cache
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                try:
+                    z, x, y = (int(p) for p in handler.path.strip("/").rsplit(".", 1)[0].split("/"))
+                except ValueError:
+                    handler.send_error(400)
+                    return
+                data = cache.get(z, x, y)
+                if data is None:
+                    handler.send_error(404)
+                    return
+                handler.send_response(200)
+                handler.send_header("Content-Type", "image/png")
+                handler.send_header("Content-Length", str(len(data)))
+                handler.end_headers()
+                handler.wfile.write(data)
+
+            def log_message(handler, fmt, *args):
+                log.debug("Tile server: " + fmt, *args)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/{{z}}/{{x}}/{{y}}.png"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def base_layer(cache=None, zooms=DEFAULT_ZOOMS):
+    """
+    The normative graph tool's base layer and the TileServer behind it (None for
+    the raster fallback): cached/online OSM tiles, else Camiguin_fin1.tif, else None.
+    """
+    from qgis.core import QgsRasterLayer
+
+    cache = cache or TileCache()
+    if cache.has_tiles(zooms=zooms) or cache.upstream_reachable():
+        server = TileServer(cache)
+        uri = f"type=xyz&url={server.url}&zmin=0&zmax=19"
+        layer = QgsRasterLayer(uri, "OpenStreetMap", "wms")
+        if layer.isValid():
+            return layer, server
+        server.close()
+        log.warning("Cached OpenStreetMap layer failed to load!")
+    else:
+        log.warning("No OpenStreetMap tiles cached for Camiguin and the tile server is unreachable.")
+
+    layer = QgsRasterLayer(BASE_RASTER_PATH, "Base Raster")
+    if layer.isValid():
+        log.info("Using the local base raster %s", BASE_RASTER_PATH)
+        return layer, None
+    log.error("Base raster layer failed to load!")
+    return None, None
+
+
+def main(argv):
+    zooms = parse_zooms(argv[argv.index("--zooms") + 1]) if "--zooms" in argv else DEFAULT_ZOOMS
+    workers = int(argv[argv.index("--workers") + 1]) if "--workers" in argv else 2
+    cache = TileCache(online=True)
+    fetched, failed = cache.prefetch(zooms=zooms, workers=workers)
+    print(f"Fetched {fetched} tiles ({failed} failed) into {cache.cache_dir}")
+    if "--mbtiles" in argv:
+        path = argv[argv.index("--mbtiles") + 1]
+        print(f"{cache.export_mbtiles(path, zooms=zooms)} tiles packed into {path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,311 @@
+"""
+Drive-test simulation of handovers along the road network.
+
+get_level_of_handover only asks whether a tower has an overlapping neighbour.
+This script drives every road of road_network.shp ("Road Network by Cell"),
+sampling a point every few meters, and asks what a moving user sees:
+
+  * best server  - the tower with the largest normalized margin 1 - d / radius
+                   (negative everywhere = coverage gap), computed for a whole
+                   batch of samples at once, in tower x sample blocks of bounded
+                   size,
+  * handovers    - changes of best server along a road (a gap in between does
+                   not hide a change of server),
+  * ping-pongs   - A -> B -> A where the user stays on B for less than
+                   `ping_pong_m` meters,
+  * gaps         - stretches of road with no server, and their length.
+
+road_network.shp is cut at the hex cell boundaries, so one road is many
+features. The pieces of each "Road ID" are chained end to end into continuous
+drives (a new drive only starts where the road branches or breaks), which
+keeps the handovers at cell boundaries - where the best server changes - in
+the count; each sample still belongs to its own piece for the per-segment
+rows. Samples are flushed in batches of about `batch_points`, only between
+whole roads, so memory stays bounded however many samples the island needs.
+"""
+import os
+import sys
+import csv
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import ROADS_PATH, project_to_local, densify_polyline, line_parts, load_network_csv
+
+JOIN_TOLERANCE = 1.0   # meters between piece endpoints that still count as connected
+
+REPORT_FIELDS = [
+    "Road ID", "Barangay", "Cell ID", "Length (m)", "Samples", "Covered %",
+    "Handovers", "Ping-pongs", "Gaps", "Gap Length (m)", "Handovers per km"
+]
+
+
+def best_server(x, y, towers, max_pairs=4000000):
+    """
+    Best serving tower and its margin (1 - d / radius) for every sample point;
+    server is -1 where no tower covers the point. Samples are processed in
+    blocks so the tower x sample matrix never exceeds `max_pairs` entries.
+    """
+    n = len(x)
+    server = np.full(n, -1, dtype=np.int64)
+    margin = np.full(n, -np.inf)
+    tx = towers["x"][:, None]
+    ty = towers["y"][:, None]
+    radius = towers["radius"][:, None]
+    block = max(max_pairs // max(len(towers["x"]), 1), 1)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        m = 1.0 - np.hypot(tx - x[start:stop], ty - y[start:stop]) / radius
+        best = np.argmax(m, axis=0)
+        best_margin = m[best, np.arange(stop - start)]
+        server[start:stop] = np.where(best_margin >= 0.0, best, -1)
+        margin[start:stop] = best_margin
+    return server, margin
+
+
+def drive_batch(x, y, trajectory, segment, n_segments, towers, step, ping_pong_m):
+    """
+    Counts per segment for one batch of samples. `trajectory` separates the
+    independent drives (road parts); `segment` maps each sample to its road row.
+    """
+    server, _ = best_server(x, y, towers)
+    n = len(server)
+
+    # Runs of constant (trajectory, server).
+    change = np.ones(n, dtype=bool)
+    change[1:] = (server[1:] != server[:-1]) | (trajectory[1:] != trajectory[:-1])
+    starts = np.flatnonzero(change)
+    lengths = np.diff(np.append(starts, n))
+    run_server = server[starts]
+    run_traj = trajectory[starts]
+    run_segment = segment[starts]
+
+    gaps = run_server < 0
+    gap_count = np.bincount(run_segment[gaps], minlength=n_segments)
+    gap_length = np.bincount(run_segment[gaps], weights=lengths[gaps] * step, minlength=n_segments)
+    covered = np.bincount(segment[server >= 0], minlength=n_segments)
+
+    # Served runs only: a gap between two servers does not hide the change.
+    srv = run_server[~gaps]
+    trj = run_traj[~gaps]
+    seg = run_segment[~gaps]
+    dwell = lengths[~gaps] * step
+    same_drive = trj[1:] == trj[:-1]
+    handover = same_drive & (srv[1:] != srv[:-1])
+    handovers = np.bincount(seg[1:][handover], minlength=n_segments)
+
+    ping_pongs = np.zeros(n_segments, dtype=np.int64)
+    if len(srv) >= 3:
+        middle = (
+            (trj[:-2] == trj[1:-1]) & (trj[1:-1] == trj[2:])
+            & (srv[:-2] == srv[2:]) & (srv[1:-1] != srv[:-2])
+            & (dwell[1:-1] < ping_pong_m)
+        )
+        ping_pongs = np.bincount(seg[1:-1][middle], minlength=n_segments)
+
+    samples = np.bincount(segment, minlength=n_segments)
+    return samples, covered, handovers, ping_pongs, gap_count, gap_length
+
+
+def chain_pieces(lines, tolerance=JOIN_TOLERANCE):
+    """
+    Orders the pieces of one road into drives. `lines` is a list of (segment,
+    x, y) local-meter polylines; returns a list of drives, each a list of
+    (segment, x, y) in driving order (pieces reversed where needed). A piece
+    joins the drive when one of its ends is within `tolerance` of the drive's
+    current end; otherwise a new drive starts.
+
+    Piece ends are snapped to a `tolerance` grid once, so finding the ends near
+    a point only looks at the 3x3 block of grid cells around it.
+    """
+    tolerance = max(tolerance, 1e-9)
+    ends = [((x[0], y[0]), (x[-1], y[-1])) for _, x, y in lines]   # piece -> (start, end)
+    grid = {}   # snapped point -> [(piece, 0 for its start / 1 for its end), ...]
+
+    def cell(point):
+        return (int(np.floor(point[0] / tolerance)), int(np.floor(point[1] / tolerance)))
+
+    for i, pair in enumerate(ends):
+        for side, point in enumerate(pair):
+            grid.setdefault(cell(point), []).append((i, side))
+
+    used = [False] * len(lines)
+
+    def near(point, exclude=None):
+        """(distance, piece, side) of every unused piece end within tolerance of point."""
+        kx, ky = cell(point)
+        found = []
+        for i in (kx - 1, kx, kx + 1):
+            for j in (ky - 1, ky, ky + 1):
+                for piece, side in grid.get((i, j), ()):
+                    if used[piece] or piece == exclude:
+                        continue
+                    other = ends[piece][side]
+                    d = float(np.hypot(point[0] - other[0], point[1] - other[1]))
+                    if d <= tolerance:
+                        found.append((d, piece, side))
+        return found
+
+    # loose ends (no other piece touches them) are where drives begin, when there are any
+    loose = [(i, side) for i, pair in enumerate(ends) for side in (0, 1) if not near(pair[side], exclude=i)]
+    loose.reverse()
+    fallback = iter(range(len(lines)))
+
+    drives = []
+    remaining = len(lines)
+    while remaining:
+        first, side = None, 0
+        while loose and first is None:
+            piece, loose_side = loose.pop()
+            if not used[piece]:
+                first, side = piece, loose_side
+        if first is None:
+            first = next(i for i in fallback if not used[i])
+        used[first] = True
+        remaining -= 1
+        segment, x, y = lines[first]
+        # a drive beginning at a piece's end runs that piece backwards
+        drive = [(segment, x[::-1], y[::-1]) if side else (segment, x, y)]
+        tail = ends[first][1 - side]
+        while remaining:
+            candidates = near(tail)
+            if not candidates:
+                break
+            # nearest end wins; on a tie a piece entered at its start (no reversal) is preferred
+            _, best, best_side = min(candidates, key=lambda c: (c[0], c[2]))
+            used[best] = True
+            remaining -= 1
+            segment, x, y = lines[best]
+            drive.append((segment, x[::-1], y[::-1]) if best_side else (segment, x, y))
+            tail = ends[best][1 - best_side]
+        drives.append(drive)
+    return drives
+
+
+class DriveTestSimulator:
+    def __init__(self, towers, step=10.0, ping_pong_m=100.0, batch_points=250000):
+        self.towers = towers
+        self.step = step
+        self.ping_pong_m = ping_pong_m
+        self.batch_points = batch_points
+        self.totals = {"samples": 0, "covered": 0, "handovers": 0, "ping_pongs": 0, "gaps": 0, "length": 0.0}
+
+    def run(self, roads, writer):
+        """
+        roads  : iterable of (road_id, pieces), pieces being the (barangay,
+                 cell_id, parts) of every feature of the road, with parts as
+                 lists of vertex lon/lat lists (see line_parts)
+        writer : csv.writer receiving one REPORT_FIELDS row per road piece
+        """
+        pending = []
+        xs, ys, trajs, segs = [], [], [], []
+        size = 0
+        drive = 0
+        for road_id, pieces in roads:
+            lines = []
+            for barangay, cell_id, parts in pieces:
+                for lons, lats in parts:
+                    px, py = project_to_local(lons, lats)
+                    if len(px) >= 2:
+                        lines.append((len(pending), px, py))
+                pending.append([road_id, barangay, cell_id, 0.0])
+            for chain in chain_pieces(lines):
+                for segment, px, py in chain:
+                    sx, sy, part_length = densify_polyline(px, py, self.step)
+                    xs.append(sx)
+                    ys.append(sy)
+                    trajs.append(np.full(len(sx), drive, dtype=np.int64))
+                    segs.append(np.full(len(sx), segment, dtype=np.int64))
+                    size += len(sx)
+                    pending[segment][3] += part_length
+                drive += 1
+            if size >= self.batch_points:
+                self._flush(pending, xs, ys, trajs, segs, writer)
+                pending, xs, ys, trajs, segs, size = [], [], [], [], [], 0
+        if pending:
+            self._flush(pending, xs, ys, trajs, segs, writer)
+        return self.totals
+
+    def _flush(self, pending, xs, ys, trajs, segs, writer):
+        n_segments = len(pending)
+        if xs:
+            counts = drive_batch(np.concatenate(xs), np.concatenate(ys), np.concatenate(trajs),
+                                 np.concatenate(segs), n_segments, self.towers, self.step, self.ping_pong_m)
+        else:
+            counts = [np.zeros(n_segments)] * 6
+        samples, covered, handovers, ping_pongs, gaps, gap_length = counts
+
+        for j, (road_id, barangay, cell_id, length) in enumerate(pending):
+            writer.writerow([
+                road_id, barangay, cell_id, round(length, 1), int(samples[j]),
+                round(100.0 * covered[j] / samples[j], 2) if samples[j] else 0.0,
+                int(handovers[j]), int(ping_pongs[j]), int(gaps[j]), round(float(gap_length[j]), 1),
+                round(1000.0 * handovers[j] / length, 3) if length else 0.0
+            ])
+        self.totals["samples"] += int(samples.sum())
+        self.totals["covered"] += int(covered.sum())
+        self.totals["handovers"] += int(handovers.sum())
+        self.totals["ping_pongs"] += int(ping_pongs.sum())
+        self.totals["gaps"] += int(gaps.sum())
+        self.totals["length"] += sum(p[3] for p in pending)
+
+
+def road_features(layer):
+    """
+    (Road ID, [(Barangay, Cell ID, parts), ...]) per road, grouping the per-cell
+    pieces of each road. Features are read ordered by "Road ID" and each road is
+    yielded as soon as the next one starts, so only one road is held at a time.
+    """
+    from qgis.core import QgsFeatureRequest
+
+    request = QgsFeatureRequest()
+    request.addOrderBy('"Road ID"')
+    road_id, pieces = None, []
+    for feature in layer.getFeatures(request):
+        if pieces and feature["Road ID"] != road_id:
+            yield road_id, pieces
+            pieces = []
+        road_id = feature["Road ID"]
+        pieces.append((feature["Barangay"], feature["Cell ID"], line_parts(feature.geometry())))
+    if pieces:
+        yield road_id, pieces
+
+
+def main(network_path="optimized_network.csv", step=10.0, report_path="drive_test_handover.csv"):
+    from qgis.core import QgsVectorLayer
+
+    roads_layer = QgsVectorLayer(ROADS_PATH, "Road Network", "ogr")
+    if not roads_layer.isValid():
+        print("Error: Road network layer failed to load!")
+        return
+    if not os.path.exists(network_path):
+        print(f"Error: {network_path} not found. Run Optimize in the simulator first.")
+        return
+
+    towers = load_network_csv(network_path)
+    simulator = DriveTestSimulator(towers, step=step)
+    started = time.perf_counter()
+    with open(report_path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(REPORT_FIELDS)
+        totals = simulator.run(road_features(roads_layer), writer)
+    elapsed = time.perf_counter() - started
+
+    km = totals["length"] / 1000.0
+    print(f"Drove {km:.1f} km of road ({totals['samples']} samples every {step:g} m) in {elapsed:.1f} s")
+    print(f"Road coverage: {100.0 * totals['covered'] / max(totals['samples'], 1):.2f}%")
+    print(f"Handovers: {totals['handovers']} ({totals['handovers'] / km if km else 0:.2f} per km), "
+          f"ping-pongs: {totals['ping_pongs']}, coverage gaps: {totals['gaps']}")
+    print(f"Per-segment results written to {report_path}")
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    main(sys.argv[1] if len(sys.argv) > 1 else "optimized_network.csv")
+
+    qgs.exitQgis()
@@ -0,0 +1,133 @@
+"""
+Leave-one-out criticality of the optimized cell towers.
+
+Rather than deleting each tower and recomputing the coverage level (one full
+recomputation per tower), every tower is scored at once:
+
+  * coverage lost   - each hex cell's k-coverage (how many towers reach it) is
+                      counted once; a tower's loss is the weight of the cells it
+                      is the only one to reach,
+  * handover split  - one depth-first pass over the handover graph finds the
+                      articulation towers and how many extra islands of towers
+                      their loss would leave.
+"""
+import os
+import sys
+import csv
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Constrained Vertex Cover Problem"))
+from coverage_kernels import (
+    CANDIDATE_SITES_PATH, HEX_CELLS_PATH, GridIndex, coverage_pairs, coverage_multiplicity,
+    sole_coverage, service_weights, overlap_graph, articulation_points,
+    load_candidate_sites, load_hex_cells
+)
+
+
+class TowerCriticality:
+    def __init__(self, cell_ids, lost_points, lost_weight, lost_population, splits, total_weight, n_points):
+        self.cell_ids = cell_ids
+        self.lost_points = lost_points          # hex cells left with no coverage
+        self.lost_weight = lost_weight          # service-level weight of those cells
+        self.lost_population = lost_population  # servable population of those cells
+        self.splits = splits                    # extra handover components (-1: isolated tower)
+        self.total_weight = total_weight
+        self.n_points = n_points
+
+    def ranking(self):
+        """Tower indices, most critical first (handover splits, then weighted coverage lost)."""
+        return sorted(range(len(self.cell_ids)), key=lambda i: (-max(self.splits[i], 0), -self.lost_weight[i]))
+
+
+def tower_criticality(towers, cells, weights=None, cell_size=1000.0, handover_margin=0.10):
+    """
+    towers : dict of arrays as returned by load_candidate_sites (only the built towers)
+    cells  : dict of arrays as returned by load_hex_cells
+    """
+    n_towers = len(towers["x"])
+    n_points = len(cells["x"])
+    index = GridIndex(cells["x"], cells["y"], cell_size)
+    rows, cols = coverage_pairs(towers["x"], towers["y"], towers["radius"], index)
+
+    point_weights = service_weights(cells["service_level"], weights)
+    counts = coverage_multiplicity(rows, cols, n_points)
+    lost_points = sole_coverage(rows, cols, n_towers, np.ones(n_points)).astype(np.int64)
+    lost_weight = sole_coverage(rows, cols, n_towers, point_weights)
+    lost_population = sole_coverage(rows, cols, n_towers, cells["population"])
+
+    adjacency = overlap_graph(towers["x"], towers["y"], towers["radius"], handover_margin)
+    splits = articulation_points(adjacency)
+
+    print(f"k-coverage: {int(np.sum(counts == 0))} cells uncovered, {int(np.sum(counts == 1))} single-covered, "
+          f"{int(np.sum(counts >= 2))} covered by two or more towers")
+    return TowerCriticality(towers["cell_id"], lost_points, lost_weight, lost_population, splits,
+                            float(point_weights.sum()), n_points)
+
+
+def select_towers(sites, cell_ids):
+    """Restricts a load_candidate_sites() dict to the given Cell IDs."""
+    keep = np.isin(sites["cell_id"], list(cell_ids))
+    return {key: value[keep] for key, value in sites.items()}
+
+
+def read_network(path):
+    """Cell IDs of a saved network (any CSV with a "Cell ID" column, e.g. sa_optimized_network.csv)."""
+    with open(path, newline="") as handle:
+        return [int(row["Cell ID"]) for row in csv.DictReader(handle)]
+
+
+def write_report(path, result):
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Cell ID", "Cells Lost", "Weighted Coverage Lost %", "Population Lost", "Articulation", "Extra Components"])
+        for i in result.ranking():
+            writer.writerow([
+                int(result.cell_ids[i]), int(result.lost_points[i]),
+                100.0 * result.lost_weight[i] / result.total_weight if result.total_weight else 0.0,
+                float(result.lost_population[i]), result.splits[i] > 0, max(result.splits[i], 0)
+            ])
+    print(f"Criticality report written to {path}")
+
+
+def main(network_path=None):
+    from qgis.core import QgsVectorLayer
+
+    sites_layer = QgsVectorLayer(CANDIDATE_SITES_PATH, "Candidate Cell Sites", "ogr")
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not sites_layer.isValid() or not cells_layer.isValid():
+        print("Error: candidate sites or hexagonal cells layer failed to load!")
+        return
+
+    sites = load_candidate_sites(sites_layer)
+    cells = load_hex_cells(cells_layer)
+    if network_path:
+        towers = select_towers(sites, read_network(network_path))
+    else:
+        from max_coverage_selector import lazy_greedy_max_coverage, build_instance
+        site_bits, point_weights = build_instance(sites, cells)
+        chosen = lazy_greedy_max_coverage(site_bits, point_weights).sites
+        towers = {key: value[chosen] for key, value in sites.items()}
+        print(f"No network given: scoring the {len(chosen)}-tower greedy cover")
+
+    result = tower_criticality(towers, cells)
+
+    print("Cell ID | Cells Lost | Weighted Lost % | Population Lost | Handover Split")
+    for i in result.ranking():
+        split = f"+{result.splits[i]} islands" if result.splits[i] > 0 else ("isolated" if result.splits[i] < 0 else "-")
+        print(f"{int(result.cell_ids[i]):7d} | {int(result.lost_points[i]):10d} | "
+              f"{100.0 * result.lost_weight[i] / result.total_weight:15.2f} | {result.lost_population[i]:15.0f} | {split}")
+
+    write_report("tower_criticality.csv", result)
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
+
+    qgs.exitQgis()
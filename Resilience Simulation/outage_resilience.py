@@ -0,0 +1,223 @@
+"""
+Monte Carlo resilience of the optimized network to multi-tower outages.
+
+A typhoon rarely takes out a single site. Each scenario knocks out k random
+towers of the optimized network (saved by the optimizer as
+optimized_network.csv) and measures
+
+  * which hex cells lose all coverage - one boolean matmul of the surviving
+    towers against the tower x cell coverage bitmap, for a whole batch of
+    scenarios at once,
+  * how many islands the handover graph breaks into - union-find over the
+    surviving handover links, also vectorized across the batch,
+  * the servable population left without signal in every barangay of the
+    Administrative Barangays layer.
+
+Batches are fanned out over a process pool; each batch has its own seed, so a
+run is reproducible for a given seed and worker count.
+"""
+import os
+import sys
+import csv
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import (
+    HEX_CELLS_PATH, BARANGAYS_PATH, GridIndex, coverage_pairs, overlap_graph,
+    load_hex_cells, load_barangays, load_network_csv
+)
+
+
+class ResilienceModel:
+    def __init__(self, towers, cells, cell_size=1000.0):
+        n_towers = len(towers["x"])
+        n_points = len(cells["x"])
+        self.cell_ids = towers["cell_id"]
+
+        index = GridIndex(cells["x"], cells["y"], cell_size)
+        rows, cols = coverage_pairs(towers["x"], towers["y"], towers["radius"], index)
+        self.coverage = np.zeros((n_towers, n_points), dtype=np.float32)
+        self.coverage[rows, cols] = 1.0
+        self.baseline = self.coverage.sum(axis=0) > 0
+
+        # Handover links: the saved overlaps when present, else the overlap rule.
+        position = {int(c): i for i, c in enumerate(self.cell_ids)}
+        if "overlaps" in towers:
+            adjacency = [[position[o] for o in nbrs if o in position] for nbrs in towers["overlaps"]]
+        else:
+            adjacency = overlap_graph(towers["x"], towers["y"], towers["radius"])
+        edges = {(min(a, b), max(a, b)) for a, nbrs in enumerate(adjacency) for b in nbrs if a != b}
+        self.edges = np.array(sorted(edges), dtype=np.int64).reshape(-1, 2)
+
+        # Servable population of each hex cell, grouped by barangay.
+        self.barangays = sorted({b for b in cells["barangay"] if b})
+        column = {b: j for j, b in enumerate(self.barangays)}
+        self.population = np.zeros((n_points, len(self.barangays)), dtype=np.float32)
+        for p, (b, popn) in enumerate(zip(cells["barangay"], cells["population"])):
+            if b in column:
+                self.population[p, column[b]] = popn
+        self.barangay_population = self.population.sum(axis=0)
+        self.baseline_lost = (~self.baseline).astype(np.float32) @ self.population
+
+    def evaluate(self, failed):
+        """
+        failed : (n_scenarios, n_towers) boolean outage matrix
+        Returns (population without signal per barangay, % cells covered, handover islands) per scenario.
+        """
+        alive = ~failed
+        covered = (alive.astype(np.float32) @ self.coverage) > 0.0
+        lost = (~covered).astype(np.float32) @ self.population
+        coverage_pct = 100.0 * covered.mean(axis=1)
+        islands = self.islands(alive)
+        return lost, coverage_pct, islands
+
+    def islands(self, alive):
+        """Connected components of the surviving handover graph, by batched union-find."""
+        n_scenarios, n_towers = alive.shape
+        parent = np.tile(np.arange(n_towers, dtype=np.int64), (n_scenarios, 1))
+        rows = np.arange(n_scenarios)
+
+        def find(x):
+            while True:
+                up = parent[rows, x]
+                if np.array_equal(up, x):
+                    return x
+                # path halving
+                parent[rows, x] = parent[rows, up]
+                x = up
+
+        for a, b in self.edges:
+            live = alive[:, a] & alive[:, b]
+            if not live.any():
+                continue
+            ra = find(np.full(n_scenarios, a, dtype=np.int64))
+            rb = find(np.full(n_scenarios, b, dtype=np.int64))
+            merge = live & (ra != rb)
+            high = np.maximum(ra, rb)[merge]
+            low = np.minimum(ra, rb)[merge]
+            parent[rows[merge], high] = low
+        roots = parent == np.arange(n_towers)
+        return (roots & alive).sum(axis=1)
+
+
+_model = {}
+
+def _init_worker(model):
+    _model["model"] = model
+
+def _run_batch(args):
+    seed, n_scenarios, k = args
+    model = _model["model"]
+    rng = np.random.default_rng(seed)
+    n_towers = len(model.cell_ids)
+    k = min(k, n_towers)
+    # k distinct failed towers per scenario: the k smallest of a random key row.
+    picks = np.argpartition(rng.random((n_scenarios, n_towers)), k - 1, axis=1)[:, :k] if k else np.zeros((n_scenarios, 0), dtype=np.int64)
+    failed = np.zeros((n_scenarios, n_towers), dtype=bool)
+    failed[np.arange(n_scenarios)[:, None], picks] = True
+    lost, coverage_pct, islands = model.evaluate(failed)
+    return lost, coverage_pct, islands
+
+
+def simulate_outages(model, k, n_scenarios=10000, batch_size=1000, workers=None, seed=42):
+    """Samples n_scenarios k-tower outages; returns stacked (lost, coverage_pct, islands)."""
+    seeds = np.random.SeedSequence(seed).spawn((n_scenarios + batch_size - 1) // batch_size)
+    jobs = []
+    remaining = n_scenarios
+    for s in seeds:
+        jobs.append((s, min(batch_size, remaining), k))
+        remaining -= batch_size
+
+    started = time.perf_counter()
+    if workers == 1:
+        _init_worker(model)
+        results = [_run_batch(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,)) as pool:
+            results = list(pool.map(_run_batch, jobs))
+    elapsed = time.perf_counter() - started
+    print(f"{n_scenarios} scenarios of {k} failed towers in {elapsed:.2f} s ({n_scenarios / elapsed:,.0f} scenarios/s)")
+
+    lost = np.concatenate([r[0] for r in results])
+    coverage_pct = np.concatenate([r[1] for r in results])
+    islands = np.concatenate([r[2] for r in results])
+    return lost, coverage_pct, islands
+
+
+def summarize(model, k, lost, coverage_pct, islands, official_population=None):
+    """One row per barangay: outage probability and the distribution of population left without signal."""
+    extra = lost - model.baseline_lost
+    rows = []
+    for j, barangay in enumerate(model.barangays):
+        served = model.barangay_population[j]
+        share = 100.0 * extra[:, j] / served if served else np.zeros(len(extra))
+        rows.append({
+            "Barangay": barangay,
+            "Failed Towers": k,
+            "Population": float((official_population or {}).get(barangay, served)),
+            "Servable Population": float(served),
+            "P(outage)": float(np.mean(extra[:, j] > 0)),
+            "Mean Lost %": float(share.mean()),
+            "P50 Lost %": float(np.percentile(share, 50)),
+            "P95 Lost %": float(np.percentile(share, 95)),
+            "Max Lost %": float(share.max())
+        })
+    print(f"k={k}: coverage mean {coverage_pct.mean():.2f}% (p5 {np.percentile(coverage_pct, 5):.2f}%), "
+          f"handover islands mean {islands.mean():.2f} (max {int(islands.max())})")
+    return rows
+
+
+def write_report(path, rows):
+    if not rows:
+        print(f"Error: No outage rows to write (no towers or barangays?); {path} not written.")
+        return
+    with open(path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Outage distributions written to {path}")
+
+
+def main(network_path="optimized_network.csv", failures=(1, 2, 3, 5), n_scenarios=10000, workers=None):
+    from qgis.core import QgsVectorLayer
+
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    barangays_layer = QgsVectorLayer(BARANGAYS_PATH, "Administrative Barangays", "ogr")
+    if not cells_layer.isValid():
+        print("Error: Hexagonal cells layer failed to load!")
+        return
+    official = load_barangays(barangays_layer) if barangays_layer.isValid() else None
+    if official is None:
+        print("Error: Administrative barangays layer failed to load! Using servable population only.")
+    if not os.path.exists(network_path):
+        print(f"Error: {network_path} not found. Run Optimize in the simulator first.")
+        return
+
+    model = ResilienceModel(load_network_csv(network_path), load_hex_cells(cells_layer))
+    print(f"{len(model.cell_ids)} towers, {len(model.edges)} handover links, {len(model.barangays)} barangays")
+
+    rows = []
+    for k in failures:
+        lost, coverage_pct, islands = simulate_outages(model, k, n_scenarios=n_scenarios, workers=workers)
+        rows.extend(summarize(model, k, lost, coverage_pct, islands, official))
+
+    worst = sorted((r for r in rows if r["Failed Towers"] == failures[-1]), key=lambda r: -r["Mean Lost %"])[:10]
+    print(f"\nMost exposed barangays with {failures[-1]} towers down:")
+    for r in worst:
+        print(f"\t{r['Barangay']}: P(outage) {r['P(outage)']:.2f} | mean {r['Mean Lost %']:.1f}% | p95 {r['P95 Lost %']:.1f}%")
+
+    write_report("outage_resilience.csv", rows)
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    main(sys.argv[1] if len(sys.argv) > 1 else "optimized_network.csv")
+
+    qgs.exitQgis()
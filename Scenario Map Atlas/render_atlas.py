@@ -0,0 +1,308 @@
+"""
+Headless map atlas of optimized scenarios.
+
+Every optimized_network.csv-style file in a folder (write_network_csv rows, as
+saved by Optimize or a sweep) becomes one PNG with the simulator's look:
+
+    base      Camiguin_fin1.tif, brown hexagonal cells and blue roads, styled as
+              in MainWindow.__init__
+    overlay   green coverage discs with a dashed yellow outline, white handover
+              links and 3G (yellow) / 4G (green) tower dots
+
+The base layers do not change between scenarios, so they are rendered once per
+extent and output size with QgsMapRendererParallelJob and cached as a PNG
+(memory and CAM_ATLAS_CACHE on disk, keyed by the layer files' modification
+times). Each scenario only renders its three small memory layers on a
+transparent background, again with a parallel job; up to `workers` jobs run at
+once and the composited images are encoded to PNG on a thread pool. No display
+is needed: the Qt platform defaults to "offscreen".
+
+    python render_atlas.py sweep_results atlas
+    python render_atlas.py sweep_results atlas --size 1400x1200 --workers 8
+"""
+import os
+import sys
+import csv
+import glob
+import math
+import time
+import hashlib
+import tempfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coverage_kernels import (
+    HEX_CELLS_PATH, ROADS_PATH, BASE_RASTER_PATH, NETWORK_FIELDS, load_network_csv, local_to_lonlat
+)
+
+CACHE_DIR = os.environ.get("CAM_ATLAS_CACHE", os.path.join(tempfile.gettempdir(), "camiguin_atlas"))
+DEFAULT_SIZE = (1400, 1200)
+DISC_VERTICES = 48
+
+# Overlay styles, matching Cell_Tower_Vertex.paint and Edge
+COVERAGE_STYLE = {"color": "0,255,0,50", "outline_color": "255,255,0,255", "outline_width": "0.6", "outline_style": "dash"}
+EDGE_STYLE = {"color": "255,255,255,255", "width": "0.26"}
+TOWER_COLORS = {"3G": "yellow", "4G": "green"}
+
+
+def is_network_csv(path):
+    """True if the CSV starts with the write_network_csv header (skips reports and settings files)."""
+    try:
+        with open(path, newline="") as handle:
+            return next(csv.reader(handle), None) == NETWORK_FIELDS
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def coverage_ring(x, y, radius, n=DISC_VERTICES):
+    """Lon/lat vertices of a coverage disc around local point (x, y)."""
+    theta = np.linspace(0.0, 2.0 * math.pi, n, endpoint=False)
+    return local_to_lonlat(x + radius * np.cos(theta), y + radius * np.sin(theta))
+
+
+def load_base_layers():
+    """Base raster, hex cells and roads with MainWindow's symbology, top layer first."""
+    from PyQt5.QtGui import QColor
+    from qgis.core import QgsRasterLayer, QgsVectorLayer
+
+    layers = []
+    roads_layer = QgsVectorLayer(ROADS_PATH, "Road Network", "ogr")
+    if not roads_layer.isValid():
+        print("Error: Road network layer failed to load!")
+    else:
+        symbol = roads_layer.renderer().symbol()
+        symbol.setColor(QColor("blue"))
+        symbol.setWidth(1.0)
+        layers.append(roads_layer)
+
+    hex_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not hex_layer.isValid():
+        print("Error: Hexagonal cells layer failed to load!")
+    else:
+        hex_layer.renderer().symbol().setColor(QColor("brown"))
+        layers.append(hex_layer)
+
+    raster_layer = QgsRasterLayer(BASE_RASTER_PATH, "Base Raster")
+    if not raster_layer.isValid():
+        print("Error: Base raster layer failed to load!")
+    else:
+        layers.append(raster_layer)
+    return layers
+
+
+def scenario_layers(towers):
+    """Memory layers (towers, handover links, coverage discs) of one loaded scenario, top layer first."""
+    from qgis.core import (
+        QgsVectorLayer, QgsFeature, QgsGeometry, QgsPointXY, QgsFillSymbol, QgsLineSymbol,
+        QgsMarkerSymbol, QgsCategorizedSymbolRenderer, QgsRendererCategory, QgsSingleSymbolRenderer
+    )
+
+    coverage = QgsVectorLayer("Polygon?crs=EPSG:4326&field=cell_id:integer", "Coverage", "memory")
+    links = QgsVectorLayer("LineString?crs=EPSG:4326", "Handover Links", "memory")
+    sites = QgsVectorLayer("Point?crs=EPSG:4326&field=cell_id:integer&field=tech:string", "Cell Towers", "memory")
+
+    discs, points = [], []
+    for i, cell_id in enumerate(towers["cell_id"]):
+        lon, lat = coverage_ring(towers["x"][i], towers["y"][i], towers["radius"][i])
+        disc = QgsFeature(coverage.fields())
+        disc.setGeometry(QgsGeometry.fromPolygonXY([[QgsPointXY(a, b) for a, b in zip(lon, lat)]]))
+        disc.setAttributes([int(cell_id)])
+        discs.append(disc)
+        point = QgsFeature(sites.fields())
+        point.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(towers["lon"][i], towers["lat"][i])))
+        point.setAttributes([int(cell_id), str(towers["tech"][i])])
+        points.append(point)
+
+    # each handover link once, from the saved overlaps
+    position = {int(c): i for i, c in enumerate(towers["cell_id"])}
+    segments = []
+    for i, neighbours in enumerate(towers.get("overlaps", [])):
+        for other in neighbours:
+            j = position.get(other)
+            if j is not None and i < j:
+                segment = QgsFeature()
+                segment.setGeometry(QgsGeometry.fromPolylineXY([
+                    QgsPointXY(towers["lon"][i], towers["lat"][i]), QgsPointXY(towers["lon"][j], towers["lat"][j])
+                ]))
+                segments.append(segment)
+
+    coverage.dataProvider().addFeatures(discs)
+    links.dataProvider().addFeatures(segments)
+    sites.dataProvider().addFeatures(points)
+    for layer in (coverage, links, sites):
+        layer.updateExtents()
+
+    coverage.setRenderer(QgsSingleSymbolRenderer(QgsFillSymbol.createSimple(COVERAGE_STYLE)))
+    links.setRenderer(QgsSingleSymbolRenderer(QgsLineSymbol.createSimple(EDGE_STYLE)))
+    categories = []
+    for tech, color in TOWER_COLORS.items():
+        symbol = QgsMarkerSymbol.createSimple({"name": "circle", "color": color, "outline_color": "black", "size": "2.4"})
+        categories.append(QgsRendererCategory(tech, symbol, tech))
+    sites.setRenderer(QgsCategorizedSymbolRenderer("tech", categories))
+    return [sites, links, coverage]
+
+
+class AtlasRenderer:
+    """
+    Renders scenario maps over one cached base image per (extent, size).
+    Must be used from the thread that owns the QgsApplication.
+    """
+    def __init__(self, size=DEFAULT_SIZE, workers=None, dpi=96):
+        from qgis.core import QgsCoordinateReferenceSystem
+
+        self.size = size
+        self.dpi = dpi
+        self.workers = workers or max(1, min(8, (os.cpu_count() or 2) // 2))
+        self.crs = QgsCoordinateReferenceSystem("EPSG:4326")
+        self.base_layers = load_base_layers()
+        self.extent = self.base_layers[-1].extent() if self.base_layers else None
+        self._base_images = {}    # cache key -> QImage
+        self.base_renders = 0
+
+    def _settings(self, layers, transparent):
+        from PyQt5.QtCore import QSize
+        from PyQt5.QtGui import QColor
+        from qgis.core import QgsMapSettings
+
+        settings = QgsMapSettings()
+        settings.setLayers(layers)
+        settings.setDestinationCrs(self.crs)
+        settings.setExtent(self.extent)
+        settings.setOutputSize(QSize(*self.size))
+        settings.setOutputDpi(self.dpi)
+        settings.setBackgroundColor(QColor(0, 0, 0, 0) if transparent else QColor("white"))
+        settings.setFlag(QgsMapSettings.Antialiasing, True)
+        return settings
+
+    def _render(self, layers, transparent):
+        """Blocking QgsMapRendererParallelJob render (layers are drawn on parallel threads)."""
+        from PyQt5.QtCore import QEventLoop
+        from qgis.core import QgsMapRendererParallelJob
+
+        job = QgsMapRendererParallelJob(self._settings(layers, transparent))
+        loop = QEventLoop()
+        job.finished.connect(loop.quit)
+        job.start()
+        loop.exec_()
+        return job.renderedImage()
+
+    def _base_key(self):
+        parts = [f"{self.size[0]}x{self.size[1]}@{self.dpi}", self.extent.toString(8)]
+        for layer in self.base_layers:
+            path = layer.source().split("|")[0]
+            parts.append(f"{path}:{os.path.getmtime(path) if os.path.exists(path) else 0}")
+        return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+    def base_image(self):
+        """The base layers for the current extent and size: memory, then disk cache, else rendered once."""
+        from PyQt5.QtGui import QImage
+
+        key = self._base_key()
+        image = self._base_images.get(key)
+        if image is not None:
+            return image
+        path = os.path.join(CACHE_DIR, f"base_{key}.png")
+        image = QImage(path) if os.path.exists(path) else QImage()
+        if image.isNull():
+            image = self._render(self.base_layers, transparent=False)
+            self.base_renders += 1
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            image.save(path, "PNG")
+        self._base_images[key] = image
+        return image
+
+    def _compose(self, base, overlay, title):
+        from PyQt5.QtCore import Qt
+        from PyQt5.QtGui import QPainter, QFont
+
+        image = base.copy()
+        painter = QPainter(image)
+        painter.drawImage(0, 0, overlay)
+        painter.setPen(Qt.black)
+        painter.setFont(QFont("Arial", 14))
+        painter.drawText(10, 24, title)
+        painter.end()
+        return image
+
+    def render_scenarios(self, scenario_paths, output_dir):
+        """Renders one PNG per scenario CSV into output_dir; returns the written paths."""
+        from PyQt5.QtCore import QEventLoop
+        from qgis.core import QgsMapRendererParallelJob
+
+        if self.extent is None:
+            print("Error: No base layer loaded, nothing to render.")
+            return []
+        os.makedirs(output_dir, exist_ok=True)
+        base = self.base_image()
+        pending = list(scenario_paths)
+        running = {}    # job -> (layers, output path, title); keeps the memory layers alive
+        written = []
+        loop = QEventLoop()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as encoder:
+            def start_next():
+                while pending and len(running) < self.workers:
+                    path = pending.pop(0)
+                    try:
+                        towers = load_network_csv(path)
+                    except (OSError, KeyError, ValueError) as error:
+                        print(f"Error: {path} is not a readable optimized network ({error!r}); skipped")
+                        continue
+                    name = os.path.splitext(os.path.basename(path))[0]
+                    layers = scenario_layers(towers)
+                    job = QgsMapRendererParallelJob(self._settings(layers, transparent=True))
+                    running[job] = (layers, os.path.join(output_dir, f"{name}.png"), f"{name}: {len(towers['cell_id'])} towers")
+                    job.finished.connect(lambda job=job: finish(job))
+                    job.start()
+                if not running:
+                    loop.quit()
+
+            def finish(job):
+                layers, out_path, title = running.pop(job)
+                image = self._compose(base, job.renderedImage(), title)
+                written.append((out_path, encoder.submit(image.save, out_path, "PNG")))
+                start_next()
+
+            start_next()
+            if running:
+                loop.exec_()
+        return [out_path for out_path, saved in written if saved.result()]
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("Usage: render_atlas.py SCENARIO_DIR OUTPUT_DIR [--size WxH] [--workers N]")
+        return 1
+    scenario_dir, output_dir = argv[0], argv[1]
+    size = DEFAULT_SIZE
+    if "--size" in argv:
+        size = tuple(int(v) for v in argv[argv.index("--size") + 1].lower().split("x"))
+    workers = int(argv[argv.index("--workers") + 1]) if "--workers" in argv else None
+
+    scenarios = [p for p in sorted(glob.glob(os.path.join(scenario_dir, "*.csv"))) if is_network_csv(p)]
+    if not scenarios:
+        print(f"Error: No optimized network CSVs found in {scenario_dir}")
+        return 1
+
+    started = time.perf_counter()
+    renderer = AtlasRenderer(size, workers)
+    saved = renderer.render_scenarios(scenarios, output_dir)
+    elapsed = time.perf_counter() - started
+    print(f"{len(saved)} of {len(scenarios)} scenario maps written to {output_dir} in {elapsed:.1f} s "
+          f"({renderer.base_renders} base render(s), {renderer.workers} parallel jobs)")
+    return 0 if len(saved) == len(scenarios) else 1
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    status = main(sys.argv[1:])
+
+    qgs.exitQgis()
+    sys.exit(status)
@@ -0,0 +1,385 @@
+"""
+Simulated-annealing optimizer for the Camiguin network.
+
+Instead of optimize()'s one-shot tier heuristic followed by coverage patching,
+this local search toggles candidate sites on/off, swaps an active site for an
+inactive neighbour and retunes channels, jointly scoring
+
+    coverage %      - weighted share of hex cells inside an active site's radius
+    handover level  - share of active towers with at least one overlapping neighbour
+                      (same rule as get_level_of_handover)
+    interference    - co-channel penalty ((thresh - d) / thresh) / 2 per tower
+                      (same rule as get_interference_levels)
+    tower count
+
+Every move is scored by delta: the state keeps per-hex-cell coverage counts,
+per-tower overlap degrees and the running metric totals, so applying (or
+undoing) a move only touches the moved site's footprint and neighbours.
+
+Retuning is deliberately modelled as an interference-only move: each site keeps
+the radius of its layer "Coverage" field on every channel, so its footprint and
+overlaps are fixed and the delta scoring stays cheap. The simulator's
+FrequencyReplanner instead scales a retuned tower's radius with the channel's
+nominal reach, so the reach of an annealed plan differs slightly from that
+of the same plan retuned in the simulator.
+
+Several independent chains run in separate processes and share a best-so-far
+energy and state; a chain that falls too far behind restarts from it.
+"""
+import os
+import sys
+import math
+import random
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Constrained Vertex Cover Problem"))
+from coverage_kernels import (
+    CANDIDATE_SITES_PATH, HEX_CELLS_PATH, GridIndex, coverage_pairs, coverage_bitsets,
+    service_weights, load_candidate_sites, load_hex_cells, write_network_csv
+)
+from max_coverage_selector import lazy_greedy_max_coverage
+
+# Same channel pools, reuse distances and handover margin as Camiguin_Cellular_Network_Optimizer.py
+frequencies = {
+    "3G": [950, 925, 900, 875, 850, 825],
+    "4G": [2100, 2050, 2000, 1950, 1900, 1850]
+}
+
+interference_threshold = {
+    "3G": 10500,
+    "4G": 2000
+}
+
+HANDOVER_MARGIN = 0.10
+
+# Energy = sum of weighted penalties (lower is better).
+DEFAULT_ENERGY_WEIGHTS = {
+    "coverage": 1.0,      # per % of weighted coverage missing
+    "handover": 0.5,      # per % of towers without a handover neighbour
+    "interference": 0.5,  # per % interference level
+    "towers": 0.5         # per tower built
+}
+
+# -----------------------------------------------------------
+# Problem data (flattened to Python lists for the inner loop)
+# -----------------------------------------------------------
+class AnnealingProblem:
+    def __init__(self, sites, cells, weights=None):
+        n_sites = len(sites["x"])
+        self.cell_ids = [int(c) for c in sites["cell_id"]]
+        self.lon = sites["lon"].tolist()
+        self.lat = sites["lat"].tolist()
+        self.radius = sites["radius"].tolist()
+        self.tech = [str(t) for t in sites["tech"]]
+        self.channels = [frequencies.get(t, frequencies["3G"]) for t in self.tech]
+
+        point_weights = service_weights(cells["service_level"], weights)
+        self.weights = point_weights.tolist()
+        self.total_weight = float(point_weights.sum()) or 1.0
+
+        index = GridIndex(cells["x"], cells["y"], 1000.0)
+        rows, cols = coverage_pairs(sites["x"], sites["y"], sites["radius"], index)
+        self.covers = [[] for _ in range(n_sites)]
+        for s, j in zip(rows.tolist(), cols.tolist()):
+            self.covers[s].append(j)
+        self.n_points = len(self.weights)
+        self.site_bits = coverage_bitsets(sites["x"], sites["y"], sites["radius"], index)
+
+        # Overlap (handover) and same-tech interference neighbours.
+        x, y, radius = sites["x"], sites["y"], sites["radius"]
+        site_index = GridIndex(x, y, max(float(radius.max()) if n_sites else 1.0, 1.0))
+        reach = max(float(radius.max()) * 2.0 if n_sites else 0.0, max(interference_threshold.values()))
+        self.overlaps = [[] for _ in range(n_sites)]
+        self.interferers = [[] for _ in range(n_sites)]
+        for s in range(n_sites):
+            near = site_index.query_disc(x[s], y[s], reach)
+            near = near[near != s]
+            d = np.hypot(x[near] - x[s], y[near] - y[s])
+            total = radius[s] + radius[near]
+            self.overlaps[s] = near[d < total - total * HANDOVER_MARGIN].tolist()
+            thresh = interference_threshold.get(self.tech[s], 0)
+            same = np.array([self.tech[t] == self.tech[s] for t in near.tolist()], dtype=bool)
+            close = same & (d < thresh)
+            if thresh:
+                self.interferers[s] = list(zip(near[close].tolist(), (((thresh - d[close]) / thresh) / 2).tolist()))
+
+# -----------------------------------------------------------
+# Incrementally maintained state
+# -----------------------------------------------------------
+class NetworkState:
+    def __init__(self, problem, active, channel, energy_weights=None):
+        self.problem = problem
+        self.energy_weights = energy_weights or DEFAULT_ENERGY_WEIGHTS
+        n_sites = len(problem.covers)
+        self.active = [False] * n_sites
+        self.channel = list(channel)
+        self.count = [0] * problem.n_points     # active sites covering each hex cell
+        self.degree = [0] * n_sites             # active overlap neighbours of each active site
+        self.towers = 0
+        self.covered_weight = 0.0
+        self.covered_points = 0
+        self.handover_towers = 0
+        self.interference = 0.0
+        for s in range(n_sites):
+            if active[s]:
+                self.toggle(s)
+
+    def toggle(self, s):
+        """Switches site s on or off, updating every running total by delta."""
+        p = self.problem
+        count = self.count
+        degree = self.degree
+        active = self.active
+        channel = self.channel[s]
+        if active[s]:
+            active[s] = False
+            self.towers -= 1
+            for j in p.covers[s]:
+                count[j] -= 1
+                if count[j] == 0:
+                    self.covered_weight -= p.weights[j]
+                    self.covered_points -= 1
+            if degree[s] > 0:
+                self.handover_towers -= 1
+            for t in p.overlaps[s]:
+                if active[t]:
+                    degree[t] -= 1
+                    if degree[t] == 0:
+                        self.handover_towers -= 1
+            for t, penalty in p.interferers[s]:
+                if active[t] and self.channel[t] == channel:
+                    self.interference -= 2 * penalty
+        else:
+            active[s] = True
+            self.towers += 1
+            for j in p.covers[s]:
+                if count[j] == 0:
+                    self.covered_weight += p.weights[j]
+                    self.covered_points += 1
+                count[j] += 1
+            degree[s] = 0
+            for t in p.overlaps[s]:
+                if active[t]:
+                    degree[s] += 1
+                    if degree[t] == 0:
+                        self.handover_towers += 1
+                    degree[t] += 1
+            if degree[s] > 0:
+                self.handover_towers += 1
+            for t, penalty in p.interferers[s]:
+                if active[t] and self.channel[t] == channel:
+                    self.interference += 2 * penalty
+
+    def retune(self, s, new_channel):
+        """Moves site s to another channel; returns the old one so the move can be undone."""
+        old_channel = self.channel[s]
+        if self.active[s] and new_channel != old_channel:
+            for t, penalty in self.problem.interferers[s]:
+                if self.active[t]:
+                    if self.channel[t] == old_channel:
+                        self.interference -= 2 * penalty
+                    elif self.channel[t] == new_channel:
+                        self.interference += 2 * penalty
+        self.channel[s] = new_channel
+        return old_channel
+
+    def metrics(self):
+        towers = self.towers
+        return {
+            "coverage": 100.0 * self.covered_weight / self.problem.total_weight,
+            "coverage_points": 100.0 * self.covered_points / self.problem.n_points if self.problem.n_points else 0.0,
+            "handover": 100.0 * self.handover_towers / towers if towers else 0.0,
+            "interference": 100.0 * self.interference / towers if towers else 0.0,
+            "towers": towers
+        }
+
+    def energy(self):
+        w = self.energy_weights
+        towers = self.towers
+        coverage = 100.0 * self.covered_weight / self.problem.total_weight
+        handover = 100.0 * self.handover_towers / towers if towers else 0.0
+        interference = 100.0 * self.interference / towers if towers else 0.0
+        return (w["coverage"] * (100.0 - coverage) + w["handover"] * (100.0 - handover)
+                + w["interference"] * interference + w["towers"] * towers)
+
+# -----------------------------------------------------------
+# Annealing chain (runs in a worker process)
+# -----------------------------------------------------------
+_worker = {}
+
+def _init_worker(problem, start_active, start_channel, shared_energy, shared_active, shared_channel, lock, settings):
+    _worker.update(
+        problem=problem, start_active=start_active, start_channel=start_channel,
+        shared_energy=shared_energy, shared_active=shared_active, shared_channel=shared_channel,
+        lock=lock, settings=settings
+    )
+
+def _publish(state, energy):
+    with _worker["lock"]:
+        if energy < _worker["shared_energy"].value:
+            _worker["shared_energy"].value = energy
+            _worker["shared_active"][:] = [1 if a else 0 for a in state.active]
+            _worker["shared_channel"][:] = state.channel
+
+def _adopt_shared():
+    with _worker["lock"]:
+        return _worker["shared_energy"].value, list(_worker["shared_active"]), list(_worker["shared_channel"])
+
+def _chain(seed):
+    problem = _worker["problem"]
+    settings = _worker["settings"]
+    rng = random.Random(seed)
+    n_sites = len(problem.covers)
+
+    state = NetworkState(problem, _worker["start_active"], _worker["start_channel"], settings["energy_weights"])
+    energy = state.energy()
+    best_energy = energy
+    best_active, best_channel = list(state.active), list(state.channel)
+
+    iterations = settings["iterations"]
+    t_start, t_end = settings["t_start"], settings["t_end"]
+    accepted = 0
+    for it in range(iterations):
+        temperature = t_start * (t_end / t_start) ** (it / iterations)
+        roll = rng.random()
+        s = rng.randrange(n_sites)
+
+        if roll < 0.4:
+            state.toggle(s)
+            undo = ("toggle", s, None)
+        elif roll < 0.7:
+            # Swap an active site for an inactive overlap neighbour.
+            if not state.active[s]:
+                state.toggle(s)
+                undo = ("toggle", s, None)
+            else:
+                idle = [t for t in problem.overlaps[s] if not state.active[t]]
+                t = rng.choice(idle) if idle else rng.randrange(n_sites)
+                if state.active[t]:
+                    continue
+                state.toggle(s)
+                state.toggle(t)
+                undo = ("swap", s, t)
+        else:
+            if not state.active[s]:
+                continue
+            new_channel = rng.choice(problem.channels[s])
+            if new_channel == state.channel[s]:
+                continue
+            undo = ("retune", s, state.retune(s, new_channel))
+
+        new_energy = state.energy()
+        delta = new_energy - energy
+        if delta <= 0.0 or rng.random() < math.exp(-delta / temperature):
+            energy = new_energy
+            accepted += 1
+            if energy < best_energy - 1e-9:
+                best_energy = energy
+                best_active, best_channel = list(state.active), list(state.channel)
+        else:
+            kind, a, b = undo
+            if kind == "toggle":
+                state.toggle(a)
+            elif kind == "swap":
+                state.toggle(b)
+                state.toggle(a)
+            else:
+                state.retune(a, b)
+
+        if (it + 1) % settings["sync_interval"] == 0:
+            best_state = NetworkState(problem, best_active, best_channel, settings["energy_weights"])
+            _publish(best_state, best_energy)
+            shared_energy, shared_active, shared_channel = _adopt_shared()
+            if energy > shared_energy + settings["restart_margin"]:
+                state = NetworkState(problem, shared_active, shared_channel, settings["energy_weights"])
+                energy = state.energy()
+
+    best_state = NetworkState(problem, best_active, best_channel, settings["energy_weights"])
+    _publish(best_state, best_energy)
+    return seed, best_energy, best_active, best_channel, accepted / max(iterations, 1)
+
+# -----------------------------------------------------------
+# Driver
+# -----------------------------------------------------------
+def greedy_start(problem):
+    """Warm start: the lazy greedy cover, each site on the first channel of its pool."""
+    selection = lazy_greedy_max_coverage(problem.site_bits, np.array(problem.weights))
+    active = [False] * len(problem.covers)
+    for s in selection.sites:
+        active[s] = True
+    channel = [problem.channels[s][0] for s in range(len(problem.covers))]
+    return active, channel
+
+def anneal(problem, chains=None, iterations=200000, t_start=5.0, t_end=0.01, seed=42,
+           energy_weights=None, sync_interval=5000, restart_margin=10.0, start=None):
+    """Runs `chains` independent annealing chains in a process pool; returns the best NetworkState."""
+    chains = chains or max(os.cpu_count() or 1, 1)
+    start_active, start_channel = start or greedy_start(problem)
+    settings = {
+        "iterations": iterations, "t_start": t_start, "t_end": t_end,
+        "energy_weights": energy_weights or DEFAULT_ENERGY_WEIGHTS,
+        "sync_interval": sync_interval, "restart_margin": restart_margin
+    }
+
+    ctx = multiprocessing.get_context("spawn")
+    start_state = NetworkState(problem, start_active, start_channel, settings["energy_weights"])
+    shared_energy = ctx.Value("d", start_state.energy(), lock=False)
+    shared_active = ctx.Array("b", [1 if a else 0 for a in start_active], lock=False)
+    shared_channel = ctx.Array("i", [int(c) for c in start_channel], lock=False)
+    lock = ctx.Lock()
+
+    print(f"Starting {chains} chains x {iterations} moves from {start_state.towers} towers (energy {start_state.energy():.2f})")
+    with ctx.Pool(chains, initializer=_init_worker,
+                  initargs=(problem, start_active, start_channel, shared_energy, shared_active, shared_channel, lock, settings)) as pool:
+        results = pool.map(_chain, [seed + i for i in range(chains)])
+
+    for chain_seed, energy, _, _, acceptance in results:
+        print(f"Chain {chain_seed}: best energy {energy:.2f}, acceptance {acceptance:.1%}")
+
+    best = min(results, key=lambda r: r[1])
+    if shared_energy.value < best[1]:
+        return NetworkState(problem, [bool(a) for a in shared_active], list(shared_channel), settings["energy_weights"])
+    return NetworkState(problem, best[2], best[3], settings["energy_weights"])
+
+def write_network(path, problem, state):
+    """Saves the active sites as write_network_csv rows, with overlaps restricted to active sites."""
+    rows = [
+        (problem.cell_ids[s], problem.lon[s], problem.lat[s], problem.radius[s], problem.tech[s], state.channel[s],
+         [problem.cell_ids[t] for t in problem.overlaps[s] if state.active[t]])
+        for s, on in enumerate(state.active) if on
+    ]
+    write_network_csv(path, rows)
+    print(f"Optimized network written to {path}")
+
+def main(chains=None, iterations=200000):
+    from qgis.core import QgsVectorLayer
+
+    sites_layer = QgsVectorLayer(CANDIDATE_SITES_PATH, "Candidate Cell Sites", "ogr")
+    cells_layer = QgsVectorLayer(HEX_CELLS_PATH, "Hexagonal Cells", "ogr")
+    if not sites_layer.isValid() or not cells_layer.isValid():
+        print("Error: candidate sites or hexagonal cells layer failed to load!")
+        return
+
+    problem = AnnealingProblem(load_candidate_sites(sites_layer), load_hex_cells(cells_layer))
+    state = anneal(problem, chains=chains, iterations=iterations)
+
+    m = state.metrics()
+    print(f"\nTowers: {m['towers']}")
+    print(f"Coverage Level: {m['coverage_points']:.2f}% (weighted {m['coverage']:.2f}%)")
+    print(f"Handover Level: {m['handover']:.2f}%")
+    print(f"Interference Level: {m['interference']:.2f}%")
+    write_network("sa_optimized_network.csv", problem, state)
+
+
+if __name__ == "__main__":
+    from qgis.core import QgsApplication
+
+    qgs = QgsApplication([], False)
+    qgs.setPrefixPath(r"C:\Program Files\QGIS 3.34.12\apps\qgis-ltr", True)
+    qgs.initQgis()
+
+    main()
+
+    qgs.exitQgis()
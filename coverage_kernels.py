@@ -0,0 +1,679 @@
+"""
+Array kernels shared by the offline planning scripts.
+
+Everything here works on plain NumPy arrays in a local metric frame centred on
+Camiguin, so the analysis scripts can run without a QgsDistanceArea call per
+pair of points. The QGIS-specific loaders at the bottom turn the project layers
+into those arrays.
+"""
+import os
+import csv
+import math
+import numpy as np
+
+# Root of the "Maps and Other Geospatial Data" folder; override with CAM_DATA.
+DATA_ROOT = os.environ.get(
+    "CAM_DATA",
+    r"C:\Users\Ramcie Labadan\Documents\THESIS\Maps and Other Geospatial Data"
+)
+
+CANDIDATE_SITES_PATH = os.path.join(DATA_ROOT, "Final Candidate Cell Sites", "v3", "final_candidate_cell_sites.shp")
+HEX_CELLS_PATH = os.path.join(DATA_ROOT, "Population Cell Density Analysis", "Popn Density Cells.shp")
+BARANGAYS_PATH = os.path.join(DATA_ROOT, "Administrative Barangays", "administrative_barangays.shp")
+ROADS_PATH = os.path.join(DATA_ROOT, "Road Network by Cell", "road_network.shp")
+BASE_RASTER_PATH = os.path.join(DATA_ROOT, "Camiguin Raster Base Maps", "Camiguin_fin1.tif")
+BUILDINGS_PATH = os.path.join(DATA_ROOT, "Point Buildings within the Study Area", "Point Buildings.shp")
+ALL_BUILDINGS_PATH = os.path.join(DATA_ROOT, "Camiguin Buildings", "buildings.shp")
+
+# Centre of the island (same as the normative graph tool's initial view).
+CAMIGUIN_ORIGIN = (124.7408, 9.1726)
+EARTH_RADIUS = 6371008.8  # meters, mean radius
+
+# Relative value of covering a demand point of each service level.
+SERVICE_LEVEL_WEIGHTS = {
+    "Critical": 16.0,
+    "Priority": 8.0,
+    "Enhanced": 4.0,
+    "Basic": 2.0,
+    "Trivial": 1.0
+}
+
+# -----------------------------------------------------------
+# Coordinates
+# -----------------------------------------------------------
+def project_to_local(lon, lat, origin=CAMIGUIN_ORIGIN):
+    """
+    Equirectangular projection of lon/lat degrees to meters east/north of
+    `origin`. Over an island ~30 km across the error is well under 0.1%.
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon0, lat0 = origin
+    x = np.radians(lon - lon0) * EARTH_RADIUS * math.cos(math.radians(lat0))
+    y = np.radians(lat - lat0) * EARTH_RADIUS
+    return x, y
+
+def local_to_lonlat(x, y, origin=CAMIGUIN_ORIGIN):
+    lon0, lat0 = origin
+    lon = lon0 + np.degrees(np.asarray(x, dtype=np.float64) / (EARTH_RADIUS * math.cos(math.radians(lat0))))
+    lat = lat0 + np.degrees(np.asarray(y, dtype=np.float64) / EARTH_RADIUS)
+    return lon, lat
+
+# -----------------------------------------------------------
+# Uniform grid index
+# -----------------------------------------------------------
+class GridIndex:
+    """
+    Bins points on a uniform grid and stores them bin-sorted (CSR style), so the
+    points of one row of bins are a single contiguous slice of `order`.
+    """
+    def __init__(self, x, y, cell_size):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.size = len(self.x)
+        self.cell_size = float(cell_size)
+        if self.size == 0:
+            self.x0 = self.y0 = 0.0
+            self.nx = self.ny = 1
+            self.order = np.zeros(0, dtype=np.int64)
+            self.starts = np.zeros(2, dtype=np.int64)
+            return
+        self.x0 = self.x.min()
+        self.y0 = self.y.min()
+        bx = ((self.x - self.x0) // self.cell_size).astype(np.int64)
+        by = ((self.y - self.y0) // self.cell_size).astype(np.int64)
+        self.nx = int(bx.max()) + 1
+        self.ny = int(by.max()) + 1
+        keys = by * self.nx + bx
+        self.order = np.argsort(keys, kind="stable")
+        self.starts = np.searchsorted(keys[self.order], np.arange(self.nx * self.ny + 1))
+
+    def bin_of(self, x, y):
+        """Bin column/row of the given coordinates (may fall outside the grid)."""
+        bx = np.floor((np.asarray(x) - self.x0) / self.cell_size).astype(np.int64)
+        by = np.floor((np.asarray(y) - self.y0) / self.cell_size).astype(np.int64)
+        return bx, by
+
+    def query_box(self, xmin, ymin, xmax, ymax):
+        """Indices of the points in every bin touching the box (a superset of the box)."""
+        ix0 = max(int(math.floor((xmin - self.x0) / self.cell_size)), 0)
+        iy0 = max(int(math.floor((ymin - self.y0) / self.cell_size)), 0)
+        ix1 = min(int(math.floor((xmax - self.x0) / self.cell_size)), self.nx - 1)
+        iy1 = min(int(math.floor((ymax - self.y0) / self.cell_size)), self.ny - 1)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.zeros(0, dtype=np.int64)
+        pieces = [
+            self.order[self.starts[row * self.nx + ix0]:self.starts[row * self.nx + ix1 + 1]]
+            for row in range(iy0, iy1 + 1)
+        ]
+        return np.concatenate(pieces)
+
+    def query_disc(self, cx, cy, radius):
+        """Indices of the points within `radius` meters of (cx, cy)."""
+        idx = self.query_box(cx - radius, cy - radius, cx + radius, cy + radius)
+        dx = self.x[idx] - cx
+        dy = self.y[idx] - cy
+        return idx[dx * dx + dy * dy <= radius * radius]
+
+def densify_polyline(x, y, step):
+    """
+    Points every `step` meters along a polyline given by vertex arrays x, y
+    (local meters), always including both ends. Returns (xs, ys, length).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) < 2:
+        return x.copy(), y.copy(), 0.0
+    chainage = np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))])
+    length = float(chainage[-1])
+    stations = np.append(np.arange(0.0, length, step), length)
+    return np.interp(stations, chainage, x), np.interp(stations, chainage, y), length
+
+# -----------------------------------------------------------
+# Packed coverage bitsets
+# -----------------------------------------------------------
+# Bits are packed big-endian within a byte, like np.packbits/np.unpackbits.
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def popcount(bits, axis=-1):
+    """Number of set bits of a packed uint8 array along `axis`."""
+    return _POPCOUNT8[bits].sum(axis=axis, dtype=np.int64)
+
+def pack_mask(mask):
+    """Packs a boolean vector over the demand points into a bitset row."""
+    return np.packbits(np.asarray(mask, dtype=bool))
+
+def unpack_bits(bits, size):
+    return np.unpackbits(bits, axis=-1, count=size).astype(bool)
+
+def coverage_pairs(site_x, site_y, radii, index):
+    """
+    (site, point) index pairs for every demand point of `index` that lies within
+    a site's coverage radius.
+    """
+    rows = []
+    cols = []
+    for s in range(len(site_x)):
+        idx = index.query_disc(site_x[s], site_y[s], radii[s])
+        rows.append(np.full(len(idx), s, dtype=np.int64))
+        cols.append(idx)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(rows), np.concatenate(cols)
+
+def coverage_bitsets(site_x, site_y, radii, index):
+    """
+    One packed bitset per site over the demand points held by `index`:
+    bit j of row s is set when point j is within radii[s] of site s.
+    """
+    n_bytes = (index.size + 7) // 8
+    bits = np.zeros((len(site_x), n_bytes), dtype=np.uint8)
+    rows, cols = coverage_pairs(site_x, site_y, radii, index)
+    np.bitwise_or.at(bits, (rows, cols >> 3), (0x80 >> (cols & 7)).astype(np.uint8))
+    return bits
+
+def level_masks(service_levels, levels=None):
+    """Packed bitset of the demand points of each service level."""
+    service_levels = np.asarray(service_levels)
+    if levels is None:
+        levels = [level for level in SERVICE_LEVEL_WEIGHTS if np.any(service_levels == level)]
+    return {level: pack_mask(service_levels == level) for level in levels}
+
+def service_weights(service_levels, weights=None):
+    """Per-point weight looked up from the point's service level (0 for unknown levels)."""
+    weights = SERVICE_LEVEL_WEIGHTS if weights is None else weights
+    return np.array([float(weights.get(level, 0.0)) for level in service_levels], dtype=np.float64)
+
+def weight_table(point_weights):
+    """
+    (n_bytes, 256) lookup table: entry [j, b] is the total weight of the points
+    whose bits are set in value b at byte position j of a packed bitset. With it
+    the weighted count of a bitset is one gather and one sum.
+    """
+    point_weights = np.asarray(point_weights, dtype=np.float64)
+    n_bytes = (len(point_weights) + 7) // 8
+    padded = np.zeros(n_bytes * 8, dtype=np.float64)
+    padded[:len(point_weights)] = point_weights
+    bit_of_value = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float64)
+    return padded.reshape(n_bytes, 8) @ bit_of_value.T
+
+def weighted_count(bits, table):
+    """Total point weight of the set bits of `bits` (one row, or one result per row)."""
+    return table[np.arange(table.shape[0]), bits].sum(axis=-1)
+
+def coverage_multiplicity(rows, cols, n_points):
+    """k-coverage: number of sites covering each demand point, from coverage_pairs() output."""
+    return np.bincount(cols, minlength=n_points)
+
+def sole_coverage(rows, cols, n_sites, point_weights):
+    """
+    Weight each site covers on its own (points whose multiplicity is 1), i.e.
+    the coverage lost if that site alone went down, for every site in one pass.
+    """
+    point_weights = np.asarray(point_weights, dtype=np.float64)
+    counts = coverage_multiplicity(rows, cols, len(point_weights))
+    sole = counts[cols] == 1
+    return np.bincount(rows[sole], weights=point_weights[cols[sole]], minlength=n_sites)
+
+# -----------------------------------------------------------
+# Traffic
+# -----------------------------------------------------------
+def erlang_b(traffic, channels):
+    """
+    Erlang-B blocking probability for each (offered traffic in Erlangs, number
+    of channels) pair, by the stable recursion B(m) = E B(m-1) / (m + E B(m-1)),
+    run once for all towers up to the largest channel count.
+    """
+    traffic = np.asarray(traffic, dtype=np.float64)
+    channels = np.asarray(channels, dtype=np.int64)
+    blocking = np.ones_like(traffic)
+    result = np.ones_like(traffic)
+    for m in range(1, int(channels.max(initial=0)) + 1):
+        blocking = traffic * blocking / (m + traffic * blocking)
+        result = np.where(channels == m, blocking, result)
+    return np.where(channels <= 0, 1.0, result)
+
+def erlang_b_channels(traffic, target, max_channels=1000):
+    """
+    Smallest number of channels keeping Erlang-B blocking at or below `target`,
+    per traffic value; max_channels + 1 where even max_channels is not enough.
+    """
+    traffic = np.asarray(traffic, dtype=np.float64)
+    blocking = np.ones_like(traffic)
+    needed = np.where(traffic <= 0.0, 0, -1).astype(np.int64)
+    for m in range(1, max_channels + 1):
+        blocking = traffic * blocking / (m + traffic * blocking)
+        needed = np.where((needed < 0) & (blocking <= target), m, needed)
+        if (needed >= 0).all():
+            break
+    return np.where(needed < 0, max_channels + 1, needed)
+
+# -----------------------------------------------------------
+# Propagation
+# -----------------------------------------------------------
+# (Pt dBm, Gt dBi, Gr dBi, Lo dB, receiver sensitivity dBm) of get_coverage_distance
+LINK_BUDGETS = {
+    "3G": (30, 10, 0, 20, -105),
+    "4G": (40, 10, 0, 15, -100)
+}
+
+def coverage_distances(frequencies, techs, hb=200, hm=1.5, pt=None):
+    """
+    Vectorized get_coverage_distance of the optimizer (meters): Okumura-Hata for
+    3G, COST-231 Hata for 4G. hb and pt (transmit power, dBm; defaults to the
+    tech's link budget) broadcast against the frequencies.
+    """
+    f = np.asarray(frequencies, dtype=np.float64)
+    is_4g = np.asarray(techs, dtype=object) == "4G"
+    budget = np.array([LINK_BUDGETS["3G"], LINK_BUDGETS["4G"]], dtype=np.float64)[is_4g.astype(np.int64)]
+    Pt = budget[..., 0] if pt is None else np.asarray(pt, dtype=np.float64)
+    L_threshold = Pt + budget[..., 1] + budget[..., 2] - budget[..., 3] - budget[..., 4]
+
+    log_f = np.log10(f)
+    log_hb = np.log10(np.asarray(hb, dtype=np.float64))
+    hata_a_hm = (1.1 * log_f - 0.7) * hm - (1.56 * log_f - 0.8)
+    hata = L_threshold - (69.55 + 26.16 * log_f) + 13.82 * log_hb + hata_a_hm + 2 * np.log10(f / 28) + 5.4
+    cost_a_hm = 1.1 * (log_f - 0.7) * hm - (1.56 * log_f - 0.8)
+    cost231 = L_threshold - 46.3 - 33.9 * log_f + 13.82 * log_hb + cost_a_hm
+    return 1000.0 * 10 ** (np.where(is_4g, cost231, hata) / (44.9 - 6.55 * log_hb))
+
+# -----------------------------------------------------------
+# Graph helpers
+# -----------------------------------------------------------
+def overlap_graph(x, y, radii, margin=0.10):
+    """
+    Adjacency lists of the sites whose coverage discs overlap by more than
+    `margin` of the summed radii (the handover rule of the optimizer).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    radii = np.asarray(radii, dtype=np.float64)
+    n = len(x)
+    adjacency = [[] for _ in range(n)]
+    if n == 0:
+        return adjacency
+    index = GridIndex(x, y, max(float(radii.max()), 1.0))
+    reach = 2.0 * float(radii.max())
+    for s in range(n):
+        near = index.query_disc(x[s], y[s], reach)
+        near = near[near != s]
+        total = radii[s] + radii[near]
+        d = np.hypot(x[near] - x[s], y[near] - y[s])
+        adjacency[s] = near[d < total * (1.0 - margin)].tolist()
+    return adjacency
+
+def articulation_points(adjacency):
+    """
+    Iterative Tarjan over adjacency lists. Returns, per vertex, how many extra
+    connected components its removal creates (0 for non-articulation vertices,
+    -1 for isolated vertices, whose removal deletes a component).
+    """
+    n = len(adjacency)
+    disc = [-1] * n
+    low = [0] * n
+    splits = [0] * n
+    timer = 0
+    for root in range(n):
+        if disc[root] != -1:
+            continue
+        if not adjacency[root]:
+            disc[root] = timer
+            timer += 1
+            splits[root] = -1
+            continue
+        disc[root] = low[root] = timer
+        timer += 1
+        root_children = 0
+        stack = [(root, -1, iter(adjacency[root]))]
+        while stack:
+            v, parent, neighbours = stack[-1]
+            advanced = False
+            for w in neighbours:
+                if disc[w] == -1:
+                    disc[w] = low[w] = timer
+                    timer += 1
+                    stack.append((w, v, iter(adjacency[w])))
+                    advanced = True
+                    break
+                if w != parent:
+                    low[v] = min(low[v], disc[w])
+            if advanced:
+                continue
+            stack.pop()
+            if parent == -1:
+                continue
+            low[parent] = min(low[parent], low[v])
+            if parent == root:
+                root_children += 1
+            elif low[v] >= disc[parent]:
+                splits[parent] += 1
+        splits[root] = root_children - 1
+    return splits
+
+# -----------------------------------------------------------
+# Sectorized sites
+# -----------------------------------------------------------
+SECTOR_AZIMUTHS = (0.0, 120.0, 240.0)  # degrees clockwise from north
+SECTOR_BEAMWIDTH = 65.0                # half-power beamwidth, degrees
+FRONT_TO_BACK = 25.0                   # dB, largest pattern attenuation
+
+def bearing_deg(x0, y0, x1, y1):
+    """Bearing from (x0, y0) to (x1, y1), degrees clockwise from north."""
+    return np.degrees(np.arctan2(np.asarray(x1) - x0, np.asarray(y1) - y0)) % 360.0
+
+def antenna_gain_db(bearing, azimuth, beamwidth=SECTOR_BEAMWIDTH, front_to_back=FRONT_TO_BACK):
+    """Gain relative to boresight (dB, <= 0) of a sector antenna towards `bearing` (3GPP parabolic pattern)."""
+    off = (np.asarray(bearing, dtype=np.float64) - azimuth + 180.0) % 360.0 - 180.0
+    return -np.minimum(12.0 * (off / beamwidth) ** 2, front_to_back)
+
+def distance_slope(hb=200):
+    """dB of extra path loss per decade of distance in the Hata / COST-231 models."""
+    return 44.9 - 6.55 * np.log10(hb)
+
+class SectorLayout:
+    """
+    Sites split into sectors (one entry per azimuth), stored as flat arrays with
+    sector s belonging to site s // n_sectors. A sector reaches `radius` (the
+    omni coverage radius) along boresight and less off-axis: the pattern
+    attenuation comes off the link budget, so the reach shrinks by
+    10 ** (gain_db / slope).
+
+    Site pairs are found through a GridIndex, so building the handover and
+    interference graphs costs O(sectors x neighbours) rather than O(sectors^2).
+    """
+    def __init__(self, x, y, radii, techs, frequencies, azimuths=SECTOR_AZIMUTHS,
+                 beamwidth=SECTOR_BEAMWIDTH, front_to_back=FRONT_TO_BACK, hb=200):
+        self.site_x = np.asarray(x, dtype=np.float64)
+        self.site_y = np.asarray(y, dtype=np.float64)
+        self.n_sites = len(self.site_x)
+        self.n_sectors = len(azimuths)
+        self.beamwidth = beamwidth
+        self.front_to_back = front_to_back
+        self.slope = float(distance_slope(hb))
+
+        self.site = np.repeat(np.arange(self.n_sites), self.n_sectors)
+        self.x = self.site_x[self.site]
+        self.y = self.site_y[self.site]
+        self.azimuth = np.tile(np.asarray(azimuths, dtype=np.float64), self.n_sites)
+        self.radius = np.asarray(radii, dtype=np.float64)[self.site]
+        self.tech = np.asarray(techs, dtype=object)[self.site]
+        self.frequency = np.asarray(frequencies, dtype=np.float64)[self.site].copy()
+        self.site_index = GridIndex(self.site_x, self.site_y, max(float(np.max(radii, initial=1.0)), 1.0))
+
+    def __len__(self):
+        return len(self.site)
+
+    def gain(self, sectors, bearing):
+        return antenna_gain_db(bearing, self.azimuth[sectors], self.beamwidth, self.front_to_back)
+
+    def reach(self, sectors, bearing):
+        """Coverage distance of each sector in the direction `bearing`."""
+        return self.radius[sectors] * 10 ** (self.gain(sectors, bearing) / self.slope)
+
+    def facing(self, sites, bearing):
+        """Sector of each site whose boresight is closest to `bearing`."""
+        step = 360.0 / self.n_sectors
+        first = self.azimuth[np.asarray(sites) * self.n_sectors]
+        offset = np.round(((np.asarray(bearing) - first) % 360.0) / step).astype(np.int64) % self.n_sectors
+        return np.asarray(sites) * self.n_sectors + offset
+
+    def coverage_pairs(self, index):
+        """(sector, point) pairs for the demand points of `index` inside each sector's pattern footprint."""
+        rows, cols = [], []
+        for s in range(len(self.site)):
+            near = index.query_disc(self.x[s], self.y[s], self.radius[s])
+            d = np.hypot(index.x[near] - self.x[s], index.y[near] - self.y[s])
+            inside = d <= self.reach(s, bearing_deg(self.x[s], self.y[s], index.x[near], index.y[near]))
+            rows.append(np.full(int(inside.sum()), s, dtype=np.int64))
+            cols.append(near[inside])
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(rows), np.concatenate(cols)
+
+    def _site_pairs(self, reach):
+        """(a, b, distance) for the site pairs a < b within reach[a] of each other."""
+        a_list, b_list = [], []
+        for a in range(self.n_sites):
+            near = self.site_index.query_disc(self.site_x[a], self.site_y[a], reach[a])
+            near = near[near > a]
+            a_list.append(np.full(len(near), a, dtype=np.int64))
+            b_list.append(near)
+        if not a_list:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+        a = np.concatenate(a_list)
+        b = np.concatenate(b_list)
+        return a, b, np.hypot(self.site_x[b] - self.site_x[a], self.site_y[b] - self.site_y[a])
+
+    def handover_pairs(self, margin=0.10):
+        """
+        Sector handover adjacency as (i, j) arrays: the sectors of two sites that
+        face each other, when their reaches along the joining line overlap by more
+        than `margin` (the optimizer's rule), plus softer handover between the
+        sectors of the same site.
+        """
+        site_radius = self.radius[::self.n_sectors] if self.n_sectors else np.zeros(0)
+        a, b, d = self._site_pairs(2.0 * np.full(self.n_sites, site_radius.max(initial=0.0)))
+        ab = bearing_deg(self.site_x[a], self.site_y[a], self.site_x[b], self.site_y[b])
+        ba = (ab + 180.0) % 360.0
+        i = self.facing(a, ab)
+        j = self.facing(b, ba)
+        linked = d < (self.reach(i, ab) + self.reach(j, ba)) * (1.0 - margin)
+
+        k = np.arange(self.n_sectors)
+        local_i, local_j = np.triu_indices(self.n_sectors, 1)
+        same_i = (np.arange(self.n_sites)[:, None] * self.n_sectors + k[local_i]).ravel()
+        same_j = (np.arange(self.n_sites)[:, None] * self.n_sectors + k[local_j]).ravel()
+        return np.concatenate([i[linked], same_i]), np.concatenate([j[linked], same_j])
+
+    def interference_pairs(self, thresholds):
+        """
+        (i, j, weight) for every same-tech sector pair whose sites are closer than
+        the tech's reuse distance. weight is the optimizer's ((thresh - d) / thresh) / 2
+        penalty scaled by the antennas' coupling 10 ** ((G_ij + G_ji) / 20); co-sited
+        sectors couple through the bearing halfway between their boresights.
+        """
+        reach = np.array([max(thresholds.values())] * self.n_sites, dtype=np.float64)
+        a, b, d = self._site_pairs(reach)
+        a = np.concatenate([a, np.arange(self.n_sites)])
+        b = np.concatenate([b, np.arange(self.n_sites)])
+        d = np.concatenate([d, np.zeros(self.n_sites)])
+
+        # every sector of a against every sector of b (distinct sectors on the same site)
+        k = self.n_sectors
+        i = (a[:, None, None] * k + np.arange(k)[None, :, None]).repeat(k, axis=2).ravel()
+        j = (b[:, None, None] * k + np.arange(k)[None, None, :]).repeat(k, axis=1).ravel()
+        dist = np.repeat(d, k * k)
+        keep = (i < j) & (self.tech[i] == self.tech[j])
+        i, j, dist = i[keep], j[keep], dist[keep]
+        thresh = np.array([thresholds.get(t, 1) for t in self.tech[i]], dtype=np.float64)
+        keep = dist < thresh
+        i, j, dist, thresh = i[keep], j[keep], dist[keep], thresh[keep]
+
+        ij = bearing_deg(self.x[i], self.y[i], self.x[j], self.y[j])
+        ji = (ij + 180.0) % 360.0
+        cosited = dist == 0.0
+        mid = (self.azimuth[i] + (((self.azimuth[j] - self.azimuth[i]) + 180.0) % 360.0 - 180.0) / 2.0) % 360.0
+        ij = np.where(cosited, mid, ij)
+        ji = np.where(cosited, mid, ji)
+        coupling = 10 ** ((self.gain(i, ij) + self.gain(j, ji)) / 20.0)
+        return i, j, ((thresh - dist) / thresh) / 2.0 * coupling
+
+    def assign_frequencies(self, pools, thresholds):
+        """
+        Greedy sector-level channel plan: sectors in order of total coupling take
+        the channel of their tech's pool with the least penalty from the sectors
+        already planned (first channel of the pool on ties). Returns the pairs used.
+        """
+        i, j, w = self.interference_pairs(thresholds)
+        n = len(self.site)
+        src = np.concatenate([i, j])
+        dst = np.concatenate([j, i])
+        weight = np.concatenate([w, w])
+        order = np.argsort(src, kind="stable")
+        src, dst, weight = src[order], dst[order], weight[order]
+        starts = np.searchsorted(src, np.arange(n + 1))
+
+        planned = np.zeros(n, dtype=bool)
+        for s in np.argsort(-np.bincount(src, weights=weight, minlength=n), kind="stable"):
+            pool = pools.get(self.tech[s], [])
+            if not pool:
+                continue
+            nbrs = dst[starts[s]:starts[s + 1]]
+            w_s = weight[starts[s]:starts[s + 1]]
+            done = planned[nbrs]
+            penalty = [float(w_s[done & (self.frequency[nbrs] == f)].sum()) for f in pool]
+            self.frequency[s] = pool[int(np.argmin(penalty))]
+            planned[s] = True
+        return i, j, w
+
+    def interference_levels(self, pairs):
+        """Per-sector sum of the co-channel penalties of the (i, j, weight) pairs."""
+        i, j, w = pairs
+        clash = self.frequency[i] == self.frequency[j]
+        n = len(self.site)
+        return (np.bincount(i[clash], weights=w[clash], minlength=n)
+                + np.bincount(j[clash], weights=w[clash], minlength=n))
+
+# -----------------------------------------------------------
+# QGIS layer loaders
+# -----------------------------------------------------------
+def _point_of(geometry):
+    if geometry.isMultipart():
+        return geometry.centroid().asPoint()
+    return geometry.asPoint()
+
+def line_parts(geometry):
+    """Vertex lon/lat lists of each part of a (multi)line geometry."""
+    if geometry is None or geometry.isEmpty():
+        return []
+    parts = geometry.asMultiPolyline() if geometry.isMultipart() else [geometry.asPolyline()]
+    return [([p.x() for p in part], [p.y() for p in part]) for part in parts if len(part) > 1]
+
+def load_candidate_sites(layer):
+    """
+    Reads a candidate cell sites layer (final_candidate_cell_sites.shp) into a
+    dict of arrays: cell_id, lon, lat, x, y, radius (m), service_level, tech,
+    frequency.
+    """
+    names = layer.fields().names()
+    cell_ids, lons, lats, radii, levels, techs, freqs = [], [], [], [], [], [], []
+    for feature in layer.getFeatures():
+        geom = feature.geometry()
+        if geom is None or geom.isEmpty():
+            continue
+        point = _point_of(geom)
+        cell_ids.append(int(feature["Cell ID"]))
+        lons.append(point.x())
+        lats.append(point.y())
+        radii.append(float(feature["Coverage"]) * 1000.0 if "Coverage" in names and feature["Coverage"] else 0.0)
+        levels.append(feature["Serv. Lev."] if "Serv. Lev." in names else None)
+        techs.append(feature["Cell Tech"] if "Cell Tech" in names else None)
+        freqs.append(float(feature["Frequency"]) if "Frequency" in names and feature["Frequency"] else 0.0)
+    x, y = project_to_local(lons, lats)
+    return {
+        "cell_id": np.array(cell_ids, dtype=np.int64),
+        "lon": np.array(lons), "lat": np.array(lats),
+        "x": x, "y": y,
+        "radius": np.array(radii),
+        "service_level": np.array(levels, dtype=object),
+        "tech": np.array(techs, dtype=object),
+        "frequency": np.array(freqs)
+    }
+
+def load_hex_cells(layer):
+    """
+    Reads the hexagonal cells layer (Popn Density Cells.shp) into a dict of
+    arrays keyed like load_candidate_sites: cell_id, lon/lat and x/y of the
+    centroid, service_level, population, barangay.
+    """
+    names = layer.fields().names()
+    cell_ids, lons, lats, levels, popn, barangays = [], [], [], [], [], []
+    for feature in layer.getFeatures():
+        geom = feature.geometry()
+        if geom is None or geom.isEmpty():
+            continue
+        point = geom.centroid().asPoint()
+        cell_ids.append(int(feature["id"]))
+        lons.append(point.x())
+        lats.append(point.y())
+        levels.append(feature["Service Le"])
+        popn.append(float(feature["Servable P"]) if "Servable P" in names and feature["Servable P"] else 0.0)
+        barangays.append(feature["Barangay"] if "Barangay" in names else None)
+    x, y = project_to_local(lons, lats)
+    return {
+        "cell_id": np.array(cell_ids, dtype=np.int64),
+        "lon": np.array(lons), "lat": np.array(lats),
+        "x": x, "y": y,
+        "service_level": np.array(levels, dtype=object),
+        "population": np.array(popn),
+        "barangay": np.array(barangays, dtype=object)
+    }
+
+def load_buildings(layer):
+    """
+    Reads a buildings layer (points, or footprints reduced to their centroid)
+    into a dict of arrays: lon/lat, x/y, cell_id (hex cell, -1 when the layer
+    has none) and barangay.
+    """
+    names = layer.fields().names()
+    lons, lats, cell_ids, barangays = [], [], [], []
+    for feature in layer.getFeatures():
+        geom = feature.geometry()
+        if geom is None or geom.isEmpty():
+            continue
+        point = geom.asPoint() if geom.type() == 0 and not geom.isMultipart() else geom.centroid().asPoint()
+        lons.append(point.x())
+        lats.append(point.y())
+        cell_ids.append(int(feature["Cell ID"]) if "Cell ID" in names and feature["Cell ID"] else -1)
+        barangays.append(feature["Barangay"] if "Barangay" in names else None)
+    x, y = project_to_local(lons, lats)
+    return {
+        "lon": np.array(lons), "lat": np.array(lats),
+        "x": x, "y": y,
+        "cell_id": np.array(cell_ids, dtype=np.int64),
+        "barangay": np.array(barangays, dtype=object)
+    }
+
+def load_barangays(layer):
+    """Reads the Administrative Barangays layer into {barangay name: population}."""
+    return {feature["Barangay_2"]: float(feature["Population"] or 0) for feature in layer.getFeatures()}
+
+# -----------------------------------------------------------
+# Saved networks
+# -----------------------------------------------------------
+NETWORK_FIELDS = ["Cell ID", "Longitude", "Latitude", "Coverage (m)", "Cell Tech", "Frequency", "Overlaps"]
+
+def write_network_csv(path, rows):
+    """
+    Saves an optimized network, one (cell_id, lon, lat, radius_m, tech,
+    frequency, overlapping cell ids) row per tower.
+    """
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(NETWORK_FIELDS)
+        for cell_id, lon, lat, radius, tech, frequency, overlaps in rows:
+            writer.writerow([cell_id, lon, lat, radius, tech, frequency, " ".join(str(o) for o in overlaps)])
+
+def load_network_csv(path):
+    """Reads a write_network_csv() file into the dict-of-arrays form of load_candidate_sites."""
+    cell_ids, lons, lats, radii, techs, freqs, overlaps = [], [], [], [], [], [], []
+    with open(path, newline="") as handle:
+        for row in csv.DictReader(handle):
+            cell_ids.append(int(row["Cell ID"]))
+            lons.append(float(row["Longitude"]))
+            lats.append(float(row["Latitude"]))
+            radii.append(float(row["Coverage (m)"]))
+            techs.append(row["Cell Tech"])
+            freqs.append(float(row["Frequency"]) if row["Frequency"] else 0.0)
+            overlaps.append([int(o) for o in row["Overlaps"].split()])
+    x, y = project_to_local(lons, lats)
+    return {
+        "cell_id": np.array(cell_ids, dtype=np.int64),
+        "lon": np.array(lons), "lat": np.array(lats),
+        "x": x, "y": y,
+        "radius": np.array(radii),
+        "tech": np.array(techs, dtype=object),
+        "frequency": np.array(freqs),
+        "overlaps": overlaps
+    }
@@ -0,0 +1,103 @@
+"""
+Level-gated logging for the simulator and the planning scripts.
+
+Each subsystem logs through its own logger under "camiguin":
+
+    log = get_logger("interference")
+    log.debug("Cell Tower no.%s is %s m from no.%s", a, d, b)   # formatted only if enabled
+
+Console levels come from CAM_LOG, either one level for everything or
+per-subsystem overrides:
+
+    CAM_LOG=INFO                               (default)
+    CAM_LOG=WARNING,interference=DEBUG         quiet, except the co-channel pairs
+
+CAM_LOG_FORMAT=structured prefixes every line with time, level and subsystem.
+
+Detailed dumps (the per-tower tables of data_printout and the adjacency list of
+print_out_optimized_network) go to the "camiguin.dump" logger. It writes nothing
+unless CAM_LOG_FILE names a file; then records are buffered in memory and
+written in blocks. Callers check dump_enabled() before building a dump, so a
+normal run does none of that work.
+"""
+import os
+import sys
+import atexit
+import logging
+import logging.handlers
+
+ROOT = "camiguin"
+SUBSYSTEMS = ("network", "coverage", "handover", "interference", "frequency", "propagation", "ui", "dump")
+PLAIN_FORMAT = "%(message)s"
+STRUCTURED_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+
+def get_logger(subsystem):
+    return logging.getLogger(f"{ROOT}.{subsystem}")
+
+
+def _parse_levels(spec):
+    """'WARNING,interference=DEBUG' -> (WARNING, {'interference': DEBUG})."""
+    default = logging.INFO
+    overrides = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, level = part.rpartition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            print(f"Error: unknown log level '{level}' in CAM_LOG")
+            continue
+        if name:
+            overrides[name.strip()] = value
+        else:
+            default = value
+    return default, overrides
+
+
+def configure(levels=None, dump_path=None, structured=None, buffer_records=2000):
+    """(Re)configures the camiguin loggers; arguments default to the CAM_LOG* environment variables."""
+    levels = os.environ.get("CAM_LOG", "") if levels is None else levels
+    dump_path = os.environ.get("CAM_LOG_FILE") if dump_path is None else dump_path
+    if structured is None:
+        structured = os.environ.get("CAM_LOG_FORMAT", "").lower() == "structured"
+
+    default, overrides = _parse_levels(levels)
+    root = logging.getLogger(ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(STRUCTURED_FORMAT if structured else PLAIN_FORMAT))
+    root.addHandler(console)
+    root.setLevel(default)
+    root.propagate = False
+    for subsystem in SUBSYSTEMS:
+        if subsystem != "dump":
+            get_logger(subsystem).setLevel(overrides.get(subsystem, logging.NOTSET))
+
+    dump = get_logger("dump")
+    for handler in list(dump.handlers):
+        handler.close()
+        dump.removeHandler(handler)
+    dump.propagate = False
+    if dump_path:
+        target = logging.FileHandler(dump_path, mode="w", delay=True)
+        target.setFormatter(logging.Formatter(PLAIN_FORMAT))
+        dump.addHandler(logging.handlers.MemoryHandler(buffer_records, flushLevel=logging.CRITICAL, target=target))
+        dump.setLevel(logging.INFO)
+    else:
+        dump.setLevel(logging.CRITICAL + 1)
+
+
+def dump_enabled():
+    return get_logger("dump").isEnabledFor(logging.INFO)
+
+
+def flush():
+    for handler in get_logger("dump").handlers:
+        handler.flush()
+
+
+configure()
+atexit.register(flush)
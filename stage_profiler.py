@@ -0,0 +1,142 @@
+"""
+Stage timers and call counters for the optimize pipeline.
+
+    with PROFILER.stage("tier selection"):
+        ...
+
+    @PROFILER.timed
+    def calculate_distance(point1, point2):
+        ...
+
+Profiling is off unless CAM_PROFILE=1; then every stage and timed function
+records calls, total/max seconds, and PROFILER.write_report() saves one JSON
+file per run that can be diffed between versions and datasets. CAM_PROFILE=cprofile
+also runs cProfile over the stages (top functions go into the report), and
+CAM_PROFILE=memory traces allocations with tracemalloc (peak and per-stage
+growth); the two can be combined as CAM_PROFILE=cprofile,memory.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import functools
+from contextlib import contextmanager
+
+
+class StageProfiler:
+    def __init__(self, mode=None):
+        mode = os.environ.get("CAM_PROFILE", "") if mode is None else mode
+        options = {m.strip().lower() for m in mode.split(",") if m.strip()}
+        self.enabled = bool(options) and options != {"0"}
+        self.use_cprofile = "cprofile" in options
+        self.use_tracemalloc = "memory" in options
+        self.reset()
+
+    def reset(self):
+        self.stages = {}       # name -> {"calls", "seconds", "max_seconds", "memory_bytes"}
+        self.functions = {}    # name -> {"calls", "seconds", "max_seconds"}
+        self.order = []        # stage names in first-run order
+        self.started = time.time()
+        self._profile = None
+
+    def _record(self, table, name, elapsed):
+        entry = table.get(name)
+        if entry is None:
+            entry = table[name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0}
+        entry["calls"] += 1
+        entry["seconds"] += elapsed
+        entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+        return entry
+
+    @contextmanager
+    def stage(self, name):
+        """Times one pipeline stage (and, when enabled, its cProfile samples and memory growth)."""
+        if not self.enabled:
+            yield
+            return
+        if name not in self.stages:
+            self.order.append(name)
+        if self.use_cprofile and self._profile is None:
+            import cProfile
+            self._profile = cProfile.Profile()
+        if self.use_tracemalloc:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+        if self._profile is not None:
+            self._profile.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if self._profile is not None:
+                self._profile.disable()
+            entry = self._record(self.stages, name, elapsed)
+            if self.use_tracemalloc:
+                entry["memory_bytes"] = entry.get("memory_bytes", 0) + tracemalloc.get_traced_memory()[0] - before
+
+    def timed(self, fn=None, name=None):
+        """Decorator counting calls and time of a hot function; a plain pass-through while disabled."""
+        if fn is None:
+            return functools.partial(self.timed, name=name)
+        label = name or fn.__name__
+        profiler = self
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler._record(profiler.functions, label, time.perf_counter() - started)
+        return wrapper
+
+    def count(self, name, n=1):
+        """Adds to a plain counter (no timing), e.g. candidates examined."""
+        if self.enabled:
+            entry = self.functions.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+            entry["calls"] += n
+
+    def report(self, top=25, **metadata):
+        """The run as a JSON-serializable dict."""
+        report = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "metadata": metadata,
+            "total_seconds": sum(self.stages[name]["seconds"] for name in self.order),
+            "stages": [dict(name=name, **self.stages[name]) for name in self.order],
+            "functions": {name: self.functions[name] for name in sorted(self.functions)}
+        }
+        if self.use_tracemalloc:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                report["memory"] = {"current_bytes": current, "peak_bytes": peak}
+        if self._profile is not None:
+            import pstats
+            stats = pstats.Stats(self._profile)
+            rows = []
+            for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+                rows.append({"function": f"{os.path.basename(filename)}:{line}({function})",
+                             "calls": calls, "own_seconds": own, "cumulative_seconds": cumulative})
+            rows.sort(key=lambda r: -r["cumulative_seconds"])
+            report["cprofile"] = rows[:top]
+        return report
+
+    def write_report(self, path, **metadata):
+        if not self.enabled:
+            return None
+        report = self.report(**metadata)
+        with open(path, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Profile of {len(report['stages'])} stages ({report['total_seconds']:.2f} s) written to {path}")
+        return report
+
+
+PROFILER = StageProfiler()